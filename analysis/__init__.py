@@ -1,30 +1,57 @@
 """
 Analysis package initialization
 """
+import asyncio
+import hashlib
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable
 
 import pandas as pd
+from matplotlib import pyplot as plt
 
 from analysis.eda import analyze_dataframe, plot_count, plot_distribution, \
     boxplot_dist, plot_scatter, plot_heatmap
+from analysis.profiler import DataFrameProfile
 from core import logging_config
+from core.cache import DiskCache, fingerprint
+from core.config import settings
+from core.decorators import profile_stage
+from core.metrics import call_with_stages, merge_stages
+from core.persistence_manager import DataType
 
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
 
 
-def numerical_eda(dataframe: pd.DataFrame) -> None:
+@profile_stage('eda.numerical')
+def numerical_eda(
+        dataframe: pd.DataFrame, name: str = 'data') -> DataFrameProfile:
     """
-    EDA based on numerical values for dataset
+    EDA based on numerical values for dataset. The profile is saved as
+     JSON besides printed, and cached under the fingerprint of the data
     :param dataframe: Dataframe to analyze
     :type dataframe: pd.DataFrame
-    :return: None
-    :rtype: NoneType
+    :param name: Name of the profile
+    :type name: str
+    :return: Profile of the dataframe
+    :rtype: DataFrameProfile
     """
+    cache: DiskCache = DiskCache()
+    key: str = f'profile-{fingerprint(dataframe)}'
+    cached_files: list[str] | None = cache.get(key)
+    if cached_files:
+        logger.info("Profile %s restored from cache", name)
+        return DataFrameProfile.parse_file(cached_files[0])
     logger.info("Running Exploratory Data Analysis")
-    analyze_dataframe(dataframe)
+    profile: DataFrameProfile = analyze_dataframe(dataframe)
+    cache.put(key, [profile.save(name)])
+    return profile
 
 
+@profile_stage('eda.visualize')
 def visualize_data(dataframe: pd.DataFrame) -> None:
     """
     Basic visualization of the dataframe
@@ -34,8 +61,129 @@ def visualize_data(dataframe: pd.DataFrame) -> None:
     :rtype: NoneType
     """
     logger.info("Running visualization")
-    plot_count(dataframe, 'buyer_gender')
-    plot_distribution(dataframe.make_classification, 'lightskyblue')
-    boxplot_dist(dataframe, 'buyer_age', 'color')
-    plot_scatter(dataframe, 'make_classification', 'buyer_age', 'new_car')
-    plot_heatmap(dataframe)
+    cache: DiskCache = DiskCache()
+    for key, (plot_function, args, kwargs, filename) in pending_figure_jobs(
+            dataframe, cache):
+        plot_function(*args, **kwargs)
+        cache.put(key, [f'{DataType.FIGURES.value}{filename}'])
+
+
+FigureJob = tuple[Callable[..., None], tuple, dict[str, Any], str]
+
+
+def figure_jobs(dataframe: pd.DataFrame) -> list[FigureJob]:
+    """
+    Split the visualization into one job per figure holding only the
+     columns that the figure needs
+    :param dataframe: Dataframe to visualize
+    :type dataframe: pd.DataFrame
+    :return: Plot functions with their positional and keyword arguments
+     and the filename of the figure
+    :rtype: list[FigureJob]
+    """
+    hue: str = 'buyer_gender'
+    discrete_columns: list[str] = list(dataframe.select_dtypes(
+        include=['bool', 'category', 'object']).columns)
+    jobs: list[FigureJob] = [
+        (plot_count, (dataframe[list(dict.fromkeys([column, hue]))], hue),
+         {'variables': [column]}, f'discrete_{column}.png')
+        for column in discrete_columns]
+    jobs.extend([
+        (plot_distribution,
+         (dataframe.make_classification, 'lightskyblue'), {},
+         'make_classification.png'),
+        (boxplot_dist, (dataframe[['buyer_age', 'color']], 'buyer_age',
+                        'color'), {}, 'discrete_buyer_age_color.png'),
+        (plot_scatter, (dataframe[['make_classification', 'buyer_age',
+                                   'new_car']], 'make_classification',
+                        'buyer_age', 'new_car'), {},
+         'make_classification_buyer_age_new_car.png'),
+        (plot_heatmap, (dataframe.select_dtypes(include=settings.NUMERICS),),
+         {}, 'correlations_heatmap.png')])
+    return jobs
+
+
+def figure_key(job: FigureJob) -> str:
+    """
+    Cache key of a figure from the fingerprints of its inputs and the
+     settings that style it
+    :param job: Figure job to identify
+    :type job: FigureJob
+    :return: Key of the figure
+    :rtype: str
+    """
+    plot_function, args, kwargs, filename = job
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((
+        plot_function.__name__, kwargs, filename, settings.FIG_SIZE,
+        settings.PALETTE, settings.FONT_SIZE, settings.HIST_BINS)).encode())
+    for argument in args:
+        digest.update((fingerprint(argument) if isinstance(
+            argument, (pd.DataFrame, pd.Series)) else repr(argument)).encode())
+    return f'figure-{digest.hexdigest()}'
+
+
+def pending_figure_jobs(
+        dataframe: pd.DataFrame, cache: DiskCache
+) -> list[tuple[str, FigureJob]]:
+    """
+    Restore the cached figures and return the jobs still to render
+    :param dataframe: Dataframe to visualize
+    :type dataframe: pd.DataFrame
+    :param cache: Cache of the figures
+    :type cache: DiskCache
+    :return: Keys and jobs of the figures whose inputs changed
+    :rtype: list[tuple[str, FigureJob]]
+    """
+    pending: list[tuple[str, FigureJob]] = []
+    for job in figure_jobs(dataframe):
+        key: str = figure_key(job)
+        if cache.restore(key, DataType.FIGURES.value):
+            logger.info("Figure %s restored from cache", job[3])
+        else:
+            pending.append((key, job))
+    return pending
+
+
+def use_headless_backend() -> None:
+    """
+    Switch the worker process to the non-interactive Agg backend
+    :return: None
+    :rtype: NoneType
+    """
+    plt.switch_backend('Agg')
+
+
+@profile_stage('eda.render')
+async def render_figures(
+        dataframe: pd.DataFrame, workers: int = settings.FIGURE_WORKERS
+) -> None:
+    """
+    Render the figures headless in a process pool without showing them,
+     so the event loop remains free to run other stages such as the load
+    :param dataframe: Dataframe to visualize
+    :type dataframe: pd.DataFrame
+    :param workers: Number of rendering processes
+    :type workers: int
+    :return: None
+    :rtype: NoneType
+    """
+    cache: DiskCache = DiskCache()
+    jobs: list[tuple[str, FigureJob]] = pending_figure_jobs(dataframe, cache)
+    if not jobs:
+        return
+    logger.info("Rendering figures headless with %s workers", workers)
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            **logging_config.worker_pool_options(
+                use_headless_backend)) as executor:
+        merge_stages(await asyncio.gather(*[
+            loop.run_in_executor(executor, partial(
+                call_with_stages, plot_function, *args, show=False,
+                **kwargs))
+            for _, (plot_function, args, kwargs, _) in jobs]))
+    for key, (_, _, _, filename) in jobs:
+        cache.put(key, [f'{DataType.FIGURES.value}{filename}'])
+    logger.info("Rendered %s figures", len(jobs))
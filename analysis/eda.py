@@ -4,45 +4,131 @@ Exploratory Data Analysis script including:
 """
 import logging
 import re
+from math import ceil
 
+import numpy as np
 import pandas as pd
 import seaborn as sns
 from matplotlib import pyplot as plt
 
+from analysis.profiler import DataFrameProfile, profile_dataframe
 from core import logging_config
 from core.config import settings
+from core.decorators import profile_stage
 from core.persistence_manager import DataType
 
 pd.set_option('display.max_columns', 10)
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
+KDE_GRID_SIZE: int = 512
 
 
-def analyze_dataframe(dataframe: pd.DataFrame) -> None:
+def analyze_dataframe(dataframe: pd.DataFrame) -> DataFrameProfile:
     """
     Analyze the dataframe and its columns with inference statistics
+     computed in a single pass by the profiler
     :param dataframe: DataFrame to analyze
     :type dataframe: pd.DataFrame
-    :return: None
-    :rtype: NoneType
+    :return: Profile of the dataframe
+    :rtype: DataFrameProfile
     """
     print(dataframe.head())
-    print(dataframe.shape)
-    print(dataframe.dtypes)
-    print(dataframe.info(memory_usage='deep'))
-    print(dataframe.memory_usage(deep=True))
-    print(dataframe.describe(include='all', datetime_is_numeric=True))
-    if not settings.NUMERICS:
-        raise AttributeError("Numerics is not set.")
-    non_numeric_df = dataframe.select_dtypes(exclude=settings.NUMERICS)
-    for column in non_numeric_df.columns:
-        print(non_numeric_df[column].value_counts())
-        print(non_numeric_df[column].unique())
-        print(non_numeric_df[column].value_counts(normalize=True) * 100)
+    profile: DataFrameProfile = profile_dataframe(dataframe)
+    print(profile)
+    return profile
+
+
+def binned_kde(
+        values: np.ndarray, edges: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gaussian kernel density estimate computed by smoothing a fine
+     histogram of the values, so its cost depends on the grid size
+    :param values: Values to estimate the density from
+    :type values: np.ndarray
+    :param edges: Edges of the histogram the curve is scaled to
+    :type edges: np.ndarray
+    :return: Grid points and the estimated counts per histogram bin
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    if len(values) < 2 or not values.std():
+        return np.empty(0), np.empty(0)
+    # Scott's rule of thumb as seaborn does
+    bandwidth: float = values.std(ddof=1) * len(values) ** (-1 / 5)
+    grid_counts, grid_edges = np.histogram(
+        values, bins=KDE_GRID_SIZE, range=(
+            values.min() - 4 * bandwidth, values.max() + 4 * bandwidth))
+    step: float = grid_edges[1] - grid_edges[0]
+    half_width: int = ceil(4 * bandwidth / step)
+    kernel: np.ndarray = np.exp(
+        -0.5 * (np.arange(-half_width, half_width + 1) * step / bandwidth)
+        ** 2)
+    smoothed: np.ndarray = np.convolve(
+        grid_counts, kernel / kernel.sum(), mode='same')
+    return (grid_edges[:-1] + grid_edges[1:]) / 2, \
+        smoothed * np.diff(edges).mean() / step
+
+
+def box_statistics(
+        dataframe: pd.DataFrame, value_column: str, group_column: str
+) -> list[dict]:
+    """
+    Quartiles and whiskers of a numerical column per group, as expected by
+     the matplotlib bxp method
+    :param dataframe: data to aggregate
+    :type dataframe: pd.DataFrame
+    :param value_column: Numerical column to describe
+    :type value_column: str
+    :param group_column: Column to group by
+    :type group_column: str
+    :return: Box statistics per group
+    :rtype: list[dict]
+    """
+    values: pd.Series = dataframe[value_column].astype('float64')
+    groups: pd.Series = dataframe[group_column]
+    quartiles: pd.DataFrame = values.groupby(
+        groups, observed=True).quantile([0.25, 0.5, 0.75]).unstack()
+    iqr: pd.Series = quartiles[0.75] - quartiles[0.25]
+    lower_fence: np.ndarray = (quartiles[0.25] - 1.5 * iqr).reindex(
+        groups).to_numpy()
+    upper_fence: np.ndarray = (quartiles[0.75] + 1.5 * iqr).reindex(
+        groups).to_numpy()
+    whisker_low: pd.Series = values.where(values >= lower_fence).groupby(
+        groups, observed=True).min()
+    whisker_high: pd.Series = values.where(values <= upper_fence).groupby(
+        groups, observed=True).max()
+    return [{'label': str(group), 'q1': quartiles.at[group, 0.25],
+             'med': quartiles.at[group, 0.5],
+             'q3': quartiles.at[group, 0.75],
+             'whislo': whisker_low[group], 'whishi': whisker_high[group]}
+            for group in quartiles.index]
 
 
+def bin_centers(series: pd.Series, bins: int) -> pd.Series:
+    """
+    Replace the values by the center of their bin when the column has
+     more distinct values than bins
+    :param series: Column to bin
+    :type series: pd.Series
+    :param bins: Maximum number of bins
+    :type bins: int
+    :return: Binned column
+    :rtype: pd.Series
+    """
+    if series.nunique() <= bins:
+        return series
+    codes: np.ndarray = pd.cut(
+        series.astype('float64'), bins=bins, labels=False)
+    edges: np.ndarray = np.histogram_bin_edges(
+        series.dropna().astype('float64'), bins=bins)
+    return pd.Series(codes, index=series.index).map(
+        pd.Series((edges[:-1] + edges[1:]) / 2))
+
+
+@profile_stage('eda.plot_count')
 def plot_count(dataframe: pd.DataFrame, hue: str,
-               data_type: DataType = DataType.FIGURES) -> None:
+               data_type: DataType = DataType.FIGURES,
+               variables: list[str] | None = None, show: bool = True) -> None:
     """
     This method plots the counts of observations from the given variables
     :param dataframe: dataframe containing tweets info
@@ -51,12 +137,17 @@ def plot_count(dataframe: pd.DataFrame, hue: str,
     :type hue: str
     :param data_type: Path where data will be saved
     :type data_type: DataType
+    :param variables: Columns to plot. Discrete columns by default
+    :type variables: list[str]
+    :param show: Show the figure besides saving it
+    :type show: bool
     :return: None
     :rtype: NoneType
     """
     plot_iterator: int = 1
-    variables = dataframe.select_dtypes(
-        include=['bool', 'category', 'object'])
+    if variables is None:
+        variables = list(dataframe.select_dtypes(
+            include=['bool', 'category', 'object']).columns)
     label: str
     if not settings.FIG_SIZE:
         raise AttributeError("Figure size is not set.")
@@ -67,9 +158,12 @@ def plot_count(dataframe: pd.DataFrame, hue: str,
     if not settings.RE_REPL:
         raise AttributeError("Regex Pattern to replace is not set.")
     for i in variables:
+        counts: pd.DataFrame = dataframe.groupby(
+            list(dict.fromkeys([i, hue])), observed=False).size().rename(
+            'count').reset_index()
         plt.figure(figsize=settings.FIG_SIZE)
-        sns.countplot(
-            x=dataframe[i], hue=dataframe[hue], palette=settings.PALETTE)
+        sns.barplot(data=counts, x=i, y='count', hue=hue,
+                    palette=settings.PALETTE, errorbar=None)
         label = re.sub(
             pattern=settings.RE_PATTERN, repl=settings.RE_REPL, string=i)
         plt.xlabel(label, fontsize=15)
@@ -78,11 +172,15 @@ def plot_count(dataframe: pd.DataFrame, hue: str,
         plot_iterator += 1
         plt.tight_layout()
         plt.savefig(f'{data_type.value}discrete_{i}.png')
-        plt.show()
+        if show:
+            plt.show()
+        plt.close()
 
 
+@profile_stage('eda.plot_distribution')
 def plot_distribution(df_column: pd.Series, color: str,
-                      data_type: DataType = DataType.FIGURES) -> None:
+                      data_type: DataType = DataType.FIGURES,
+                      show: bool = True) -> None:
     """
     This method plots the distribution of the given quantitative
      continuous variable
@@ -92,6 +190,8 @@ def plot_distribution(df_column: pd.Series, color: str,
     :type color: str
     :param data_type: Path where data will be saved
     :type data_type: DataType
+    :param show: Show the figure besides saving it
+    :type show: bool
     :return: None
     :rtype: NoneType
     """
@@ -103,23 +203,33 @@ def plot_distribution(df_column: pd.Series, color: str,
         raise AttributeError("Regex Pattern to replace is not set.")
     if not settings.FONT_SIZE:
         raise AttributeError("Font size is not set.")
-    plt.figure(figsize=settings.FIG_SIZE)
+    if not settings.HIST_BINS:
+        raise AttributeError("Histogram bins is not set.")
     label: str = re.sub(
         pattern=settings.RE_PATTERN, repl=settings.RE_REPL,
         string=str(df_column.name))
-    dist_plot = sns.displot(x=df_column, kde=True, color=color, height=8,
-                            aspect=1.5)
+    values: np.ndarray = df_column.dropna().to_numpy(dtype=np.float64)
+    counts, edges = np.histogram(
+        values, bins=min(settings.HIST_BINS, max(df_column.nunique(), 1)))
+    grid, kde_counts = binned_kde(values, edges)
+    plt.figure(figsize=settings.FIG_SIZE)
+    plt.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+            color=color, alpha=0.6, edgecolor='white')
+    plt.plot(grid, kde_counts, color=color)
     plt.title('Distribution Plot for ' + label)
     plt.xlabel(label, fontsize=settings.FONT_SIZE)
     plt.ylabel('Frequency', fontsize=settings.FONT_SIZE)
-    dist_plot.fig.tight_layout()
+    plt.tight_layout()
     plt.savefig(f'{data_type.value}{str(df_column.name)}.png')
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
 
 
+@profile_stage('eda.boxplot_dist')
 def boxplot_dist(
         dataframe: pd.DataFrame, first_variable: str, second_variable: str,
-        data_type: DataType = DataType.FIGURES) -> None:
+        data_type: DataType = DataType.FIGURES, show: bool = True) -> None:
     """
     This method plots the distribution of the first variable data
     in regard to the second variable data in a boxplot
@@ -131,6 +241,8 @@ def boxplot_dist(
     :type second_variable: str
     :param data_type: Path where data will be saved
     :type data_type: DataType
+    :param show: Show the figure besides saving it
+    :type show: bool
     :return: None
     :rtype: NoneType
     """
@@ -144,27 +256,36 @@ def boxplot_dist(
         raise AttributeError("Palette is not set.")
     if not settings.FONT_SIZE:
         raise AttributeError("Font size is not set.")
-    plt.figure(figsize=settings.FIG_SIZE)
+    box_stats: list[dict] = box_statistics(
+        dataframe, first_variable, second_variable)
+    _, axes = plt.subplots(figsize=settings.FIG_SIZE)
     x_label: str = re.sub(
         pattern=settings.RE_PATTERN, repl=settings.RE_REPL,
         string=first_variable)
     y_label: str = re.sub(
         pattern=settings.RE_PATTERN, repl=settings.RE_REPL,
         string=second_variable)
-    sns.boxplot(x=first_variable, y=second_variable, data=dataframe,
-                palette=settings.PALETTE)
+    boxes: dict = axes.bxp(
+        box_stats, vert=False, showfliers=False, patch_artist=True)
+    for box, box_color in zip(boxes['boxes'], sns.color_palette(
+            settings.PALETTE, len(box_stats))):
+        box.set_facecolor(box_color)
+    axes.invert_yaxis()
     plt.title(
         x_label + ' in regards to ' + y_label, fontsize=settings.FONT_SIZE)
     plt.xlabel(x_label, fontsize=settings.FONT_SIZE)
     plt.ylabel(y_label, fontsize=settings.FONT_SIZE)
     plt.savefig(
         f'{data_type.value}discrete_{first_variable}_{second_variable}.png')
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
 
 
+@profile_stage('eda.plot_scatter')
 def plot_scatter(
         dataframe: pd.DataFrame, x_column: str, y_column: str, hue: str,
-        data_type: DataType = DataType.FIGURES) -> None:
+        data_type: DataType = DataType.FIGURES, show: bool = True) -> None:
     """
     This method plots the relationship between x and y for hue subset
     :param dataframe: dataframe containing tweets
@@ -177,6 +298,8 @@ def plot_scatter(
     :type hue: str
     :param data_type: Path where data will be saved
     :type data_type: DataType
+    :param show: Show the figure besides saving it
+    :type show: bool
     :return: None
     :rtype: NoneType
     """
@@ -188,25 +311,40 @@ def plot_scatter(
         raise AttributeError("Regex Pattern is not set.")
     if not settings.RE_REPL:
         raise AttributeError("Regex Pattern to replace is not set.")
+    if not settings.HIST_BINS:
+        raise AttributeError("Histogram bins is not set.")
+    binned: pd.DataFrame = pd.DataFrame({
+        x_column: bin_centers(dataframe[x_column], settings.HIST_BINS),
+        y_column: bin_centers(dataframe[y_column], settings.HIST_BINS),
+        hue: dataframe[hue]})
+    counts: pd.DataFrame = binned.groupby(
+        [x_column, y_column, hue], observed=True).size().rename(
+        'count').reset_index()
     plt.figure(figsize=settings.FIG_SIZE)
-    sns.scatterplot(x=x_column, data=dataframe, y=y_column, hue=hue,
-                    palette=settings.PALETTE)
+    sns.scatterplot(x=x_column, data=counts, y=y_column, hue=hue,
+                    size='count', sizes=(20, 400), palette=settings.PALETTE)
     label: str = re.sub(
         pattern=settings.RE_PATTERN, repl=settings.RE_REPL, string=y_column)
     plt.title(f'{x_column} Wise {label} Distribution')
     print(dataframe[[x_column, y_column]].corr())
     plt.savefig(f'{data_type.value}{x_column}_{y_column}_{hue}.png')
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
 
 
+@profile_stage('eda.plot_heatmap')
 def plot_heatmap(dataframe: pd.DataFrame,
-                 data_type: DataType = DataType.FIGURES) -> None:
+                 data_type: DataType = DataType.FIGURES,
+                 show: bool = True) -> None:
     """
     Plot heatmap to analyze correlation between features
     :param dataframe: dataframe containing tweets
     :type dataframe: pd.DataFrame
     :param data_type: Path where data will be saved
     :type data_type: DataType
+    :param show: Show the figure besides saving it
+    :type show: bool
     :return: None
     :rtype: NoneType
     """
@@ -222,4 +360,6 @@ def plot_heatmap(dataframe: pd.DataFrame,
     plt.title('Heatmap showing correlations among columns',
               fontsize=settings.FONT_SIZE)
     plt.savefig(f'{data_type.value}correlations_heatmap.png')
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
@@ -0,0 +1,424 @@
+"""
+Profiler script for Analysis module.
+This script computes the statistics of every column in a single pass
+ over the data, chunk by chunk if needed, with partial states that can be
+ merged into a structured profile. The states are bounded: frequent values
+ are kept in a fixed number of counters, distinct values and quantiles are
+ estimated from fixed-size samples.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+# pylint: disable=no-name-in-module
+from pydantic import BaseModel
+
+from core import logging_config
+from core.config import settings
+from core.persistence_manager import DataType
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+QUANTILES: list[float] = [0.25, 0.5, 0.75]
+
+
+class ValueCount(BaseModel):
+    """
+    Value Count class that inherited from Pydantic BaseModel
+    """
+    value: str
+    count: int
+    percent: float
+
+
+class ColumnProfile(BaseModel):
+    """
+    Column Profile class that inherited from Pydantic BaseModel
+    """
+    name: str
+    dtype: str
+    count: int
+    missing: int
+    memory: int
+    unique: Optional[int] = None
+    minimum: Optional[Union[float, datetime, str]] = None
+    maximum: Optional[Union[float, datetime, str]] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    quantiles: dict[str, float] = {}
+    top: list[ValueCount] = []
+
+
+class DataFrameProfile(BaseModel):
+    """
+    DataFrame Profile class that inherited from Pydantic BaseModel
+    """
+    rows: int
+    memory: int
+    head: list[dict[str, Any]] = []
+    columns: list[ColumnProfile] = []
+
+    def __str__(self) -> str:
+        summary: pd.DataFrame = pd.DataFrame(
+            [column.dict(exclude={'top', 'quantiles'}) | column.quantiles
+             for column in self.columns]).set_index('name')
+        lines: list[str] = [
+            f'{self.rows} rows, {self.memory} bytes', summary.to_string()]
+        for column in self.columns:
+            if column.top:
+                lines.append(f'{column.name}:\n' + pd.DataFrame(
+                    [value.dict() for value in column.top]).to_string(
+                    index=False))
+        return '\n'.join(lines)
+
+    def save(self, name: str, data_type: DataType = DataType.REPORTS) -> str:
+        """
+        Save the profile as JSON file
+        :param name: Name of the profile
+        :type name: str
+        :param data_type: Path where the profile will be saved
+        :type data_type: DataType
+        :return: Path of the profile file
+        :rtype: str
+        """
+        os.makedirs(data_type.value, exist_ok=True)
+        filepath: str = f'{data_type.value}profile-{name}-' \
+                        f'{datetime.now().strftime("%d-%b-%Y-%H-%M-%S")}.json'
+        with open(filepath, 'w', encoding='utf-8') as profile_file:
+            json.dump(json.loads(self.json()), profile_file, indent=2)
+        logger.info("Profile saved to %s", filepath)
+        return filepath
+
+
+def _native(value: Any) -> Any:
+    """
+    Convert a numpy scalar into its native Python value
+    :param value: Value to convert
+    :type value: Any
+    :return: Native value
+    :rtype: Any
+    """
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ColumnState:
+    """
+    Column State class.
+    Partial statistics of a column that can be updated with new chunks and
+     merged with the state of other chunks. Counts of the frequent values
+     are exact while the column has at most max_counters distinct values.
+    """
+
+    def __init__(self, name: str, sample_size: int,
+                 max_counters: int = settings.PROFILE_COUNTERS,
+                 rng: Optional[np.random.Generator] = None) -> None:
+        self.name: str = name
+        self.dtype: str = ''
+        self.count: int = 0
+        self.missing: int = 0
+        self.memory: int = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self.mean: float = 0.0
+        self.sum_squares: float = 0.0
+        self.value_counts: Optional[pd.Series] = None
+        self.max_counters: int = max_counters
+        self.hashes: np.ndarray = np.empty(0, dtype=np.uint64)
+        self.sample_size: int = sample_size
+        self.sample: np.ndarray = np.empty(0)
+        self.priorities: np.ndarray = np.empty(0)
+        self.rng: np.random.Generator = rng or np.random.default_rng(
+            settings.PROFILE_SEED)
+
+    def _merge_moments(self, count: int, mean: float,
+                       sum_squares: float) -> None:
+        """
+        Combine the moments of another partition (Chan et al.)
+        :param count: Number of values of the partition
+        :type count: int
+        :param mean: Mean of the partition
+        :type mean: float
+        :param sum_squares: Sum of squared deviations of the partition
+        :type sum_squares: float
+        :return: None
+        :rtype: NoneType
+        """
+        total: int = self.count + count
+        if not total:
+            return
+        delta: float = mean - self.mean
+        self.sum_squares += sum_squares + delta ** 2 * self.count * count \
+            / total
+        self.mean += delta * count / total
+
+    def _merge_sample(self, sample: np.ndarray,
+                      priorities: np.ndarray) -> None:
+        """
+        Keep the values with the lowest random priorities, which is a
+         uniform sample of the union of both partitions. The partition is
+         sampled first, so at most twice the sample size is concatenated
+        :param sample: Sampled values of the partition
+        :type sample: np.ndarray
+        :param priorities: Random priorities of the sampled values
+        :type priorities: np.ndarray
+        :return: None
+        :rtype: NoneType
+        """
+        if len(sample) > self.sample_size:
+            kept: np.ndarray = np.argpartition(
+                priorities, self.sample_size)[:self.sample_size]
+            sample, priorities = sample[kept], priorities[kept]
+        self.sample = np.concatenate([self.sample, sample])
+        self.priorities = np.concatenate([self.priorities, priorities])
+        if len(self.sample) > self.sample_size:
+            kept: np.ndarray = np.argpartition(
+                self.priorities, self.sample_size)[:self.sample_size]
+            self.sample = self.sample[kept]
+            self.priorities = self.priorities[kept]
+
+    def _merge_counts(self, counts: pd.Series) -> None:
+        """
+        Add the value counts of another partition keeping at most
+         max_counters of them (Misra-Gries). Over the limit, every counter
+         is decreased by the largest count left out, so the kept counts
+         undercount by at most the number of values over max_counters + 1
+        :param counts: Number of rows of each value of the partition
+        :type counts: pd.Series
+        :return: None
+        :rtype: NoneType
+        """
+        counts = counts[counts > 0]
+        if self.value_counts is not None:
+            counts = self.value_counts.add(counts, fill_value=0)
+        if len(counts) > self.max_counters:
+            floor: float = counts.nlargest(self.max_counters + 1).iloc[-1]
+            counts = counts[counts > floor] - floor
+        self.value_counts = counts
+
+    def _merge_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Keep the lowest distinct hashes of the values of both partitions,
+         which estimate the number of distinct values (k minimum values)
+        :param hashes: Lowest distinct hashes of the partition
+        :type hashes: np.ndarray
+        :return: None
+        :rtype: NoneType
+        """
+        self.hashes = np.unique(np.concatenate([self.hashes, hashes]))[
+            :self.sample_size]
+
+    def distinct(self) -> int:
+        """
+        Number of distinct values, exact while they fit in the sample
+        :return: Number of distinct values
+        :rtype: int
+        """
+        if len(self.hashes) < self.sample_size:
+            return len(self.hashes)
+        return int((self.sample_size - 1) * 2.0 ** 64 / float(
+            self.hashes[-1]))
+
+    def _merge_extremes(self, minimum: Any, maximum: Any) -> None:
+        """
+        Combine the minimum and maximum of another partition
+        :param minimum: Minimum of the partition
+        :type minimum: Any
+        :param maximum: Maximum of the partition
+        :type maximum: Any
+        :return: None
+        :rtype: NoneType
+        """
+        if minimum is not None and not pd.isna(minimum):
+            self.minimum = minimum if self.minimum is None \
+                else min(self.minimum, minimum)
+        if maximum is not None and not pd.isna(maximum):
+            self.maximum = maximum if self.maximum is None \
+                else max(self.maximum, maximum)
+
+    def update(self, series: pd.Series) -> None:
+        """
+        Update the state with a chunk of the column
+        :param series: Chunk of the column
+        :type series: pd.Series
+        :return: None
+        :rtype: NoneType
+        """
+        self.dtype = str(series.dtype)
+        self.memory += int(series.memory_usage(index=False, deep=True))
+        missing: int = int(series.isna().sum())
+        self.missing += missing
+        count: int = len(series) - missing
+        if is_numeric_dtype(series) and not is_bool_dtype(series):
+            values: np.ndarray = series.dropna().to_numpy(dtype=np.float64)
+            if count:
+                self._merge_extremes(_native(values.min()),
+                                     _native(values.max()))
+                chunk_mean: float = float(values.mean())
+                self._merge_moments(
+                    count, chunk_mean,
+                    float(((values - chunk_mean) ** 2).sum()))
+                self._merge_sample(values, self.rng.random(count))
+        else:
+            counts: pd.Series = series.value_counts(dropna=True)
+            counts = counts[counts > 0]
+            self._merge_hashes(pd.util.hash_array(
+                counts.index.to_numpy(dtype=object)))
+            self._merge_counts(counts)
+            if str(series.dtype).startswith('datetime') or (
+                    series.dtype == 'category' and series.cat.ordered):
+                self._merge_extremes(series.min(), series.max())
+        self.count += count
+
+    def merge(self, other: 'ColumnState') -> 'ColumnState':
+        """
+        Merge the state of another chunk of the same column
+        :param other: State to merge into this one
+        :type other: ColumnState
+        :return: This state
+        :rtype: ColumnState
+        """
+        self.dtype = self.dtype or other.dtype
+        self.memory += other.memory
+        self.missing += other.missing
+        self._merge_extremes(other.minimum, other.maximum)
+        if other.value_counts is not None:
+            self._merge_hashes(other.hashes)
+            self._merge_counts(other.value_counts)
+        else:
+            self._merge_moments(other.count, other.mean, other.sum_squares)
+            self._merge_sample(other.sample, other.priorities)
+        self.count += other.count
+        return self
+
+    def result(self, top_k: int) -> ColumnProfile:
+        """
+        Build the profile of the column
+        :param top_k: Number of most frequent values to report
+        :type top_k: int
+        :return: Profile of the column
+        :rtype: ColumnProfile
+        """
+        profile: ColumnProfile = ColumnProfile(
+            name=self.name, dtype=self.dtype, count=self.count,
+            missing=self.missing, memory=self.memory,
+            minimum=self.minimum, maximum=self.maximum)
+        if self.value_counts is not None:
+            top: pd.Series = self.value_counts.nlargest(top_k)
+            profile.unique = self.distinct()
+            profile.top = [
+                ValueCount(value=str(value), count=int(count),
+                           percent=count / self.count * 100
+                           if self.count else 0.0)
+                for value, count in top.items()]
+        elif self.count:
+            profile.mean = self.mean
+            profile.std = float(np.sqrt(self.sum_squares / (
+                self.count - 1))) if self.count > 1 else None
+            profile.quantiles = {
+                f'{quantile:.0%}': float(value) for quantile, value in zip(
+                    QUANTILES, np.quantile(self.sample, QUANTILES))}
+        return profile
+
+
+class Profiler:
+    """
+    Profiler class.
+    Accumulates the column states of the chunks of a dataframe. The samples
+     are reproducible for a seed, so profilers merged from other processes
+     should be given distinct seeds.
+    """
+
+    def __init__(self, top_k: int = 10, sample_size: int = 10000,
+                 max_counters: int = settings.PROFILE_COUNTERS,
+                 seed: int = settings.PROFILE_SEED) -> None:
+        self.top_k: int = top_k
+        self.sample_size: int = sample_size
+        self.max_counters: int = max_counters
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.rows: int = 0
+        self.index_memory: int = 0
+        self.head: Optional[pd.DataFrame] = None
+        self.columns: dict[str, ColumnState] = {}
+
+    def update(self, dataframe: pd.DataFrame) -> 'Profiler':
+        """
+        Update the profile with a chunk of the dataframe
+        :param dataframe: Chunk to profile
+        :type dataframe: pd.DataFrame
+        :return: This profiler
+        :rtype: Profiler
+        """
+        if self.head is None:
+            self.head = dataframe.head()
+        self.rows += len(dataframe)
+        self.index_memory += int(dataframe.index.memory_usage())
+        for column in dataframe.columns:
+            if column not in self.columns:
+                self.columns[column] = ColumnState(
+                    column, self.sample_size, self.max_counters, self.rng)
+            self.columns[column].update(dataframe[column])
+        return self
+
+    def merge(self, other: 'Profiler') -> 'Profiler':
+        """
+        Merge the profiler of other chunks, e.g. from another process
+        :param other: Profiler to merge into this one
+        :type other: Profiler
+        :return: This profiler
+        :rtype: Profiler
+        """
+        if self.head is None:
+            self.head = other.head
+        self.rows += other.rows
+        self.index_memory += other.index_memory
+        for column, state in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(state)
+            else:
+                self.columns[column] = state
+        return self
+
+    def result(self) -> DataFrameProfile:
+        """
+        Build the profile of the dataframe
+        :return: Profile of the dataframe
+        :rtype: DataFrameProfile
+        """
+        columns: list[ColumnProfile] = [
+            state.result(self.top_k) for state in self.columns.values()]
+        head: list[dict[str, Any]] = [] if self.head is None else json.loads(
+            self.head.to_json(orient='records', date_format='iso'))
+        return DataFrameProfile(
+            rows=self.rows, head=head, columns=columns,
+            memory=self.index_memory + sum(
+                column.memory for column in columns))
+
+
+def profile_dataframe(dataframe: pd.DataFrame) -> DataFrameProfile:
+    """
+    Profile a dataframe in a single pass
+    :param dataframe: Dataframe to profile
+    :type dataframe: pd.DataFrame
+    :return: Profile of the dataframe
+    :rtype: DataFrameProfile
+    """
+    return Profiler().update(dataframe).result()
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame]) -> DataFrameProfile:
+    """
+    Profile a dataframe given chunk by chunk
+    :param chunks: Chunks of the dataframe
+    :type chunks: Iterable[pd.DataFrame]
+    :return: Profile of the dataframe
+    :rtype: DataFrameProfile
+    """
+    profiler: Profiler = Profiler()
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.result()
@@ -0,0 +1,20 @@
+"""
+Benchmarks package initialization
+"""
+import numpy as np
+import pandas as pd
+
+
+def scale_dataframe(dataframe: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """
+    Scale a dataframe up or down to the given number of rows by repeating
+     its rows
+    :param dataframe: Dataframe to scale
+    :type dataframe: pd.DataFrame
+    :param rows: Number of rows of the scaled dataframe
+    :type rows: int
+    :return: Scaled dataframe
+    :rtype: pd.DataFrame
+    """
+    positions: np.ndarray = np.arange(rows) % len(dataframe)
+    return dataframe.take(positions).reset_index(drop=True)
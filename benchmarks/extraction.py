@@ -0,0 +1,93 @@
+"""
+Benchmark script for the extraction of the raw data.
+Compares the parse time of the per-cell gender converter against the
+ vectorized gender mapping over raw_data.csv scaled to 10M rows:
+ python -m benchmarks.extraction
+"""
+import logging
+import os
+from time import perf_counter
+
+import pandas as pd
+
+from core import logging_config
+from core.config import settings
+from core.persistence_manager import PersistenceManager, DataType
+from engineering.extraction import D_TYPES, GENDER_MAPPING, \
+    extract_raw_data
+from schema.gender import Gender
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def scale_csv(
+        filename: str = 'raw_data.csv', rows: int = 10000000,
+        data_type: DataType = DataType.RAW) -> str:
+    """
+    Write a copy of the raw file scaled to the given number of rows by
+     repeating its data lines
+    :param filename: Raw file to scale
+    :type filename: str
+    :param rows: Number of data rows of the scaled file
+    :type rows: int
+    :param data_type: Path where the raw data is saved
+    :type data_type: DataType
+    :return: Filename of the scaled file
+    :rtype: str
+    """
+    scaled_filename: str = f'scaled_{rows}_{filename}'
+    with open(f'{data_type.value}{filename}', encoding=settings.ENCODING
+              ) as raw_file:
+        header: str = raw_file.readline()
+        lines: list[str] = [line if line.endswith('\n') else f'{line}\n'
+                            for line in raw_file]
+    with open(f'{data_type.value}{scaled_filename}', 'w',
+              encoding=settings.ENCODING) as scaled_file:
+        scaled_file.write(header)
+        for _ in range(rows // len(lines)):
+            scaled_file.writelines(lines)
+        scaled_file.writelines(lines[:rows % len(lines)])
+    return scaled_filename
+
+
+def converter_extraction(filename: str) -> pd.DataFrame:
+    """
+    Previous extraction with a per-cell gender converter
+    :param filename: Filename to extract data from
+    :type filename: str
+    :return: Dataframe with raw data
+    :rtype: pd.DataFrame
+    """
+    return PersistenceManager.load_from_csv(
+        filename=filename, dtypes=D_TYPES, converters={'Buyer Gender': lambda gender: GENDER_MAPPING.get(
+            gender, Gender.OTHER.value)})
+
+
+def benchmark_extraction(rows: int = 10000000) -> dict[str, float]:
+    """
+    Measure the parse time of the raw file with each gender conversion
+    :param rows: Number of rows of the scaled raw file
+    :type rows: int
+    :return: Seconds taken by each extraction
+    :rtype: dict[str, float]
+    """
+    scaled_filename: str = scale_csv(rows=rows)
+    timings: dict[str, float] = {}
+    try:
+        for name, extraction in (
+                ('converter', converter_extraction),
+                ('vectorized', lambda filename: extract_raw_data(
+                    filename, 'Buyer Gender'))):
+            start_time: float = perf_counter()
+            extraction(scaled_filename)
+            timings[name] = perf_counter() - start_time
+            logger.info("%s extraction of %s rows took %s seconds.", name,
+                        rows, timings[name])
+    finally:
+        os.remove(f'{DataType.RAW.value}{scaled_filename}')
+    return timings
+
+
+if __name__ == '__main__':
+    print(benchmark_extraction())
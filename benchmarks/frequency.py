@@ -0,0 +1,70 @@
+"""
+Parity check of the make frequency sketch against the exact binning.
+Classifies raw_data.csv scaled to 1M rows chunk by chunk with sketches
+ built in separate chunks and merged, in exact and in count-min mode:
+ python -m benchmarks.frequency
+"""
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.extraction import scale_csv
+from core import logging_config
+from core.persistence_manager import DataType
+from engineering import count_make_frequencies, extract_data_chunks
+from engineering.frequency import MakeFrequencySketch
+from engineering.transformation import create_categorical_model, \
+    remove_missing_values, strip_columns
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def check_frequency_parity(
+        rows: int = 1000000, max_exact: int = 10000) -> dict[str, float]:
+    """
+    Share of rows classified as the exact binning does by a merged sketch
+    :param rows: Number of rows of the scaled raw file
+    :type rows: int
+    :param max_exact: Cardinality from which the sketch is approximate.
+     Zero forces the count-min mode
+    :type max_exact: int
+    :return: Agreement with the exact binning and maximum bin distance
+    :rtype: dict[str, float]
+    """
+    scaled_filename: str = scale_csv(rows=rows)
+    try:
+        make_counts: pd.Series = count_make_frequencies(scaled_filename)
+        chunks: list[pd.Series] = [
+            remove_missing_values(strip_columns(chunk))['Make']
+            for chunk in extract_data_chunks(scaled_filename)]
+    finally:
+        os.remove(f'{DataType.RAW.value}{scaled_filename}')
+    # One sketch per chunk, as independent workers would build them
+    make_sketch: MakeFrequencySketch = MakeFrequencySketch(
+        max_exact=max_exact)
+    for chunk in chunks:
+        make_sketch.merge(
+            MakeFrequencySketch(max_exact=max_exact).update(chunk))
+    exact: np.ndarray = np.concatenate([create_categorical_model(
+        chunk.to_frame(), make_counts=make_counts)[
+        'Make Classification'].to_numpy() for chunk in chunks])
+    approximate: np.ndarray = np.concatenate(
+        [make_sketch.classify(chunk) for chunk in chunks])
+    distance: np.ndarray = np.abs(
+        exact.astype(np.int16) - approximate.astype(np.int16))
+    parity: dict[str, float] = {
+        'agreement': float((distance == 0).mean()),
+        'max_bin_distance': float(distance.max())}
+    logger.info("Sketch parity over %s rows (exact mode: %s): %s", rows,
+                make_sketch.is_exact, parity)
+    return parity
+
+
+if __name__ == '__main__':
+    exact_parity: dict[str, float] = check_frequency_parity()
+    assert exact_parity['agreement'] == 1.0, exact_parity
+    print(exact_parity)
+    print(check_frequency_parity(max_exact=0))
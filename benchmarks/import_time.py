@@ -0,0 +1,103 @@
+"""
+Benchmark script for the startup of the pipeline.
+Measures the import time of every subcommand from the output of
+ python -X importtime and checks it against the budget and the modules
+ it must not import. The imports of a subcommand are read from the code
+ of its handler. Exits with an error if a subcommand is over budget:
+ python -m benchmarks.import_time
+"""
+import ast
+import inspect
+import subprocess
+import sys
+import textwrap
+
+import pandas as pd
+
+import main
+
+IMPORT_BUDGETS: dict[str, float] = {
+    'help': 0.1, 'extract': 2.0, 'transform': 2.0, 'load': 2.5, 'eda': 2.5,
+    'run': 3.0}
+DATABASE_MODULES: tuple[str, ...] = ('sqlalchemy', 'asyncpg')
+PLOTTING_MODULES: tuple[str, ...] = ('matplotlib', 'seaborn')
+FORBIDDEN_MODULES: dict[str, tuple[str, ...]] = {
+    'help': ('pandas', 'pydantic', *DATABASE_MODULES, *PLOTTING_MODULES),
+    'extract': (*DATABASE_MODULES, *PLOTTING_MODULES),
+    'transform': (*DATABASE_MODULES, *PLOTTING_MODULES),
+    'load': PLOTTING_MODULES,
+    'eda': DATABASE_MODULES,
+    'run': ()}
+
+
+def command_imports(command: str) -> tuple[str, ...]:
+    """
+    Import statements run by a subcommand: the ones of the entry point,
+     of the main function and of the handler of the subcommand. The help
+     exits while parsing the arguments, before any of them
+    :param command: Subcommand, or help
+    :type command: str
+    :return: Import statements in order of execution
+    :rtype: tuple[str, ...]
+    """
+    if command not in main.COMMANDS:
+        return ()
+    statements: dict[str, None] = {}
+    for function in (main.cli, main.main, main.COMMANDS[command]):
+        tree: ast.AST = ast.parse(textwrap.dedent(inspect.getsource(
+            function)))
+        statements.update(dict.fromkeys(
+            ast.unparse(node) for node in ast.walk(tree)
+            if isinstance(node, (ast.Import, ast.ImportFrom))))
+    return tuple(statements)
+
+
+def import_times(statements: tuple[str, ...]) -> dict[str, int]:
+    """
+    Cumulative import time of every module imported by a fresh
+     interpreter that imports the main script and runs the given imports
+    :param statements: Import statements to run after the main script
+    :type statements: tuple[str, ...]
+    :return: Cumulative microseconds by module, with the total under the
+     empty name
+    :rtype: dict[str, int]
+    """
+    stderr: str = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         '; '.join(('import main', *statements))],
+        capture_output=True, text=True, check=True).stderr
+    times: dict[str, int] = {'': 0}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+        if not name.startswith('  '):
+            times[''] += int(cumulative)
+    return times
+
+
+def benchmark_import_time() -> pd.DataFrame:
+    """
+    Measure the import time of each subcommand against its budget
+    :return: Seconds, budget and forbidden modules imported by subcommand
+    :rtype: pd.DataFrame
+    """
+    results: dict[str, dict] = {}
+    for command in IMPORT_BUDGETS:
+        times: dict[str, int] = import_times(command_imports(command))
+        forbidden: list[str] = [
+            module for module in FORBIDDEN_MODULES[command]
+            if module in times]
+        results[command] = {
+            'seconds': times[''] / 1e6, 'budget': IMPORT_BUDGETS[command],
+            'forbidden': ', '.join(forbidden),
+            'passed': times[''] / 1e6 <= IMPORT_BUDGETS[command]
+            and not forbidden}
+    return pd.DataFrame(results).T
+
+
+if __name__ == '__main__':
+    report: pd.DataFrame = benchmark_import_time()
+    print(report)
+    sys.exit(0 if report['passed'].all() else 1)
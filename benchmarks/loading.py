@@ -0,0 +1,55 @@
+"""
+Benchmark script for the loading engines.
+Inserts the transformed raw data with every engine and reports the
+ throughput. Run it against a disposable database:
+ python -m benchmarks.loading
+"""
+import asyncio
+import logging
+from time import perf_counter
+
+import pandas as pd
+from sqlalchemy import text
+
+from benchmarks import scale_dataframe
+from core import logging_config
+from db.db import init_db
+from db.session import async_engine
+from engineering import extract_data, transform_data, load_to_db
+from schema.load_engine import LoadEngine
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def benchmark_loading(rows: int = 100000) -> dict[str, float]:
+    """
+    Measure the rows per second inserted by each loading engine
+    :param rows: Number of rows to insert with each engine
+    :type rows: int
+    :return: Rows per second by engine name
+    :rtype: dict[str, float]
+    """
+    await init_db()
+    dataframe: pd.DataFrame = scale_dataframe(
+        transform_data(extract_data()), rows)
+    throughput: dict[str, float] = {}
+    for engine in LoadEngine:
+        async with async_engine.begin() as connection:
+            last_id: int = (await connection.execute(
+                text('SELECT coalesce(max(id), 0) FROM car'))).scalar_one()
+        start_time: float = perf_counter()
+        await load_to_db(dataframe, engine)
+        run_time: float = perf_counter() - start_time
+        throughput[engine.value] = rows / run_time
+        logger.info("%s engine inserted %s rows in %s seconds (%s rows/s)",
+                    engine.value, rows, run_time, throughput[engine.value])
+        async with async_engine.begin() as connection:
+            await connection.execute(
+                text('DELETE FROM car WHERE id > :last_id'),
+                {'last_id': last_id})
+    return throughput
+
+
+if __name__ == '__main__':
+    print(asyncio.run(benchmark_loading()))
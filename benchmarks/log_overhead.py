@@ -0,0 +1,104 @@
+"""
+Benchmark script for the logging backend.
+Compares the time spent by the caller on one debug record per inserted
+ row with the former duplicated synchronous handlers, the queue handler
+ with and without rate limit, and the debug level disabled:
+ python -m benchmarks.log_overhead
+"""
+import logging
+import os
+import queue
+import tempfile
+from logging.handlers import QueueHandler, QueueListener
+from time import perf_counter
+
+import pandas as pd
+
+from core import logging_config
+from core.logging_config import RateLimitFilter
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+DUPLICATED_HANDLERS: int = 10
+FORMAT: str = '[%(name)s][%(asctime)s][%(levelname)s][%(module)s][' \
+              '%(funcName)s][%(lineno)d]: %(message)s'
+
+
+def file_handler(directory: str, name: str) -> logging.FileHandler:
+    """
+    File handler with the format of the log files
+    :param directory: Directory of the log file
+    :type directory: str
+    :param name: Name of the log file
+    :type name: str
+    :return: Handler writing to the file
+    :rtype: logging.FileHandler
+    """
+    handler: logging.FileHandler = logging.FileHandler(
+        os.path.join(directory, f'{name}.log'))
+    handler.setFormatter(logging.Formatter(FORMAT))
+    return handler
+
+
+def log_rows(row_logger: logging.Logger, rows: int) -> float:
+    """
+    Seconds taken by the caller to log one debug record per row
+    :param row_logger: Logger of the rows
+    :type row_logger: logging.Logger
+    :param rows: Number of rows
+    :type rows: int
+    :return: Seconds taken
+    :rtype: float
+    """
+    start_time: float = perf_counter()
+    for row in range(rows):
+        row_logger.debug("Inserted row %s", row)
+    return perf_counter() - start_time
+
+
+def benchmark_log_overhead(rows: int = 1000000) -> pd.DataFrame:
+    """
+    Measure the logging overhead of the rows in each configuration
+    :param rows: Number of inserted rows to log
+    :type rows: int
+    :return: Caller and drain seconds by configuration
+    :rtype: pd.DataFrame
+    """
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('duplicated', 'queue', 'rate-limited', 'disabled'):
+            row_logger: logging.Logger = logging.getLogger(
+                f'{__name__}.{name}')
+            row_logger.propagate = False
+            row_logger.setLevel(
+                logging.INFO if name == 'disabled' else logging.DEBUG)
+            listener: QueueListener | None = None
+            if name == 'duplicated':
+                for handler in range(DUPLICATED_HANDLERS):
+                    row_logger.addHandler(
+                        file_handler(directory, f'{name}-{handler}'))
+            else:
+                log_queue: queue.SimpleQueue = queue.SimpleQueue()
+                queue_handler: QueueHandler = QueueHandler(log_queue)
+                if name == 'rate-limited':
+                    queue_handler.addFilter(RateLimitFilter())
+                row_logger.addHandler(queue_handler)
+                listener = QueueListener(
+                    log_queue, file_handler(directory, name))
+                listener.start()
+            caller: float = log_rows(row_logger, rows)
+            start_time: float = perf_counter()
+            if listener:
+                listener.stop()
+            results[name] = {
+                'caller_seconds': caller,
+                'drain_seconds': perf_counter() - start_time,
+                'microseconds_per_row': caller / rows * 1e6}
+            for handler in list(row_logger.handlers):
+                row_logger.removeHandler(handler)
+                handler.close()
+    return pd.DataFrame(results).T
+
+
+if __name__ == '__main__':
+    print(benchmark_log_overhead())
@@ -0,0 +1,122 @@
+"""
+Benchmark script for the layouts of the Car table.
+Recreates the table with each layout, inserts the same rows in the order
+ of the raw file, as the loaders do, and times the reporting queries. Run it against a disposable
+ local Postgres, since the Car table is dropped:
+ python -m benchmarks.partitioning
+"""
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+from statistics import median
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from benchmarks import scale_dataframe
+from core import logging_config
+from core.config import settings
+from db.db import init_db
+from db.session import async_engine
+from engineering import extract_data, transform_data, load_to_db
+from models.car import Car
+from schema.load_engine import LoadEngine
+from schema.table_layout import TableLayout
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+QUERIES: dict[str, str] = {
+    'year_make': 'SELECT count(*), avg(sale_price) FROM car WHERE '
+                 'purchase_year = 2021 AND make_classification = 3',
+    'date_range': "SELECT count(*), sum(sale_price) FROM car WHERE "
+                  "purchase_date >= '2021-03-01' AND "
+                  "purchase_date < '2021-04-01'",
+    'yearly_sales': 'SELECT purchase_year, count(*), sum(sale_price) FROM car '
+                    'GROUP BY purchase_year',
+    'by_id': 'SELECT * FROM car WHERE id = 12345'}
+
+
+def unique_rows(dataframe: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """
+    Scale the dataframe to the number of rows, shifting the purchase date
+     of every repetition by one more second so the natural key of the
+     sales stays unique. The rows keep the order of the raw file, which is
+     not sorted by purchase date
+    :param dataframe: Transformed dataframe
+    :type dataframe: pd.DataFrame
+    :param rows: Number of rows of the scaled dataframe
+    :type rows: int
+    :return: Scaled dataframe in the order of the raw file
+    :rtype: pd.DataFrame
+    """
+    scaled: pd.DataFrame = scale_dataframe(dataframe, rows)
+    scaled['purchase_date'] += pd.to_timedelta(
+        np.arange(rows) // len(dataframe), unit='s')
+    return scaled
+
+
+async def benchmark_layout(
+        rows: int = 1000000, repeats: int = 5) -> dict[str, float]:
+    """
+    Measure the insert and query times of the configured table layout
+    :param rows: Number of rows to insert
+    :type rows: int
+    :param repeats: Number of runs of each query
+    :type repeats: int
+    :return: Seconds to insert, rows per second and median milliseconds by
+     query
+    :rtype: dict[str, float]
+    """
+    dataframe: pd.DataFrame = unique_rows(
+        transform_data(extract_data()), rows)
+    async with async_engine.begin() as connection:
+        await connection.execute(
+            text(f'DROP TABLE IF EXISTS {Car.__tablename__} CASCADE'))
+    await init_db()
+    start_time: float = perf_counter()
+    await load_to_db(dataframe, LoadEngine.COPY)
+    insert_time: float = perf_counter() - start_time
+    results: dict[str, float] = {
+        'insert_seconds': insert_time, 'rows_per_second': rows / insert_time}
+    async with async_engine.begin() as connection:
+        await connection.execute(text(f'ANALYZE {Car.__tablename__}'))
+        for name, query in QUERIES.items():
+            timings: list[float] = []
+            for _ in range(repeats):
+                start_time = perf_counter()
+                (await connection.execute(text(query))).fetchall()
+                timings.append(perf_counter() - start_time)
+            results[f'{name}_ms'] = median(timings) * 1000
+    logger.info("%s layout: %s", settings.CAR_LAYOUT, results)
+    return results
+
+
+def benchmark_partitioning(rows: int = 1000000) -> pd.DataFrame:
+    """
+    Run the benchmark of every layout in its own process, since the layout
+     of the Car model is fixed when it is imported
+    :param rows: Number of rows to insert with each layout
+    :type rows: int
+    :return: Insert and query times by layout
+    :rtype: pd.DataFrame
+    """
+    results: dict[str, dict[str, float]] = {}
+    for layout in TableLayout:
+        output: str = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.partitioning', str(rows)],
+            env={**os.environ, 'CAR_LAYOUT': layout.value},
+            capture_output=True, text=True, check=True).stdout
+        results[layout.value] = json.loads(output.splitlines()[-1])
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    if 'CAR_LAYOUT' in os.environ:
+        print(json.dumps(asyncio.run(benchmark_layout(int(sys.argv[1])))))
+    else:
+        print(benchmark_partitioning())
@@ -0,0 +1,119 @@
+"""
+Benchmark script for the processed data formats.
+Compares the size and load time of pickle against Parquet and Feather,
+ including column projection and row filters:
+ python -m benchmarks.persistence
+"""
+import logging
+import os
+import shutil
+from time import perf_counter
+from typing import Callable
+
+import pandas as pd
+
+from benchmarks import scale_dataframe
+from core import logging_config
+from core.persistence_manager import PersistenceManager, DataType
+from engineering import extract_data, transform_data
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+COLUMNS: list[str] = ['purchase_year', 'make_classification', 'sale_price']
+FILTERS: list[tuple] = [('purchase_year', '=', 2021), ('new_car', '=', True)]
+
+
+def path_size(path: str) -> int:
+    """
+    Size in bytes of a file or of all the files inside a directory
+    :param path: Path of the file or directory
+    :type path: str
+    :return: Size in bytes
+    :rtype: int
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def timed(load: Callable[[], pd.DataFrame]) -> float:
+    """
+    Seconds taken by a load function
+    :param load: Function that loads a dataframe
+    :type load: Callable
+    :return: Seconds taken
+    :rtype: float
+    """
+    start_time: float = perf_counter()
+    load()
+    return perf_counter() - start_time
+
+
+def benchmark_persistence(rows: int = 1000000) -> pd.DataFrame:
+    """
+    Measure size and load times of each processed data format
+    :param rows: Number of rows of the processed dataframe
+    :type rows: int
+    :return: Size and load times by format
+    :rtype: pd.DataFrame
+    """
+    dataframe: pd.DataFrame = scale_dataframe(
+        transform_data(extract_data()), rows)
+    results: dict[str, dict[str, float]] = {}
+    prefix: str = 'benchmark_'
+    PersistenceManager.save_to_pickle(dataframe, filename=f'{prefix}df.pkl')
+    results['pickle'] = {
+        'bytes': path_size(f'{DataType.PROCESSED.value}{prefix}df.pkl'),
+        'full': timed(lambda: PersistenceManager.load_from_pickle(
+            DataType.PROCESSED, f'{prefix}df.pkl'))}
+    for compression in ('snappy', 'zstd'):
+        filename: str = f'{prefix}{compression}.parquet'
+        PersistenceManager.save_to_parquet(
+            dataframe, filename=filename, compression=compression)
+        results[f'parquet-{compression}'] = {
+            'bytes': path_size(f'{DataType.PROCESSED.value}{filename}'),
+            'full': timed(lambda: PersistenceManager.load_from_parquet(
+                filename=filename)),
+            'columns': timed(lambda: PersistenceManager.load_from_parquet(
+                filename=filename, columns=COLUMNS)),
+            'filters': timed(lambda: PersistenceManager.load_from_parquet(
+                filename=filename, filters=FILTERS))}
+    filename = f'{prefix}partitioned.parquet'
+    PersistenceManager.save_to_parquet(
+        dataframe, filename=filename, partition_cols=['purchase_year'])
+    results['parquet-partitioned'] = {
+        'bytes': path_size(f'{DataType.PROCESSED.value}{filename}'),
+        'full': timed(lambda: PersistenceManager.load_from_parquet(
+            filename=filename)),
+        'columns': timed(lambda: PersistenceManager.load_from_parquet(
+            filename=filename, columns=COLUMNS)),
+        'filters': timed(lambda: PersistenceManager.load_from_parquet(
+            filename=filename, filters=FILTERS))}
+    for compression in ('lz4', 'zstd'):
+        filename = f'{prefix}{compression}.feather'
+        PersistenceManager.save_to_feather(
+            dataframe, filename=filename, compression=compression)
+        results[f'feather-{compression}'] = {
+            'bytes': path_size(f'{DataType.PROCESSED.value}{filename}'),
+            'full': timed(lambda: PersistenceManager.load_from_feather(
+                filename=filename)),
+            'columns': timed(lambda: PersistenceManager.load_from_feather(
+                filename=filename, columns=COLUMNS)),
+            'filters': timed(lambda: PersistenceManager.load_from_feather(
+                filename=filename, filters=FILTERS))}
+    for name in os.listdir(DataType.PROCESSED.value):
+        if name.startswith(prefix):
+            path: str = f'{DataType.PROCESSED.value}{name}'
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+    report: pd.DataFrame = pd.DataFrame(results).T
+    logger.info("Persistence benchmark for %s rows:\n%s", rows, report)
+    return report
+
+
+if __name__ == '__main__':
+    print(benchmark_persistence())
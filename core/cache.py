@@ -0,0 +1,176 @@
+"""
+Cache script for Core module.
+This script fingerprints the content of dataframes and stores derived
+ files on disk under those fingerprints with size-bounded LRU eviction.
+"""
+import hashlib
+import logging
+import os
+import shutil
+from time import time
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+import psutil
+
+from core import logging_config
+from core.config import settings
+from core.persistence_manager import DataType
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+STAGING_TIMEOUT: float = 3600.0
+
+
+def _buffer(data: pd.Series | pd.Index) -> Any:
+    """
+    Bytes that identify the values of a column. Plain numpy columns are
+     hashed from their buffer without copying; the rest with pandas hashing
+    :param data: Column or index to read
+    :type data: pd.Series | pd.Index
+    :return: Buffer of the column
+    :rtype: Any
+    """
+    if isinstance(data, pd.RangeIndex):
+        return repr(data).encode()
+    if isinstance(data, pd.Series) and isinstance(
+            data.dtype, pd.CategoricalDtype):
+        return data.cat.codes.to_numpy().tobytes() + \
+            pd.util.hash_pandas_object(
+                data.cat.categories, index=False).to_numpy().tobytes()
+    if isinstance(data.dtype, np.dtype) and data.dtype != object:
+        return np.ascontiguousarray(data.to_numpy()).view(np.uint8).data
+    return pd.util.hash_pandas_object(data, index=False).to_numpy().data
+
+
+def fingerprint(data: pd.DataFrame | pd.Series) -> str:
+    """
+    Content fingerprint of a dataframe or series from its labels, dtypes
+     and column buffers
+    :param data: Dataframe or series to fingerprint
+    :type data: pd.DataFrame | pd.Series
+    :return: Hexadecimal digest of the content
+    :rtype: str
+    """
+    frame: pd.DataFrame = data.to_frame() \
+        if isinstance(data, pd.Series) else data
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(frame.columns), [
+        str(d_type) for d_type in frame.dtypes])).encode())
+    digest.update(_buffer(frame.index))
+    for column in frame.columns:
+        digest.update(_buffer(frame[column]))
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Disk Cache class.
+    Stores files in one directory per key. Reading an entry refreshes its
+     modification time, which is used to evict the least recently used
+     entries once the cache exceeds its size.
+    """
+
+    def __init__(self, data_type: DataType = DataType.CACHE,
+                 max_bytes: int = settings.CACHE_MAX_BYTES) -> None:
+        self.directory: str = data_type.value
+        self.max_bytes: int = max_bytes
+
+    def get(self, key: str) -> Optional[list[str]]:
+        """
+        Get the files stored under a key
+        :param key: Key of the entry
+        :type key: str
+        :return: Paths of the cached files, None if the key is not cached
+        :rtype: Optional[list[str]]
+        """
+        entry: str = f'{self.directory}{key}/'
+        if not os.path.isdir(entry):
+            return None
+        os.utime(entry)
+        return sorted(f'{entry}{filename}' for filename in os.listdir(entry))
+
+    def put(self, key: str, filepaths: list[str]) -> list[str]:
+        """
+        Store copies of the files under a key and evict the least recently
+         used entries if the cache is full
+        :param key: Key of the entry
+        :type key: str
+        :param filepaths: Files to store
+        :type filepaths: list[str]
+        :return: Paths of the cached files
+        :rtype: list[str]
+        """
+        entry: str = f'{self.directory}{key}/'
+        staging: str = f'{self.directory}.{key}-{os.getpid()}/'
+        os.makedirs(staging, exist_ok=True)
+        for filepath in filepaths:
+            shutil.copy2(filepath, staging)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+        os.utime(entry)
+        self.evict()
+        return self.get(key) or []
+
+    def restore(self, key: str, directory: str) -> bool:
+        """
+        Copy the files stored under a key into a directory
+        :param key: Key of the entry
+        :type key: str
+        :param directory: Destination directory
+        :type directory: str
+        :return: True if the key was cached; otherwise false
+        :rtype: bool
+        """
+        filepaths: Optional[list[str]] = self.get(key)
+        if not filepaths:
+            return False
+        os.makedirs(directory, exist_ok=True)
+        for filepath in filepaths:
+            shutil.copy2(filepath, directory)
+        return True
+
+    @staticmethod
+    def is_stale_staging(name: str, modified_at: float) -> bool:
+        """
+        Whether a staging directory was left by an interrupted put: its
+         process is gone, or it is older than the staging timeout
+        :param name: Name of the staging directory, .<key>-<pid>
+        :type name: str
+        :param modified_at: Modification time of the directory
+        :type modified_at: float
+        :return: True if the directory can be removed; otherwise false
+        :rtype: bool
+        """
+        if time() - modified_at > STAGING_TIMEOUT:
+            return True
+        pid: str = name.rpartition('-')[2]
+        return pid.isdigit() and not psutil.pid_exists(int(pid))
+
+    def evict(self) -> None:
+        """
+        Remove the staging directories of interrupted puts and the least
+         recently used entries until the cache fits
+        :return: None
+        :rtype: NoneType
+        """
+        entries: list[tuple[float, int, str]] = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            if entry.name.startswith('.'):
+                if self.is_stale_staging(entry.name, entry.stat().st_mtime):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    logger.info("Removed stale cache staging %s", entry.path)
+            else:
+                size: int = sum(file.stat().st_size
+                                for file in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+        total: int = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.info("Evicted cache entry %s", path)
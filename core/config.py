@@ -16,6 +16,9 @@ class Settings(BaseSettings):
     NUM_BINS: int
     MAX_COLUMNS: int
     CHUNK_SIZE: int
+    CSV_ENGINE: str = 'c'
+    RAW_FILES: str = 'raw_data.csv'
+    EXTRACT_WORKERS: int = 4
     WIDTH: int
     PALETTE: str
     FONT_SIZE: int
@@ -23,6 +26,25 @@ class Settings(BaseSettings):
     RE_REPL: str
     COLORS: list[str]
     LABELS: list[str]
+    STREAMING: bool = False
+    MAKE_SKETCH: bool = False
+    MAKE_MODEL: bool = False
+    MODEL_DRIFT_THRESHOLD: float = 0.05
+    TRANSFORM_WORKERS: int = 1
+    SHARD_SIZE: int = 250000
+    QUEUE_SIZE: int = 2
+    INCREMENTAL: bool = False
+    LOAD_ENGINE: str = 'orm'
+    TRACE_MEMORY: bool = False
+    HEADLESS: bool = False
+    FIGURE_WORKERS: int = 4
+    HIST_BINS: int = 50
+    PROFILE_COUNTERS: int = 1000
+    PROFILE_SEED: int = 0
+    CACHE_MAX_BYTES: int = 104857600
+    CACHE_ENTRIES: int = 10000
+    CACHE_TTL: float = 300.0
+    LOG_RATE_LIMIT: int = 100
 
     FIG_SIZE: tuple[int, int] = (15, 8)
     NUMERICS: list[str] = [
@@ -41,6 +63,13 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     SQLALCHEMY_DATABASE_URI: PostgresDsn = None
+    DB_ECHO: bool = False
+    CAR_LAYOUT: str = 'heap'
+    PARTITION_FIRST_YEAR: int = 2018
+    POOL_SIZE: int = 5
+    MAX_OVERFLOW: int = 10
+    BATCH_SIZE: int = 5000
+    CONCURRENCY: int = 4
 
     @validator("SQLALCHEMY_DATABASE_URI", pre=True)
     def assemble_db_connection(cls, v: Optional[str],
@@ -2,11 +2,13 @@
 Main script
 """
 import functools
+import inspect
 import logging
 from time import perf_counter
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 
 from core import logging_config
+from core.metrics import measure_stage, find_data
 
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
@@ -21,6 +23,16 @@ def with_logging(func: Callable[..., Any]) -> Callable[..., Any]:
     :rtype: Any
     """
 
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            logger.info("Calling %s", func.__name__)
+            value = await func(*args, **kwargs)
+            logger.info("Finished %s", func.__name__)
+            return value
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         logger.info("Calling %s", func.__name__)
@@ -40,6 +52,19 @@ def benchmark(func: Callable[..., Any]) -> Callable[..., Any]:
     :rtype: Any
     """
 
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            start_time = perf_counter()
+            value = await func(*args, **kwargs)
+            end_time = perf_counter()
+            run_time = end_time - start_time
+            logger.info("Execution of %s took %s seconds.",
+                        func.__name__, run_time)
+            return value
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         start_time = perf_counter()
@@ -51,3 +76,40 @@ def benchmark(func: Callable[..., Any]) -> Callable[..., Any]:
         return value
 
     return wrapper
+
+
+def profile_stage(
+        stage: Optional[str] = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator to record the metrics of a pipeline stage into the run
+     report. Works with sync and async functions
+    :param stage: Name of the stage. Function name by default
+    :type stage: str
+    :return: Decorator for the stage function
+    :rtype: Callable
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        stage_name: str = stage or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with measure_stage(
+                        stage_name, find_data(*args, **kwargs)) as result:
+                    result['output'] = await func(*args, **kwargs)
+                return result['output']
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with measure_stage(
+                    stage_name, find_data(*args, **kwargs)) as result:
+                result['output'] = func(*args, **kwargs)
+            return result['output']
+
+        return wrapper
+
+    return decorator
@@ -1,36 +1,136 @@
 """
-Logging script for Core module
+Logging script for Core module.
+The main process writes the records of its threads and of its worker
+ processes from a background listener. Worker processes do not open log
+ files: they send their records to the main process through a queue.
 """
+import atexit
 import logging
+import multiprocessing
 import os
+import queue
 from datetime import datetime
-from logging.handlers import SMTPHandler
+from logging.handlers import QueueHandler, QueueListener, SMTPHandler
+from time import monotonic
+from typing import Any, Callable, Optional
 
 from core.config import settings
 
+_listener: Optional[QueueListener] = None
+_worker_listener: Optional[QueueListener] = None
+_handlers: list[logging.Handler] = []
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Rate Limit Filter class.
+    Lets through at most a number of records per interval for each message
+     of a logger at or below a level, so per-row logs keep a sample instead
+     of one record per row.
+    """
+
+    def __init__(self, max_records: int = settings.LOG_RATE_LIMIT,
+                 interval: float = 1.0, level: int = logging.DEBUG) -> None:
+        super().__init__()
+        self.max_records: int = max_records
+        self.interval: float = interval
+        self.level: int = level
+        self.windows: dict[tuple[str, str], tuple[float, int]] = {}
+        self.suppressed: int = 0
+        self.pruned_at: float = monotonic()
+
+    def prune(self, now: float) -> None:
+        """
+        Remove the windows that expired, so messages logged once do not
+         keep their window forever
+        :param now: Current monotonic time
+        :type now: float
+        :return: None
+        :rtype: NoneType
+        """
+        self.pruned_at = now
+        # Snapshot of the items, as other threads may log meanwhile
+        for key, (window_start, _) in list(self.windows.items()):
+            if now - window_start >= self.interval:
+                self.windows.pop(key, None)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Let the record through unless its message is over the limit of
+         its window
+        :param record: Record to filter
+        :type record: logging.LogRecord
+        :return: True if the record is logged; otherwise false
+        :rtype: bool
+        """
+        if record.levelno > self.level:
+            return True
+        key: tuple[str, str] = (record.name, str(record.msg))
+        now: float = monotonic()
+        if now - self.pruned_at >= self.interval:
+            self.prune(now)
+        window_start, count = self.windows.get(key, (now, 0))
+        if now - window_start >= self.interval:
+            window_start, count = now, 0
+        self.windows[key] = (window_start, count + 1)
+        if count < self.max_records:
+            return True
+        self.suppressed += 1
+        return False
+
+
+def _stop_listener() -> None:
+    """
+    Stop the background writers after flushing the queued records
+    :return: None
+    :rtype: NoneType
+    """
+    global _listener, _worker_listener  # pylint: disable=global-statement
+    if _worker_listener:
+        _worker_listener.stop()
+        _worker_listener = None
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+def is_worker_process() -> bool:
+    """
+    Check if this is a child process. A spawned child imports the modules
+     of the pickled initializer and target while it is still inheriting
+     from its parent, before its parent process is set
+    :return: True if the process was started by another one; otherwise
+     false
+    :rtype: bool
+    """
+    return multiprocessing.parent_process() is not None or getattr(
+        multiprocessing.current_process(), '_inheriting', False)
+
 
 def setup_logging(log_level: int = logging.DEBUG) -> None:
     """
-    Setup logging
+    Setup logging once per process. The root logger only puts the records
+     into a queue, and a background thread formats and writes them to the
+     console, the log file and the mail handler. Later calls are no-ops,
+     and so are the calls in worker processes, which log through the
+     queue set up by worker_initializer
     :param log_level: Level of logging
     :type log_level: int
     :return: None
     :rtype: NoneType
     """
+    global _listener  # pylint: disable=global-statement
+    if _listener or is_worker_process():
+        return
     current_date: str = datetime.today().strftime('%d-%b-%Y-%H-%M-%S')
     current_file_directory: str = os.path.dirname(os.path.abspath(__file__))
-    project_root: str = current_file_directory
-    while os.path.basename(project_root) != "car-sales-etl":
-        project_root = os.path.dirname(project_root)
-    log_filename: str = f'log-{current_date}.log'
+    project_root: str = os.path.dirname(current_file_directory)
+    os.makedirs(f'{project_root}/logs', exist_ok=True)
+    log_filename: str = f'log-{current_date}-{os.getpid()}.log'
     filename_path: str = f'{project_root}/logs/{log_filename}'
 
-    logger: logging.Logger = logging.getLogger()
-    logger.setLevel(log_level)
-
     console_handler: logging.StreamHandler = logging.StreamHandler()
     console_handler.setLevel(log_level)
-    logger.addHandler(console_handler)
 
     formatter = logging.Formatter(
         '[%(name)s][%(asctime)s][%(levelname)s][%(module)s][%(funcName)s][%('
@@ -38,7 +138,7 @@ def setup_logging(log_level: int = logging.DEBUG) -> None:
     file_handler: logging.FileHandler = logging.FileHandler(filename_path)
     file_handler.setLevel(log_level)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    handlers: list[logging.Handler] = [console_handler, file_handler]
 
     if not settings.MAIL_SERVER:
         raise AttributeError("Mail server is not set.")
@@ -63,4 +163,73 @@ def setup_logging(log_level: int = logging.DEBUG) -> None:
             timeout=settings.MAIL_TIMEOUT
         )
         mail_handler.setLevel(log_level)
-        logger.addHandler(mail_handler)
+        handlers.append(mail_handler)
+
+    _handlers.extend(handlers)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _add_queue_handler(log_queue, log_level)
+    _listener = QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+
+
+def _add_queue_handler(log_queue: Any, log_level: int) -> None:
+    """
+    Send the records of the root logger into a queue through the rate
+     limit filter
+    :param log_queue: Queue the records are put into
+    :type log_queue: Any
+    :param log_level: Level of logging
+    :type log_level: int
+    :return: None
+    :rtype: NoneType
+    """
+    queue_handler: QueueHandler = QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    logger: logging.Logger = logging.getLogger()
+    logger.setLevel(log_level)
+    logger.addHandler(queue_handler)
+
+
+def worker_initializer(
+        log_queue: Any, log_level: int = logging.DEBUG,
+        initializer: Optional[Callable[[], None]] = None) -> None:
+    """
+    Initializer of the worker processes of a pool. Their records are sent
+     to the main process through the queue, then the initializer of the
+     pool runs
+    :param log_queue: Queue drained by the main process
+    :type log_queue: Any
+    :param log_level: Level of logging
+    :type log_level: int
+    :param initializer: Initializer of the pool. None if not needed
+    :type initializer: Callable[[], None]
+    :return: None
+    :rtype: NoneType
+    """
+    _add_queue_handler(log_queue, log_level)
+    if initializer:
+        initializer()
+
+
+def worker_pool_options(
+        initializer: Optional[Callable[[], None]] = None) -> dict[str, Any]:
+    """
+    Options of a process pool whose workers log through the main process.
+     The queue of the workers and its listener are created on first use
+    :param initializer: Initializer of the pool. None if not needed
+    :type initializer: Callable[[], None]
+    :return: Initializer and its arguments for ProcessPoolExecutor
+    :rtype: dict[str, Any]
+    """
+    global _worker_listener  # pylint: disable=global-statement
+    setup_logging()
+    if not _worker_listener:
+        _worker_listener = QueueListener(
+            multiprocessing.get_context('spawn').Queue(), *_handlers,
+            respect_handler_level=True)
+        _worker_listener.start()
+    return {'initializer': worker_initializer,
+            'initargs': (_worker_listener.queue,
+                         logging.getLogger().level, initializer)}
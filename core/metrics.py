@@ -0,0 +1,251 @@
+"""
+Metrics script for Core module.
+This script measures the stages of the pipeline and collects them into a
+ machine-readable run report. CPU time, resident memory and the traced
+ peak are process-wide, so they are only recorded for stages that did not
+ overlap another one, other than the stages they are nested in. Overlapping
+ stages, like the ones of concurrent tasks or threads, only record their
+ wall time and data sizes, and are flagged as overlapped. Stages measured
+ in worker processes are sent back with the results of their tasks and
+ merged into the run report of the main process.
+"""
+import json
+import logging
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter, process_time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import pandas as pd
+import psutil
+# pylint: disable=no-name-in-module
+from pydantic import BaseModel, Field
+
+from core import logging_config
+from core.persistence_manager import DataType
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class StageMetrics(BaseModel):
+    """
+    Stage Metrics class that inherited from Pydantic BaseModel
+    """
+    stage: str
+    started_at: datetime
+    pid: int = Field(default_factory=os.getpid)
+    wall_time: float = 0.0
+    cpu_time: Optional[float] = None
+    rss: int = 0
+    rss_delta: Optional[int] = None
+    overlapped: bool = False
+    traced_peak: Optional[int] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    bytes_in: Optional[int] = None
+    bytes_out: Optional[int] = None
+
+
+class RunReport:
+    """
+    Run Report class.
+    Collects the metrics of every stage executed during a run.
+    """
+
+    def __init__(self) -> None:
+        self.started_at: datetime = datetime.now()
+        self.stages: list[StageMetrics] = []
+
+    def record(self, metrics: StageMetrics) -> None:
+        """
+        Record the metrics of a finished stage
+        :param metrics: Metrics of the stage
+        :type metrics: StageMetrics
+        :return: None
+        :rtype: NoneType
+        """
+        self.stages.append(metrics)
+
+    def save(self, data_type: DataType = DataType.REPORTS) -> str:
+        """
+        Save the run report as JSON file
+        :param data_type: Path where the report will be saved
+        :type data_type: DataType
+        :return: Path of the report file
+        :rtype: str
+        """
+        os.makedirs(data_type.value, exist_ok=True)
+        filepath: str = f'{data_type.value}run-' \
+                        f'{self.started_at.strftime("%d-%b-%Y-%H-%M-%S")}.json'
+        with open(filepath, 'w', encoding='utf-8') as report_file:
+            json.dump({'started_at': self.started_at.isoformat(),
+                       'stages': [json.loads(stage.json())
+                                  for stage in self.stages]},
+                      report_file, indent=2)
+        logger.info("Run report saved to %s", filepath)
+        return filepath
+
+
+class OpenStage:
+    """
+    Open Stage class.
+    State of a stage being measured, shared with the stages nested in it.
+    """
+
+    def __init__(self) -> None:
+        self.peak: int = 0
+        self.overlapped: bool = False
+
+
+run_report: RunReport = RunReport()
+# Stages open in the current task or thread, outermost first
+_stage_stack: ContextVar[tuple[OpenStage, ...]] = ContextVar(
+    'stage_stack', default=())
+_open_stages: set[OpenStage] = set()
+_open_stages_lock: threading.Lock = threading.Lock()
+
+
+def call_with_stages(
+        function: Callable[..., Any], *args: Any, **kwargs: Any
+) -> tuple[Any, list[StageMetrics]]:
+    """
+    Call a function in a worker process and take the stages it measured
+     out of the run report of the worker, so they are returned with its
+     result. Workers run one task at a time
+    :param function: Function to call
+    :type function: Callable[..., Any]
+    :return: Result of the function and the metrics of its stages
+    :rtype: tuple[Any, list[StageMetrics]]
+    """
+    first_stage: int = len(run_report.stages)
+    result: Any = function(*args, **kwargs)
+    stages: list[StageMetrics] = run_report.stages[first_stage:]
+    del run_report.stages[first_stage:]
+    return result, stages
+
+
+def merge_stages(results: Iterable[tuple[Any, list[StageMetrics]]]
+                 ) -> list[Any]:
+    """
+    Record the stages of tasks run by call_with_stages in worker processes
+     into the run report
+    :param results: Results of the tasks with the metrics of their stages
+    :type results: Iterable[tuple[Any, list[StageMetrics]]]
+    :return: Results of the tasks
+    :rtype: list[Any]
+    """
+    values: list[Any] = []
+    for value, stages in results:
+        for metrics in stages:
+            run_report.record(metrics)
+        values.append(value)
+    return values
+
+
+def _open_stage(ancestors: tuple[OpenStage, ...]) -> OpenStage:
+    """
+    Register a new open stage, flagging it and the stages open in other
+     tasks or threads as overlapped
+    :param ancestors: Stages the new one is nested in
+    :type ancestors: tuple[OpenStage, ...]
+    :return: State of the new stage
+    :rtype: OpenStage
+    """
+    open_stage: OpenStage = OpenStage()
+    with _open_stages_lock:
+        for other in _open_stages.difference(ancestors):
+            other.overlapped = open_stage.overlapped = True
+        _open_stages.add(open_stage)
+    return open_stage
+
+
+def _size(data: Any) -> tuple[Optional[int], Optional[int]]:
+    """
+    Rows and shallow bytes of a dataframe or series
+    :param data: Object to measure
+    :type data: Any
+    :return: Number of rows and bytes, or None if it is not pandas data
+    :rtype: tuple[Optional[int], Optional[int]]
+    """
+    if isinstance(data, pd.DataFrame):
+        return len(data), int(data.memory_usage(index=True).sum())
+    if isinstance(data, pd.Series):
+        return len(data), int(data.memory_usage(index=True))
+    return None, None
+
+
+def find_data(*args: Any, **kwargs: Any) -> Any:
+    """
+    Find the first dataframe or series among the arguments of a call
+    :return: Dataframe or series found, otherwise None
+    :rtype: Any
+    """
+    for argument in [*args, *kwargs.values()]:
+        if isinstance(argument, (pd.DataFrame, pd.Series)):
+            return argument
+    return None
+
+
+@contextmanager
+def measure_stage(stage: str, data: Any = None) -> Iterator[dict]:
+    """
+    Measure wall time, CPU time, memory and data sizes of a stage and
+     record them into the run report. Set the 'output' key of the yielded
+     dictionary to account the rows and bytes produced. The process-wide
+     measures are skipped if the stage overlaps another one
+    :param stage: Name of the stage
+    :type stage: str
+    :param data: Input dataframe or series of the stage
+    :type data: Any
+    :return: Dictionary to store the output of the stage
+    :rtype: Iterator[dict]
+    """
+    process: psutil.Process = psutil.Process()
+    rss_before: int = process.memory_info().rss
+    rows_in, bytes_in = _size(data)
+    ancestors: tuple[OpenStage, ...] = _stage_stack.get()
+    open_stage: OpenStage = _open_stage(ancestors)
+    token = _stage_stack.set((*ancestors, open_stage))
+    tracing: bool = tracemalloc.is_tracing()
+    if tracing:
+        # Keep the peak of the enclosing stage before resetting it
+        if ancestors:
+            ancestors[-1].peak = max(
+                ancestors[-1].peak, tracemalloc.get_traced_memory()[1])
+        traced_before: int = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    metrics: StageMetrics = StageMetrics(stage=stage,
+                                         started_at=datetime.now())
+    result: dict = {}
+    start_time: float = perf_counter()
+    start_cpu: float = process_time()
+    try:
+        yield result
+    finally:
+        metrics.wall_time = perf_counter() - start_time
+        cpu_time: float = process_time() - start_cpu
+        metrics.rss = process.memory_info().rss
+        _stage_stack.reset(token)
+        with _open_stages_lock:
+            _open_stages.discard(open_stage)
+        peak: int = 0
+        if tracing:
+            peak = max(open_stage.peak, tracemalloc.get_traced_memory()[1])
+            if ancestors:
+                ancestors[-1].peak = max(ancestors[-1].peak, peak)
+        metrics.overlapped = open_stage.overlapped
+        if not open_stage.overlapped:
+            metrics.cpu_time = cpu_time
+            metrics.rss_delta = metrics.rss - rss_before
+            if tracing:
+                metrics.traced_peak = peak - traced_before
+        metrics.rows_in, metrics.bytes_in = rows_in, bytes_in
+        metrics.rows_out, metrics.bytes_out = _size(result.get('output'))
+        run_report.record(metrics)
+        logger.debug("Stage %s took %s seconds (%s CPU seconds)", stage,
+                     metrics.wall_time, metrics.cpu_time)
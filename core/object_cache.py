@@ -0,0 +1,274 @@
+"""
+Object Cache script for Core module.
+This script provides the in-memory and shared backends that cache
+ objects in front of the database.
+"""
+import json
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Optional
+
+# pylint: disable=no-name-in-module
+from pydantic import BaseModel
+
+from core.config import settings
+
+
+class CacheStats(BaseModel):
+    """
+    Cache Stats class that inherited from Pydantic BaseModel
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: Optional[int] = None
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        Ratio of the lookups found in the cache
+        :return: Hits over lookups, 0 without lookups
+        :rtype: float
+        """
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CacheBackend(ABC):
+    """
+    Cache Backend class.
+    Interface of the object caches, with counters to size them.
+    """
+
+    def __init__(self) -> None:
+        self.counters: CacheStats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value stored under a key
+        :param key: Key of the entry
+        :type key: str
+        :return: Cached value, None if the key is not cached
+        :rtype: Optional[Any]
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None:
+        """
+        Store a value under a key
+        :param key: Key of the entry
+        :type key: str
+        :param value: Value to store
+        :type value: Any
+        :return: None
+        :rtype: NoneType
+        """
+
+    @abstractmethod
+    async def delete_many(self, keys: list[str]) -> None:
+        """
+        Remove the entries of the keys
+        :param keys: Keys of the entries
+        :type keys: list[str]
+        :return: None
+        :rtype: NoneType
+        """
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Counters of the cache
+        :return: Hits, misses, evictions and expirations of the cache
+        :rtype: CacheStats
+        """
+        return self.counters.copy()
+
+
+class LRUCache(CacheBackend):
+    """
+    LRU Cache class.
+    In-process cache bounded by number of entries, which evicts the least
+     recently used entries and expires entries older than the TTL.
+    """
+
+    def __init__(self, max_entries: int = settings.CACHE_ENTRIES,
+                 ttl: float = settings.CACHE_TTL) -> None:
+        super().__init__()
+        self.max_entries: int = max_entries
+        self.ttl: float = ttl
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key and mark it as the most recently used.
+         Expired entries are removed and counted as misses
+        :param key: Key of the entry
+        :type key: str
+        :return: Cached value, None if the key is missing or expired
+        :rtype: Optional[Any]
+        """
+        entry: Optional[tuple[float, Any]] = self.entries.get(key)
+        if entry is None:
+            self.counters.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self.entries[key]
+            self.counters.expirations += 1
+            self.counters.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.counters.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        """
+        Store a value under a key until the TTL, evicting the least
+         recently used entries over the maximum number of entries
+        :param key: Key of the entry
+        :type key: str
+        :param value: Value to store
+        :type value: Any
+        :return: None
+        :rtype: NoneType
+        """
+        self.entries[key] = (monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters.evictions += 1
+
+    async def delete_many(self, keys: list[str]) -> None:
+        """
+        Remove the entries of the keys, ignoring the missing ones
+        :param keys: Keys of the entries
+        :type keys: list[str]
+        :return: None
+        :rtype: NoneType
+        """
+        for key in keys:
+            self.entries.pop(key, None)
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Counters of the cache with its number of entries
+        :return: Hits, misses, evictions, expirations and entries
+        :rtype: CacheStats
+        """
+        stats: CacheStats = self.counters.copy()
+        stats.entries = len(self.entries)
+        return stats
+
+
+class SharedCache(CacheBackend):
+    """
+    Shared Cache class.
+    Cache shared between processes through a client with the async
+     get/set/delete subset of the Redis client API. Values are stored as
+     JSON, so only plain data is cached and nothing from the server is
+     executed when read. The server evicts and expires the entries, so
+     those are not counted here.
+    """
+
+    def __init__(self, client: Any, ttl: float = settings.CACHE_TTL,
+                 prefix: str = 'car-sales-etl:') -> None:
+        super().__init__()
+        self.client: Any = client
+        self.ttl: float = ttl
+        self.prefix: str = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key from the server
+        :param key: Key of the entry, without the prefix
+        :type key: str
+        :return: Decoded value, None if the key is not cached
+        :rtype: Optional[Any]
+        """
+        value: Optional[bytes] = await self.client.get(f'{self.prefix}{key}')
+        if value is None:
+            self.counters.misses += 1
+            return None
+        self.counters.hits += 1
+        return json.loads(value)
+
+    async def set(self, key: str, value: Any) -> None:
+        """
+        Store the JSON of a value on the server until the TTL
+        :param key: Key of the entry, without the prefix
+        :type key: str
+        :param value: JSON serializable value to store
+        :type value: Any
+        :return: None
+        :rtype: NoneType
+        """
+        await self.client.set(f'{self.prefix}{key}',
+                              json.dumps(value).encode(),
+                              px=int(self.ttl * 1000))
+
+    async def delete_many(self, keys: list[str]) -> None:
+        """
+        Remove the entries of the keys from the server in one call
+        :param keys: Keys of the entries, without the prefix
+        :type keys: list[str]
+        :return: None
+        :rtype: NoneType
+        """
+        if keys:
+            await self.client.delete(*(f'{self.prefix}{key}' for key in keys))
+
+
+class LocalClient:
+    """
+    Local Client class.
+    In-process stand-in for the server of a shared cache, with the subset
+     of the async Redis client API used by the shared cache.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[str, tuple[Optional[float], bytes]] = {}
+
+    async def get(self, name: str) -> Optional[bytes]:
+        """
+        Get the value of a key
+        :param name: Name of the key
+        :type name: str
+        :return: Value of the key, None if missing or expired
+        :rtype: Optional[bytes]
+        """
+        expires_at, value = self.values.get(name, (None, None))
+        if expires_at is not None and expires_at <= monotonic():
+            del self.values[name]
+            return None
+        return value
+
+    async def set(self, name: str, value: bytes,
+                  px: Optional[int] = None) -> bool:
+        """
+        Set the value of a key
+        :param name: Name of the key
+        :type name: str
+        :param value: Value of the key
+        :type value: bytes
+        :param px: Milliseconds until the key expires. Never if None
+        :type px: int
+        :return: True when the key is set
+        :rtype: bool
+        """
+        self.values[name] = (
+            None if px is None else monotonic() + px / 1000, value)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        """
+        Delete keys
+        :param names: Names of the keys
+        :type names: str
+        :return: Number of keys deleted
+        :rtype: int
+        """
+        return sum(self.values.pop(name, None) is not None for name in names)
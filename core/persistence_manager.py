@@ -1,14 +1,27 @@
 """
 Persistence script for Core module.
 This script provides methods to save and load dataframes to and from
- CSV and pickle files, respectively.
+ CSV, pickle, Parquet and Feather files, and memory-mapped snapshots.
 """
+import codecs
+import glob
+import hashlib
+import json
 import logging
+import os
+from datetime import datetime
 from enum import Enum
+from typing import Iterator
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from numpy import float16, float32
 from pandas import NaT
 from pandas.io.parsers import TextFileReader
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import csv as pa_csv, feather
 
 from core import logging_config
 from core.config import settings
@@ -24,6 +37,28 @@ class DataType(str, Enum):
     RAW: str = 'data/raw/'
     PROCESSED: str = 'data/processed/'
     FIGURES: str = 'reports/figures/'
+    REPORTS: str = 'reports/runs/'
+    CACHE: str = 'data/cache/'
+    MODELS: str = 'data/models/'
+
+
+class CsvEngine(str, Enum):
+    """
+    CSV Engine class based on Enum
+    """
+    PYARROW: str = 'pyarrow'
+    C: str = 'c'
+    PYTHON: str = 'python'
+
+
+NA_VALUES: list = [NaT, 'nan', '', ' ']
+ARROW_TYPES: dict = {
+    'category': pa.string(), str: pa.string(), 'boolean': pa.bool_(),
+    bool: pa.bool_(), 'UInt8': pa.uint8(), int: pa.int64(),
+    float16: pa.float32(), float32: pa.float32(), float: pa.float64()}
+PANDAS_TYPES: dict = {
+    pa.bool_(): pd.BooleanDtype(), pa.uint8(): pd.UInt8Dtype(),
+    pa.int64(): pd.Int64Dtype()}
 
 
 class PersistenceManager:
@@ -61,7 +96,8 @@ class PersistenceManager:
             filename: str = 'raw_data.csv',
             data_type: DataType = DataType.RAW,
             chunk_size: int = settings.CHUNK_SIZE, dtypes: dict = None,
-            parse_dates: list[str] = None, converters: dict = None
+            parse_dates: list[str] = None, converters: dict = None,
+            engine: CsvEngine = CsvEngine(settings.CSV_ENGINE)
     ) -> pd.DataFrame:
         """
         Load dataframe from CSV using chunk scheme
@@ -71,19 +107,254 @@ class PersistenceManager:
         :type data_type: DataType
         :param chunk_size: Number of chunks to split dataset
         :type chunk_size: int
+        :param dtypes: Declared data types of the columns
+        :type dtypes: dict
+        :param parse_dates: List of date columns to parse
+        :type parse_dates: list[str]
+        :param converters: Functions to convert values of the columns.
+         Only supported by the Python engine
+        :type converters: dict
+        :param engine: Parser engine to read the CSV with
+        :type engine: CsvEngine
         :return: Dataframe retrieved from CSV after optimization with chunks
         :rtype: pd.DataFrame
         """
         filepath: str = f'{data_type.value}{filename}'
         if not settings.ENCODING:
             raise AttributeError("Encoding is not set.")
-        text_file_reader: TextFileReader = pd.read_csv(
-            filepath, sep=', ', header=0, chunksize=chunk_size,
-            encoding=settings.ENCODING, parse_dates=parse_dates,
-            converters=converters, na_values=[NaT, 'nan', '', ' '])
-        dataframe: pd.DataFrame = pd.concat(text_file_reader,
-                                            ignore_index=True)
-        for key, value in dtypes.items():
+        encoding: str = PersistenceManager.file_encoding(filepath)
+        dataframe: pd.DataFrame
+        if engine == CsvEngine.PYARROW:
+            dataframe = PersistenceManager._arrow_to_pandas(
+                pa_csv.read_csv(
+                    filepath, **PersistenceManager._arrow_csv_options(
+                        filepath, dtypes, parse_dates)), dtypes, parse_dates)
+        elif engine == CsvEngine.C:
+            dataframe = PersistenceManager._downcast(pd.read_csv(
+                filepath, sep=',', skipinitialspace=True, header=0,
+                encoding=encoding,
+                dtype=PersistenceManager._reader_dtypes(dtypes),
+                parse_dates=parse_dates, converters=converters,
+                na_values=NA_VALUES), dtypes)
+        else:
+            text_file_reader: TextFileReader = pd.read_csv(
+                filepath, sep=',', skipinitialspace=True, header=0,
+                chunksize=chunk_size, encoding=encoding,
+                parse_dates=parse_dates,
+                converters=converters, na_values=NA_VALUES, engine='python')
+            dataframe = pd.concat(text_file_reader, ignore_index=True)
+            dataframe = PersistenceManager.cast_dtypes(dataframe, dtypes)
+        logger.info("Dataframe loaded from csv")
+        return dataframe
+
+    @staticmethod
+    def iter_csv_chunks(
+            filename: str = 'raw_data.csv',
+            data_type: DataType = DataType.RAW,
+            chunk_size: int = settings.CHUNK_SIZE, dtypes: dict = None,
+            parse_dates: list[str] = None, converters: dict = None,
+            engine: CsvEngine = CsvEngine(settings.CSV_ENGINE)
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lazily load dataframe chunks from CSV without concatenating them
+        :param filename: name of the file including extension
+        :type filename: str
+        :param data_type: Path where data will be saved
+        :type data_type: DataType
+        :param chunk_size: Number of rows per chunk
+        :type chunk_size: int
+        :param dtypes: Declared data types of the columns
+        :type dtypes: dict
+        :param parse_dates: List of date columns to parse
+        :type parse_dates: list[str]
+        :param converters: Functions to convert values of the columns.
+         Only supported by the Python engine
+        :type converters: dict
+        :param engine: Parser engine to read the CSV with
+        :type engine: CsvEngine
+        :return: Iterator of dataframe chunks with the declared types
+        :rtype: Iterator[pd.DataFrame]
+        """
+        filepath: str = f'{data_type.value}{filename}'
+        if not settings.ENCODING:
+            raise AttributeError("Encoding is not set.")
+        encoding: str = PersistenceManager.file_encoding(filepath)
+        if engine == CsvEngine.PYARROW:
+            options: dict = PersistenceManager._arrow_csv_options(
+                filepath, dtypes, parse_dates, chunk_size)
+            for batch in pa_csv.open_csv(filepath, **options):
+                yield PersistenceManager._arrow_to_pandas(
+                    pa.Table.from_batches([batch]), dtypes, parse_dates)
+            logger.info("Dataframe chunks loaded from csv")
+            return
+        if engine == CsvEngine.C:
+            text_file_reader: TextFileReader = pd.read_csv(
+                filepath, sep=',', skipinitialspace=True, header=0,
+                chunksize=chunk_size, encoding=encoding,
+                dtype=PersistenceManager._reader_dtypes(dtypes),
+                parse_dates=parse_dates, converters=converters,
+                na_values=NA_VALUES)
+        else:
+            text_file_reader = pd.read_csv(
+                filepath, sep=',', skipinitialspace=True, header=0,
+                chunksize=chunk_size, encoding=encoding,
+                parse_dates=parse_dates,
+                converters=converters, na_values=NA_VALUES, engine='python')
+        with text_file_reader:
+            for chunk in text_file_reader:
+                if engine == CsvEngine.C:
+                    yield PersistenceManager._downcast(chunk, dtypes)
+                else:
+                    yield PersistenceManager.cast_dtypes(chunk, dtypes)
+        logger.info("Dataframe chunks loaded from csv")
+
+    @staticmethod
+    def file_encoding(filepath: str) -> str:
+        """
+        Encoding to read a file with, which skips the byte order mark of
+         UTF-8 files that start with one
+        :param filepath: Path of the file
+        :type filepath: str
+        :return: Encoding of the file
+        :rtype: str
+        """
+        with open(filepath, 'rb') as binary_file:
+            has_bom: bool = binary_file.read(3) == codecs.BOM_UTF8
+        if has_bom and settings.ENCODING.replace('-', '').lower() == 'utf8':
+            return 'utf-8-sig'
+        return settings.ENCODING
+
+    @staticmethod
+    def list_files(
+            pattern: str = '*.csv', data_type: DataType = DataType.RAW
+    ) -> list[str]:
+        """
+        List the files of a data type matching a glob pattern
+        :param pattern: Glob pattern of the filenames
+        :type pattern: str
+        :param data_type: Path where the files are saved
+        :type data_type: DataType
+        :return: Sorted filenames relative to the data type path
+        :rtype: list[str]
+        """
+        return sorted(
+            os.path.relpath(filepath, data_type.value) for filepath in
+            glob.glob(f'{data_type.value}{pattern}') if os.path.isfile(
+                filepath))
+
+    @staticmethod
+    def _reader_dtypes(dtypes: dict) -> dict:
+        """
+        Translate the declared data types into types the parsers can
+         produce directly. Half precision floats are parsed as float32
+        :param dtypes: Declared data types of the columns
+        :type dtypes: dict
+        :return: Data types supported by the parsers
+        :rtype: dict
+        """
+        return {key: float32 if value == float16 else value
+                for key, value in (dtypes or {}).items()}
+
+    @staticmethod
+    def _downcast(dataframe: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+        """
+        Downcast the columns parsed with a wider data type than declared
+        :param dataframe: Dataframe to downcast
+        :type dataframe: pd.DataFrame
+        :param dtypes: Declared data types of the columns
+        :type dtypes: dict
+        :return: Dataframe with the declared data types
+        :rtype: pd.DataFrame
+        """
+        for key, value in (dtypes or {}).items():
+            if value == float16:
+                dataframe[key] = dataframe[key].astype(float16)
+        return dataframe
+
+    @staticmethod
+    def _arrow_csv_options(
+            filepath: str, dtypes: dict, parse_dates: list[str] = None,
+            chunk_size: int = None) -> dict:
+        """
+        Build the multithreaded Arrow CSV reader options with the declared
+         schema pushed down into the column types
+        :param filepath: Path of the CSV file
+        :type filepath: str
+        :param dtypes: Declared data types of the columns
+        :type dtypes: dict
+        :param parse_dates: List of date columns to parse
+        :type parse_dates: list[str]
+        :param chunk_size: Approximate number of rows per record batch
+        :type chunk_size: int
+        :return: Keyword arguments for the Arrow CSV readers
+        :rtype: dict
+        """
+        with open(filepath, encoding=PersistenceManager.file_encoding(
+                filepath)) as csv_file:
+            header: str = csv_file.readline()
+            sample: list[str] = csv_file.readlines(1 << 16)
+        column_names: list[str] = [
+            name.strip() for name in header.split(',')]
+        read_options: dict = {'column_names': column_names, 'skip_rows': 1,
+                              'use_threads': True}
+        if chunk_size and sample:
+            row_bytes: int = len(''.join(sample).encode()) // len(sample)
+            read_options['block_size'] = max(chunk_size * row_bytes, 1 << 16)
+        column_types: dict = {
+            key: ARROW_TYPES.get(value, pa.string())
+            for key, value in (dtypes or {}).items()}
+        column_types.update({key: pa.string() for key in parse_dates or []})
+        return {
+            'read_options': pa_csv.ReadOptions(**read_options),
+            'parse_options': pa_csv.ParseOptions(delimiter=','),
+            'convert_options': pa_csv.ConvertOptions(
+                column_types=column_types, strings_can_be_null=True,
+                null_values=['', ' ', 'nan', ' nan'],
+                true_values=['TRUE', ' TRUE', 'True', ' True'],
+                false_values=['FALSE', ' FALSE', 'False', ' False'])}
+
+    @staticmethod
+    def _arrow_to_pandas(
+            table: pa.Table, dtypes: dict, parse_dates: list[str] = None
+    ) -> pd.DataFrame:
+        """
+        Convert an Arrow table read from CSV into a dataframe with the
+         declared data types. Strings are trimmed and dictionary encoded in
+         Arrow so they arrive as categories
+        :param table: Arrow table read from CSV
+        :type table: pa.Table
+        :param dtypes: Declared data types of the columns
+        :type dtypes: dict
+        :param parse_dates: List of date columns to parse
+        :type parse_dates: list[str]
+        :return: Dataframe with the declared data types
+        :rtype: pd.DataFrame
+        """
+        for index, field in enumerate(table.schema):
+            if field.type == pa.string():
+                column: pa.ChunkedArray = pc.utf8_trim_whitespace(
+                    table.column(index))
+                if (dtypes or {}).get(field.name) == 'category':
+                    column = column.dictionary_encode()
+                table = table.set_column(index, field.name, column)
+        dataframe: pd.DataFrame = table.to_pandas(
+            types_mapper=PANDAS_TYPES.get, split_blocks=True)
+        for date_column in parse_dates or []:
+            dataframe[date_column] = pd.to_datetime(dataframe[date_column])
+        return PersistenceManager._downcast(dataframe, dtypes)
+
+    @staticmethod
+    def cast_dtypes(dataframe: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+        """
+        Cast the dataframe columns to the declared data types
+        :param dataframe: Dataframe to cast
+        :type dataframe: pd.DataFrame
+        :param dtypes: Mapping of column names to data types
+        :type dtypes: dict
+        :return: Dataframe with the declared data types
+        :rtype: pd.DataFrame
+        """
+        for key, value in (dtypes or {}).items():
             if value in [float, int]:
                 try:
                     dataframe[key] = pd.to_numeric(dataframe[key],
@@ -96,9 +367,30 @@ class PersistenceManager:
                     dataframe[key] = dataframe[key].astype(value)
                 except Exception as exc:
                     logger.error(exc)
-        logger.info("Dataframe loaded from csv")
         return dataframe
 
+    @staticmethod
+    def hash_file(
+            filename: str = 'raw_data.csv',
+            data_type: DataType = DataType.RAW,
+            block_size: int = 1 << 20) -> str:
+        """
+        Compute the content hash of a file reading it by blocks
+        :param filename: name of the file including extension
+        :type filename: str
+        :param data_type: Path where data is saved
+        :type data_type: DataType
+        :param block_size: Number of bytes read per block
+        :type block_size: int
+        :return: SHA-256 hexadecimal digest of the file content
+        :rtype: str
+        """
+        file_hash = hashlib.sha256()
+        with open(f'{data_type.value}{filename}', 'rb') as file:
+            while block := file.read(block_size):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
     @staticmethod
     def save_to_pickle(
             dataframe: pd.DataFrame, data_type: DataType = DataType.PROCESSED,
@@ -131,6 +423,211 @@ class PersistenceManager:
         :rtype: pd.DataFrame
         """
         dataframe: pd.DataFrame = pd.read_pickle(
-            f'data/{data_type.value}/{filename}')
+            f'{data_type.value}{filename}')
         logger.info("Dataframe loaded from pickle")
         return dataframe
+
+    @staticmethod
+    def save_to_parquet(
+            dataframe: pd.DataFrame, data_type: DataType = DataType.PROCESSED,
+            filename: str = 'optimized_df.parquet',
+            compression: str = 'snappy',
+            partition_cols: list[str] | None = None) -> None:
+        """
+        Save dataframe to Parquet file or to a directory of Parquet files
+         partitioned by the given columns
+        :param dataframe: Dataframe to save
+        :type dataframe: pd.DataFrame
+        :param data_type: Path where data will be saved
+        :type data_type: DataType
+        :param filename: Name of the file or directory
+        :type filename: str
+        :param compression: Compression codec (snappy, zstd, gzip, none)
+        :type compression: str
+        :param partition_cols: Columns to partition by, e.g. purchase_year
+        :type partition_cols: list[str]
+        :return: None
+        :rtype: NoneType
+        """
+        table: pa.Table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        # Parquet has no half precision floats, so they are stored as float32
+        for index, field in enumerate(table.schema):
+            if field.type == pa.float16():
+                table = table.set_column(index, field.name, pa.array(
+                    dataframe[field.name].to_numpy(dtype=float32)))
+        if partition_cols:
+            pq.write_to_dataset(
+                table, f'{data_type.value}{filename}',
+                partition_cols=partition_cols, compression=compression,
+                existing_data_behavior='delete_matching')
+        else:
+            pq.write_table(table, f'{data_type.value}{filename}',
+                           compression=compression)
+        logger.info("Dataframe saved to parquet")
+
+    @staticmethod
+    def load_from_parquet(
+            data_type: DataType = DataType.PROCESSED,
+            filename: str = 'optimized_df.parquet',
+            columns: list[str] | None = None,
+            filters: list[tuple] | None = None) -> pd.DataFrame:
+        """
+        Load dataframe from Parquet file or partitioned directory reading
+         only the selected columns and the row groups and partitions that
+         can match the filters
+        :param data_type: Path where data is saved
+        :type data_type: DataType
+        :param filename: Name of the file or directory
+        :type filename: str
+        :param columns: Columns to read. All columns by default
+        :type columns: list[str]
+        :param filters: Row filters as (column, operator, value) tuples,
+         e.g. [('purchase_year', '=', 2021), ('new_car', '=', True)]
+        :type filters: list[tuple]
+        :return: Dataframe read from parquet
+        :rtype: pd.DataFrame
+        """
+        dataframe: pd.DataFrame = PersistenceManager._restore_dtypes(
+            pq.read_table(f'{data_type.value}{filename}', columns=columns,
+                          filters=filters))
+        logger.info("Dataframe loaded from parquet")
+        return dataframe
+
+    @staticmethod
+    def save_to_feather(
+            dataframe: pd.DataFrame, data_type: DataType = DataType.PROCESSED,
+            filename: str = 'optimized_df.feather',
+            compression: str = 'zstd') -> None:
+        """
+        Save dataframe to Feather (Arrow IPC) file
+        :param dataframe: Dataframe to save
+        :type dataframe: pd.DataFrame
+        :param data_type: Path where data will be saved
+        :type data_type: DataType
+        :param filename: Name of the file
+        :type filename: str
+        :param compression: Compression codec (zstd, lz4, uncompressed)
+        :type compression: str
+        :return: None
+        :rtype: NoneType
+        """
+        feather.write_feather(
+            dataframe.reset_index(drop=True), f'{data_type.value}{filename}',
+            compression=compression)
+        logger.info("Dataframe saved to feather")
+
+    @staticmethod
+    def load_from_feather(
+            data_type: DataType = DataType.PROCESSED,
+            filename: str = 'optimized_df.feather',
+            columns: list[str] | None = None,
+            filters: list[tuple] | None = None) -> pd.DataFrame:
+        """
+        Load dataframe from Feather (Arrow IPC) file reading only the
+         selected columns and the rows that match the filters
+        :param data_type: Path where data is saved
+        :type data_type: DataType
+        :param filename: Name of the file
+        :type filename: str
+        :param columns: Columns to read. All columns by default
+        :type columns: list[str]
+        :param filters: Row filters as (column, operator, value) tuples,
+         e.g. [('purchase_year', '=', 2021), ('new_car', '=', True)]
+        :type filters: list[tuple]
+        :return: Dataframe read from feather
+        :rtype: pd.DataFrame
+        """
+        dataset: ds.Dataset = ds.dataset(
+            f'{data_type.value}{filename}', format='ipc')
+        dataframe: pd.DataFrame = PersistenceManager._restore_dtypes(
+            dataset.to_table(
+                columns=columns,
+                filter=pq.filters_to_expression(filters) if filters else None))
+        logger.info("Dataframe loaded from feather")
+        return dataframe
+
+    @staticmethod
+    def save_snapshot(
+            dataframe: pd.DataFrame, data_type: DataType = DataType.PROCESSED,
+            name: str = 'optimized_df') -> dict:
+        """
+        Save dataframe as an uncompressed Arrow IPC file plus a JSON
+         manifest, so it can be memory-mapped without deserializing it
+        :param dataframe: Dataframe to save
+        :type dataframe: pd.DataFrame
+        :param data_type: Path where data will be saved
+        :type data_type: DataType
+        :param name: Name of the snapshot without extension
+        :type name: str
+        :return: Manifest of the snapshot
+        :rtype: dict
+        """
+        table: pa.Table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        with pa.OSFile(f'{data_type.value}{name}.arrow', 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        manifest: dict = {
+            'file': f'{name}.arrow', 'rows': table.num_rows,
+            'bytes': table.nbytes, 'created_at': datetime.now().isoformat(),
+            'columns': {field.name: str(dtype) for field, dtype in zip(
+                table.schema, dataframe.dtypes)}}
+        with open(f'{data_type.value}{name}.json', 'w',
+                  encoding=settings.ENCODING) as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        logger.info("Dataframe saved to snapshot")
+        return manifest
+
+    @staticmethod
+    def load_snapshot(
+            data_type: DataType = DataType.PROCESSED,
+            name: str = 'optimized_df', columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Load dataframe from a memory-mapped snapshot. Column buffers point
+         to the mapped file, so processes opening the same snapshot share
+         the OS page cache instead of holding private copies
+        :param data_type: Path where data is saved
+        :type data_type: DataType
+        :param name: Name of the snapshot without extension
+        :type name: str
+        :param columns: Columns to read. All columns by default
+        :type columns: list[str]
+        :return: Dataframe backed by the snapshot
+        :rtype: pd.DataFrame
+        """
+        with open(f'{data_type.value}{name}.json',
+                  encoding=settings.ENCODING) as manifest_file:
+            manifest: dict = json.load(manifest_file)
+        source: pa.MemoryMappedFile = pa.memory_map(
+            f'{data_type.value}{manifest["file"]}', 'r')
+        table: pa.Table = pa.ipc.open_file(source).read_all()
+        if table.num_rows != manifest['rows']:
+            raise ValueError(f"Snapshot {name} does not match its manifest")
+        if columns:
+            table = table.select(columns)
+        dataframe: pd.DataFrame = table.to_pandas(split_blocks=True)
+        logger.info("Dataframe loaded from snapshot")
+        return dataframe
+
+    @staticmethod
+    def _restore_dtypes(table: pa.Table) -> pd.DataFrame:
+        """
+        Convert an Arrow table into a dataframe restoring the data types
+         recorded in its pandas metadata that Arrow files cannot keep, such
+         as half precision floats and partition columns
+        :param table: Arrow table read from file
+        :type table: pa.Table
+        :return: Dataframe with the original data types
+        :rtype: pd.DataFrame
+        """
+        dataframe: pd.DataFrame = table.to_pandas()
+        pandas_metadata: dict = table.schema.pandas_metadata or {}
+        for column in pandas_metadata.get('columns', []):
+            name: str = column['name']
+            if name not in dataframe.columns:
+                continue
+            if column['numpy_type'] == 'float16' or (
+                    isinstance(dataframe[name].dtype, pd.CategoricalDtype)
+                    and column['pandas_type'] != 'categorical'):
+                dataframe[name] = dataframe[name].astype(column['numpy_type'])
+        return dataframe
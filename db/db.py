@@ -6,16 +6,76 @@ import logging
 from sqlalchemy.exc import CompileError, DataError, DatabaseError, \
     DisconnectionError, IntegrityError, InternalError, InvalidatePoolError, \
     PendingRollbackError, TimeoutError as SATimeoutError
-from sqlalchemy.ext.asyncio import AsyncTransaction
+from sqlalchemy import UniqueConstraint, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncTransaction
 
 from core import logging_config
+from core.config import settings
 from db.base import Base
 from db.session import async_engine
+from models.car import Car, NATURAL_KEY, PARTITIONED
 
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+async def create_partitions(
+        async_connection: AsyncConnection,
+        first_year: int = settings.PARTITION_FIRST_YEAR,
+        last_year: int = settings.CURRENT_YEAR) -> None:
+    """
+    Create the yearly partitions of the Car table that do not exist yet,
+     and a default partition for the years out of the range
+    :param async_connection: Connection to the database
+    :type async_connection: AsyncConnection
+    :param first_year: First year with its own partition
+    :type first_year: int
+    :param last_year: Last year with its own partition
+    :type last_year: int
+    :return: None
+    :rtype: NoneType
+    """
+    table: str = Car.__tablename__
+    for year in range(first_year, last_year + 1):
+        await async_connection.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {table}_{year} PARTITION OF {table} '
+            f'FOR VALUES FROM ({year}) TO ({year + 1})'))
+    await async_connection.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} '
+        f'DEFAULT'))
+
+
+async def migrate_car_table(async_connection: AsyncConnection) -> None:
+    """
+    Bring a Car table created by an earlier version up to the model, as
+     create_all does not alter existing tables. The make column is added
+     empty for the stored sales, and the natural key is rebuilt only when
+     its columns differ from the model
+    :param async_connection: Connection to the database
+    :type async_connection: AsyncConnection
+    :return: None
+    :rtype: NoneType
+    """
+    table: str = Car.__tablename__
+    await async_connection.execute(text(
+        f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS make VARCHAR(50)'))
+    natural_key: UniqueConstraint = next(
+        constraint for constraint in Car.__table__.constraints
+        if constraint.name == NATURAL_KEY)
+    definition: str = \
+        f'UNIQUE ({", ".join(column.name for column in natural_key.columns)})'
+    current_definition: str | None = (await async_connection.execute(text(
+        'SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conname '
+        '= :name AND conrelid = CAST(:table AS regclass)'),
+        {'name': NATURAL_KEY, 'table': table})).scalar()
+    if current_definition == definition:
+        return
+    logger.warning("Rebuilding the natural key %s of %s", NATURAL_KEY, table)
+    await async_connection.execute(text(
+        f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {NATURAL_KEY}, '
+        f'ADD CONSTRAINT {NATURAL_KEY} {definition}'))
+
+
 async def create_db_and_tables() -> None:
     """
     Create database and tables without duplicating them.
@@ -36,6 +96,9 @@ async def create_db_and_tables() -> None:
                 Base.metadata.create_all,
                 checkfirst=True
             )
+            await migrate_car_table(async_connection)
+            if PARTITIONED:
+                await create_partitions(async_connection)
             await transaction.commit()
             logger.warning("Database tables created successfully")
         except PendingRollbackError as pr_exc:
@@ -7,7 +7,8 @@ from core.config import settings
 
 async_engine: AsyncEngine = create_async_engine(
     settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, future=True,
-    echo=True)
+    echo=settings.DB_ECHO, pool_size=settings.POOL_SIZE,
+    max_overflow=settings.MAX_OVERFLOW)
 
 
 async def get_session(engine: AsyncEngine = async_engine):
@@ -1,97 +1,189 @@
 """
-Engineering package initialization
+Engineering package initialization.
+The database functions are imported on first access, so extracting and
+ transforming does not load SQLAlchemy and asyncpg.
 """
+import importlib
 import logging
+from datetime import datetime
+from typing import Any, Iterator
 
+import numpy as np
 import pandas as pd
-from numpy import uint16, uint8, float16
-from sqlalchemy import create_engine, Engine
-from sqlalchemy.ext.asyncio import AsyncSession
+from numpy import uint32
 
 from core import logging_config
 from core.config import settings
-from db.session import get_session
-from engineering.extraction import extract_raw_data
-from engineering.loading import loading
-from engineering.transformation import cast_column, remove_missing_values, \
-    convert_date_column, create_sale_year, create_categorical_model, \
-    convert_column_names, strip_columns
+from core.decorators import profile_stage
+from core.persistence_manager import PersistenceManager
+from engineering.extraction import concat_frames, extract_raw_data, \
+    extract_raw_data_chunks, extract_raw_files, extract_raw_files_chunks, \
+    is_file_pattern
+from engineering.frequency import MakeFrequencies, MakeFrequencySketch
+from engineering.transformation import remove_missing_values, \
+    strip_columns, transform_steps, apply_steps
 
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
+LAZY_ATTRIBUTES: dict[str, str] = {
+    'load_to_db': 'engineering.database',
+    'stream_to_db': 'engineering.database',
+    'incremental_load': 'engineering.database',
+    'load_with_pandas': 'engineering.database'}
 
 
+def __getattr__(name: str) -> Any:
+    """
+    Import the lazy attributes of the package on first access
+    :param name: Name of the attribute
+    :type name: str
+    :return: Attribute from its module
+    :rtype: Any
+    """
+    if name in LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@profile_stage('extract')
 def extract_data(
-        filename: str = 'raw_data.csv') -> pd.DataFrame:
+        filename: str = settings.RAW_FILES,
+        workers: int = settings.EXTRACT_WORKERS) -> pd.DataFrame:
     """
     Abstract extract data function
-    :param filename: Filename to extract data from
+    :param filename: Filename to extract data from, or glob pattern of
+     several raw files to extract concurrently
     :type filename: str
+    :param workers: Number of threads reading the raw files of a pattern
+    :type workers: int
     :return: Dataframe with raw data
     :rtype: pd.DataFrame
     """
     gender_column: str = "Buyer Gender"
     logger.info("Running extract_data()")
+    if is_file_pattern(filename):
+        filenames: list[str] = PersistenceManager.list_files(filename)
+        logger.info("Extracting %s raw files with %s workers",
+                    len(filenames), workers)
+        return extract_raw_files(
+            filenames, gender_column, "Purchase Date", workers)
     dataframe: pd.DataFrame = extract_raw_data(filename, gender_column)
     return dataframe
 
 
-def transform_data(dataframe: pd.DataFrame) -> pd.DataFrame:
+def extract_data_chunks(
+        filename: str = settings.RAW_FILES) -> Iterator[pd.DataFrame]:
     """
-    Transform dataframe based on the requirements
-    :param dataframe: Raw dataframe
-    :type dataframe: pd.DataFrame
-    :return: Transformed dataframe
+    Abstract extract data function yielding chunks of the raw file
+    :param filename: Filename to extract data from, or glob pattern of
+     several raw files to extract one after the other
+    :type filename: str
+    :return: Iterator of dataframes with raw data
+    :rtype: Iterator[pd.DataFrame]
+    """
+    gender_column: str = "Buyer Gender"
+    logger.info("Running extract_data_chunks()")
+    if is_file_pattern(filename):
+        return extract_raw_files_chunks(
+            PersistenceManager.list_files(filename), gender_column,
+            "Purchase Date")
+    return extract_raw_data_chunks(filename, gender_column)
+
+
+@profile_stage('extract')
+def extract_data_since(
+        filename: str, since: datetime | None = None) -> pd.DataFrame:
+    """
+    Extract the rows of a raw file purchased on or after a date. The file
+     is read chunk by chunk and the older rows are dropped as soon as
+     their dates are parsed, so only the new rows are kept and transformed
+    :param filename: Filename to extract data from
+    :type filename: str
+    :param since: First purchase date to keep. Every row if None
+    :type since: datetime
+    :return: Dataframe with the raw data of the new rows
     :rtype: pd.DataFrame
     """
-    logger.info("Running transform_data()")
-    dataframe = strip_columns(dataframe)
-    dataframe = cast_column(dataframe)
-    dataframe = remove_missing_values(dataframe)
-    dataframe = convert_date_column(dataframe)
-    dataframe = create_sale_year(dataframe)
-    dataframe = create_categorical_model(dataframe)
-    dataframe = convert_column_names(dataframe)
-    dataframe = cast_column(dataframe, 'discount', float16)
-    dataframe = cast_column(dataframe, 'purchase_year', uint16)
-    dataframe = cast_column(dataframe, 'buyer_age', uint8)
-    return dataframe
+    date_column: str = "Purchase Date"
+    logger.info("Running extract_data_since()")
+    chunks: list[pd.DataFrame] = []
+    for chunk in extract_raw_files_chunks(
+            [filename], "Buyer Gender", date_column):
+        if since is not None:
+            # Missing dates compare as false, as they are dropped later
+            chunk = chunk.take(np.flatnonzero(
+                (chunk[date_column] >= since).to_numpy()))
+        chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame()
+    return concat_frames(chunks)
 
 
-async def load_to_db(dataframe: pd.DataFrame) -> bool:
+def count_make_frequencies(
+        filename: str = settings.RAW_FILES, model_column: str = 'Make'
+) -> pd.Series:
     """
-    Loading data from dataframe into Car table
-    :param dataframe: Dataframe with cars sales information
-    :type dataframe: pd.DataFrame
-    :return: True if the rows were inserted; otherwise false
-    :rtype: bool
+    First pass over the raw file to count the makes of the rows that
+     survive the cleaning, without keeping the file in memory
+    :param filename: Filename to extract data from
+    :type filename: str
+    :param model_column: Name of the make column
+    :type model_column: str
+    :return: Number of rows for each make
+    :rtype: pd.Series
+    """
+    logger.info("Running count_make_frequencies()")
+    make_counts: pd.Series = pd.Series(dtype=uint32)
+    for chunk in extract_data_chunks(filename):
+        chunk = remove_missing_values(strip_columns(chunk))
+        make_counts = make_counts.add(
+            chunk[model_column].value_counts(), fill_value=0)
+    return make_counts.astype(uint32)
+
+
+def sketch_make_frequencies(
+        filename: str = settings.RAW_FILES, model_column: str = 'Make'
+) -> MakeFrequencySketch:
     """
-    logger.info("Running load_to_db()")
-    session: AsyncSession = await get_session()
-    cars_inserted: bool = await loading(dataframe, session)
-    return cars_inserted
+    First pass over the raw file to sketch the makes of the rows that
+     survive the cleaning with bounded memory
+    :param filename: Filename to extract data from
+    :type filename: str
+    :param model_column: Name of the make column
+    :type model_column: str
+    :return: Sketch of the number of rows for each make
+    :rtype: MakeFrequencySketch
+    """
+    logger.info("Running sketch_make_frequencies()")
+    make_sketch: MakeFrequencySketch = MakeFrequencySketch()
+    for chunk in extract_data_chunks(filename):
+        make_sketch.update(
+            remove_missing_values(strip_columns(chunk))[model_column])
+    return make_sketch
 
 
-def load_with_pandas(dataframe: pd.DataFrame) -> bool:
+@profile_stage('transform')
+def transform_data(
+        dataframe: pd.DataFrame,
+        make_counts: MakeFrequencies | None = None,
+        date_format: str | None = None
+) -> pd.DataFrame:
     """
-    Loading data from dataframe into Car table using Pandas API
-    :param dataframe: Dataframe with cars sales information
+    Transform dataframe based on the requirements
+    :param dataframe: Raw dataframe
     :type dataframe: pd.DataFrame
-    :return: True if the rows were inserted; otherwise false
-    :rtype: bool
+    :param make_counts: Pre-computed make frequencies for the whole dataset,
+     a sketch of them or a fitted model. Required when the dataframe is
+     only a chunk of it
+    :type make_counts: MakeFrequencies
+    :param date_format: Format of the purchase dates. Detected if not given
+    :type date_format: str
+    :return: Transformed dataframe
+    :rtype: pd.DataFrame
     """
-    url: str = f"postgresql+psycopg://{settings.POSTGRES_USER}:" \
-               f"{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}/" \
-               f"{settings.POSTGRES_DB}"
-    engine: Engine = create_engine(url)
-    with engine.begin() as connection:
-        try:
-            rows_inserted: int = dataframe.to_sql(
-                'car',
-                connection,
-                index=False)
-            print(rows_inserted)
-        except Exception as exc:
-            logger.error(exc)
-            return False
-    return True
+    logger.info("Running transform_data()")
+    if settings.TRANSFORM_WORKERS > 1 and len(dataframe) > settings.SHARD_SIZE:
+        # pylint: disable=import-outside-toplevel
+        from engineering.parallel import parallel_transform
+        return parallel_transform(dataframe, make_counts, date_format)
+    return apply_steps(dataframe, transform_steps(make_counts, date_format))
@@ -0,0 +1,238 @@
+"""
+Database script for Engineering module.
+This script loads the transformed data into the database, in one go,
+ chunk by chunk or incrementally.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import logging_config
+from core.config import settings
+from core.decorators import profile_stage
+from core.persistence_manager import PersistenceManager
+from db.session import get_session
+from engineering import count_make_frequencies, extract_data_chunks, \
+    extract_data_since, sketch_make_frequencies, transform_data
+from engineering.frequency import MakeClassificationModel, MakeFrequencies
+from engineering.extraction import is_file_pattern
+from engineering.loading import loading, copy_loading, parallel_loading, \
+    upsert_loading
+from engineering.pipeline import run_pipeline
+from engineering.transformation import detect_date_format, \
+    remove_missing_values, strip_columns
+from models.watermark import Watermark
+from schema.load_engine import LoadEngine
+from services.watermark import WatermarkService
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+@profile_stage('load')
+async def load_to_db(
+        dataframe: pd.DataFrame,
+        engine: LoadEngine | None = None) -> bool:
+    """
+    Loading data from dataframe into Car table
+    :param dataframe: Dataframe with cars sales information
+    :type dataframe: pd.DataFrame
+    :param engine: Engine used to insert the rows. Settings value by
+     default
+    :type engine: LoadEngine
+    :return: True if the rows were inserted; otherwise false
+    :rtype: bool
+    """
+    logger.info("Running load_to_db()")
+    engine = engine or LoadEngine(settings.LOAD_ENGINE)
+    if engine == LoadEngine.COPY:
+        return await copy_loading(dataframe)
+    if engine == LoadEngine.PARALLEL:
+        return await parallel_loading(dataframe)
+    if engine == LoadEngine.UPSERT:
+        return await upsert_loading(dataframe)
+    session: AsyncSession = await get_session()
+    cars_inserted: bool = await loading(dataframe, session)
+    return cars_inserted
+
+
+def make_frequencies(filename: str = settings.RAW_FILES) -> MakeFrequencies:
+    """
+    Make frequencies of the whole dataset. The persisted model is reused
+     without a first pass when MAKE_MODEL is set. Otherwise the first pass
+     over the raw files sketches or counts them as set, and fits the first
+     model from the counts when MAKE_MODEL is set
+    :param filename: Filename to extract data from, or glob pattern of
+     several raw files
+    :type filename: str
+    :return: Make frequencies of the whole dataset
+    :rtype: MakeFrequencies
+    """
+    if settings.MAKE_MODEL:
+        model: MakeClassificationModel | None = \
+            MakeClassificationModel.resolve()
+        if model:
+            return model
+    make_counts: MakeFrequencies = sketch_make_frequencies(
+        filename) if settings.MAKE_SKETCH else count_make_frequencies(filename)
+    if settings.MAKE_MODEL and isinstance(make_counts, pd.Series):
+        make_counts = MakeClassificationModel.resolve(make_counts)
+    return make_counts
+
+
+async def stream_to_db(filename: str = settings.RAW_FILES) -> int:
+    """
+    Streaming ETL that extracts, transforms and loads the raw file chunk by
+     chunk so memory is bounded by the chunk size instead of the file size.
+     The stages overlap, so a chunk is inserted while the next ones are
+     transformed and read
+    :param filename: Filename to extract data from
+    :type filename: str
+    :return: Number of rows loaded into the Car table
+    :rtype: int
+    """
+    logger.info("Running stream_to_db()")
+    make_counts: MakeFrequencies = make_frequencies(filename)
+    date_format: str | None = None
+
+    def transform_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+        nonlocal date_format
+        # The date format is detected once per file, from its first chunk.
+        # Chunks of a file pattern come with their dates already parsed
+        date_format = date_format or detect_date_format(
+            chunk['Purchase Date'])
+        return transform_data(chunk, make_counts, date_format)
+
+    rows_loaded: int = await run_pipeline(
+        extract_data_chunks(filename), transform_chunk, load_to_db,
+        settings.QUEUE_SIZE)
+    logger.info("Streamed %s rows into the table.", rows_loaded)
+    return rows_loaded
+
+
+async def changed_source_files(
+        filenames: list[str]) -> list[tuple[str, str, Watermark | None]]:
+    """
+    Source files whose content changed since their previous run, checked
+     by content hash before anything is extracted or counted
+    :param filenames: Filenames of the raw files
+    :type filenames: list[str]
+    :return: Filename, content hash and previous watermark of the changed
+     files
+    :rtype: list[tuple[str, str, Watermark | None]]
+    """
+    changed_files: list[tuple[str, str, Watermark | None]] = []
+    for filename in filenames:
+        content_hash: str = PersistenceManager.hash_file(filename)
+        watermark: Watermark | None = await WatermarkService.read_watermark(
+            filename, await get_session())
+        if watermark and watermark.content_hash == content_hash:
+            logger.info("Source file %s is unchanged. Nothing to load",
+                        filename)
+            continue
+        changed_files.append((filename, content_hash, watermark))
+    return changed_files
+
+
+async def incremental_load_file(
+        filename: str, content_hash: str, dataframe: pd.DataFrame,
+        make_counts: MakeFrequencies | None) -> int:
+    """
+    Transform and load the new rows of a changed source file and move its
+     watermark. Rows already in the table are skipped by their natural key
+    :param filename: Filename the rows were extracted from
+    :type filename: str
+    :param content_hash: Hash of the file content
+    :type content_hash: str
+    :param dataframe: Cleaned raw rows at or after the previous watermark
+    :type dataframe: pd.DataFrame
+    :param make_counts: Make classification of the whole dataset. Only
+     None when there are no rows to load
+    :type make_counts: MakeFrequencies
+    :return: Number of rows sent to the Car table
+    :rtype: int
+    """
+    max_purchase_date = None
+    if len(dataframe) > 0:
+        dataframe = transform_data(dataframe, make_counts)
+        await load_to_db(dataframe, LoadEngine.UPSERT)
+        max_purchase_date = dataframe['purchase_date'].max().to_pydatetime()
+    await WatermarkService.upsert_watermark(
+        Watermark(source_file=filename, content_hash=content_hash,
+                  max_purchase_date=max_purchase_date,
+                  rows_loaded=len(dataframe)), await get_session())
+    logger.info("Incremental load sent %s rows from %s", len(dataframe),
+                filename)
+    return len(dataframe)
+
+
+async def incremental_load(
+        filename: str = settings.RAW_FILES, model_column: str = 'Make'
+) -> int:
+    """
+    Incremental ETL of the source files, each one with its own content
+     hash and purchase date watermark. Unchanged files are skipped before
+     anything is read, and only the rows at or after the watermark of a
+     changed file are extracted and transformed. Their makes are merged
+     into the persisted classification model, so the previous rows are
+     never counted again
+    :param filename: Filename to extract data from, or glob pattern of
+     several raw files
+    :type filename: str
+    :param model_column: Name of the make column
+    :type model_column: str
+    :return: Number of rows sent to the Car table
+    :rtype: int
+    """
+    logger.info("Running incremental_load()")
+    changed_files: list[tuple[str, str, Watermark | None]] = \
+        await changed_source_files(
+            PersistenceManager.list_files(filename)
+            if is_file_pattern(filename) else [filename])
+    new_rows: list[pd.DataFrame] = []
+    for source_file, _, watermark in changed_files:
+        dataframe: pd.DataFrame = extract_data_since(
+            source_file, watermark and watermark.max_purchase_date)
+        if len(dataframe) > 0:
+            dataframe = remove_missing_values(strip_columns(dataframe))
+        new_rows.append(dataframe)
+    make_counts: pd.Series = pd.concat(
+        [dataframe[model_column].value_counts() for dataframe in new_rows
+         if len(dataframe) > 0] or [pd.Series(dtype=np.int64)]
+    ).groupby(level=0).sum()
+    model: MakeClassificationModel | None = MakeClassificationModel.resolve(
+        make_counts if len(make_counts) else None)
+    rows_loaded: int = 0
+    for (source_file, content_hash, _), dataframe in zip(
+            changed_files, new_rows):
+        rows_loaded += await incremental_load_file(
+            source_file, content_hash, dataframe, model)
+    return rows_loaded
+
+
+def load_with_pandas(dataframe: pd.DataFrame) -> bool:
+    """
+    Loading data from dataframe into Car table using Pandas API
+    :param dataframe: Dataframe with cars sales information
+    :type dataframe: pd.DataFrame
+    :return: True if the rows were inserted; otherwise false
+    :rtype: bool
+    """
+    url: str = f"postgresql+psycopg://{settings.POSTGRES_USER}:" \
+               f"{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}/" \
+               f"{settings.POSTGRES_DB}"
+    engine: Engine = create_engine(url)
+    with engine.begin() as connection:
+        try:
+            rows_inserted: int = dataframe.to_sql(
+                'car',
+                connection,
+                index=False)
+            print(rows_inserted)
+        except Exception as exc:
+            logger.error(exc)
+            return False
+    return True
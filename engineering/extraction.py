@@ -1,12 +1,61 @@
 """
 Extraction script for Engineering module
 """
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 from numpy import float16, float32
+from pandas.api.types import CategoricalDtype
 
+from core import logging_config
+from core.metrics import StageMetrics, run_report
 from core.persistence_manager import PersistenceManager
+from engineering.transformation import detect_date_format, \
+    parse_date_column
 from schema.gender import Gender
 
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+D_TYPES: dict = {
+    'Buyer Gender': 'category', 'Color': 'category', 'Make': 'category',
+    'New Car': 'boolean', 'Buyer Age': 'UInt8', 'Discount': float16,
+    'Sale Price': float32, 'Purchase Date': 'category'}
+GENDER_MAPPING: dict[str, str] = {
+    'Male': Gender.MALE.value, 'Agender': Gender.OTHER.value,
+    'Female': Gender.FEMALE.value, 'Non-binary': Gender.OTHER.value,
+    'Genderqueer': Gender.OTHER.value, 'Polygender': Gender.OTHER.value,
+    'Genderfluid': Gender.OTHER.value, 'Bigender': Gender.OTHER.value}
+GENDER_DTYPE: CategoricalDtype = CategoricalDtype(
+    [gender.value for gender in Gender])
+
+
+def convert_gender_column(series: pd.Series) -> pd.Series:
+    """
+    Convert a gender column by grouping less common into Other. The mapping
+     is applied once per distinct value and then broadcast with the codes
+    :param series: Gender column to convert
+    :type series: pd.Series
+    :return: Gender column converted to the Gender categorical type
+    :rtype: pd.Series
+    """
+    raw_genders: pd.Series = series.astype('category')
+    other_code: int = GENDER_DTYPE.categories.get_loc(Gender.OTHER.value)
+    # Missing values have code -1, which picks the trailing Other code
+    target_codes: np.ndarray = np.append(
+        GENDER_DTYPE.categories.get_indexer(
+            [GENDER_MAPPING.get(gender, Gender.OTHER.value)
+             for gender in raw_genders.cat.categories]), other_code)
+    return pd.Series(
+        pd.Categorical.from_codes(
+            target_codes[raw_genders.cat.codes.to_numpy()],
+            dtype=GENDER_DTYPE), index=series.index, name=series.name)
+
 
 def extract_raw_data(
         filename: str, gender_column: str, parse_dates: list[str] | None = None
@@ -17,34 +66,164 @@ def extract_raw_data(
     :type filename: str
     :param gender_column: Name of gender column
     :type gender_column: str
-    :param parse_dates: List of date columns to parse
+    :param parse_dates: List of date columns to parse while reading. The
+     purchase date is kept as categorical strings for the transformation
     :type parse_dates: list[str]
     :return: Dataframe with raw data
     :rtype: pd.DataFrame
     """
-    d_types: dict = {
-        'Buyer Gender': str, 'Color': str, 'Make': str, 'New Car': bool,
-        'Buyer Age': int, 'Discount': float16, 'Sale Price': float32}
-    mapping: dict[str, str] = {
-        'Male': Gender.MALE.value, 'Agender': Gender.OTHER.value,
-        'Female': Gender.FEMALE.value, 'Non-binary': Gender.OTHER.value,
-        'Genderqueer': Gender.OTHER.value, 'Polygender': Gender.OTHER.value,
-        'Genderfluid': Gender.OTHER.value, 'Bigender': Gender.OTHER.value}
-
-    def convert_gender(gender: str):
-        """
-        Convert a gender by grouping less common into Other
-        :param gender: Gender to convert
-        :type gender: str
-        :return: Gender converted
-        :rtype: str
-        """
-        return mapping.get(gender, Gender.OTHER.value)
-
-    if not parse_dates:
-        parse_dates = ['Purchase Date']
-    converters: dict = {gender_column: convert_gender}
     dataframe: pd.DataFrame = PersistenceManager.load_from_csv(
-        filename=filename, dtypes=d_types, parse_dates=parse_dates,
-        converters=converters)
+        filename=filename, dtypes=D_TYPES, parse_dates=parse_dates)
+    dataframe[gender_column] = convert_gender_column(dataframe[gender_column])
     return dataframe
+
+
+def extract_raw_data_chunks(
+        filename: str, gender_column: str, parse_dates: list[str] | None = None,
+        chunk_size: int | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Engineering method to extract raw data from csv file chunk by chunk
+    :param filename: Filename to extract data from
+    :type filename: str
+    :param gender_column: Name of gender column
+    :type gender_column: str
+    :param parse_dates: List of date columns to parse
+    :type parse_dates: list[str]
+    :param chunk_size: Number of rows per chunk. Settings value by default
+    :type chunk_size: int
+    :return: Iterator of dataframes with raw data
+    :rtype: Iterator[pd.DataFrame]
+    """
+    kwargs: dict = {'chunk_size': chunk_size} if chunk_size else {}
+    for chunk in PersistenceManager.iter_csv_chunks(
+            filename=filename, dtypes=D_TYPES, parse_dates=parse_dates,
+            **kwargs):
+        chunk[gender_column] = convert_gender_column(chunk[gender_column])
+        yield chunk
+
+
+def is_file_pattern(filename: str) -> bool:
+    """
+    Check if a filename is a glob pattern for several raw files
+    :param filename: Filename or glob pattern
+    :type filename: str
+    :return: True if the filename has wildcards; otherwise false
+    :rtype: bool
+    """
+    return any(wildcard in filename for wildcard in '*?[')
+
+
+def extract_raw_file(
+        filename: str, gender_column: str, date_column: str
+) -> pd.DataFrame:
+    """
+    Extract one of several raw files and record its rows and timing. The
+     dates are parsed with the format of this file, since the formats
+     differ between the files
+    :param filename: Filename to extract data from
+    :type filename: str
+    :param gender_column: Name of gender column
+    :type gender_column: str
+    :param date_column: Name of the date column
+    :type date_column: str
+    :return: Dataframe with raw data of the file
+    :rtype: pd.DataFrame
+    """
+    started_at: datetime = datetime.now()
+    start: float = perf_counter()
+    dataframe: pd.DataFrame = parse_date_column(
+        extract_raw_data(filename, gender_column), date_column,
+        year_column=None)
+    metrics: StageMetrics = StageMetrics(
+        stage=f'extract.{filename}', started_at=started_at,
+        wall_time=perf_counter() - start, rows_out=len(dataframe),
+        bytes_out=int(dataframe.memory_usage(index=True).sum()))
+    run_report.record(metrics)
+    logger.info("Extracted %s rows from %s in %.3f seconds",
+                metrics.rows_out, filename, metrics.wall_time)
+    return dataframe
+
+
+def concat_frames(dataframes: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate dataframes in a single copy. Categorical columns are
+     recoded to the union of their categories first, so they stay
+     categorical instead of falling back to object
+    :param dataframes: Dataframes with the same columns
+    :type dataframes: list[pd.DataFrame]
+    :return: Concatenated dataframe
+    :rtype: pd.DataFrame
+    """
+    for column in dataframes[0].columns:
+        d_types: list = [dataframe[column].dtype for dataframe in dataframes]
+        if not all(isinstance(d_type, CategoricalDtype) for d_type in d_types
+                   ) or all(d_type == d_types[0] for d_type in d_types):
+            continue
+        categories: pd.Index = pd.Index(np.concatenate([
+            d_type.categories.to_numpy() for d_type in d_types])).unique()
+        for dataframe in dataframes:
+            dataframe[column] = dataframe[column].cat.set_categories(
+                categories)
+    return pd.concat(dataframes, ignore_index=True, copy=False)
+
+
+def extract_raw_files(
+        filenames: list[str], gender_column: str, date_column: str,
+        workers: int = 1
+) -> pd.DataFrame:
+    """
+    Engineering method to extract several raw csv files concurrently into
+     one dataframe
+    :param filenames: Filenames to extract data from
+    :type filenames: list[str]
+    :param gender_column: Name of gender column
+    :type gender_column: str
+    :param date_column: Name of the date column
+    :type date_column: str
+    :param workers: Number of threads reading the files
+    :type workers: int
+    :return: Dataframe with raw data of all the files
+    :rtype: pd.DataFrame
+    """
+    if not filenames:
+        raise FileNotFoundError("No raw files to extract.")
+    with ThreadPoolExecutor(
+            max_workers=min(workers, len(filenames))) as executor:
+        dataframes: list[pd.DataFrame] = list(executor.map(
+            extract_raw_file, filenames, [gender_column] * len(filenames),
+            [date_column] * len(filenames)))
+    return concat_frames(dataframes)
+
+
+def extract_raw_files_chunks(
+        filenames: list[str], gender_column: str, date_column: str,
+        chunk_size: int | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Engineering method to extract several raw csv files chunk by chunk,
+     one file after the other
+    :param filenames: Filenames to extract data from
+    :type filenames: list[str]
+    :param gender_column: Name of gender column
+    :type gender_column: str
+    :param date_column: Name of the date column
+    :type date_column: str
+    :param chunk_size: Number of rows per chunk. Settings value by default
+    :type chunk_size: int
+    :return: Iterator of dataframes with raw data
+    :rtype: Iterator[pd.DataFrame]
+    """
+    for filename in filenames:
+        date_format: str | None = None
+        rows: int = 0
+        start: float = perf_counter()
+        for chunk in extract_raw_data_chunks(
+                filename, gender_column, chunk_size=chunk_size):
+            # The date format is detected once per file, from its first chunk
+            date_format = date_format or detect_date_format(chunk[date_column])
+            rows += len(chunk)
+            yield parse_date_column(chunk, date_column, year_column=None,
+                                    date_format=date_format)
+        logger.info("Extracted %s rows from %s in %.3f seconds", rows,
+                    filename, perf_counter() - start)
@@ -0,0 +1,439 @@
+"""
+Frequency script for Engineering module.
+This script computes the make frequency bins exactly from a frequency
+ table, or approximately from a mergeable sketch with bounded memory, and
+ persists the fitted classification of the makes for later runs.
+"""
+import glob
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from numpy import uint8, float16
+# pylint: disable=no-name-in-module
+from pydantic import BaseModel
+
+from core import logging_config
+from core.config import settings
+from core.persistence_manager import DataType
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+HASH_KEYS: list[str] = [f'{seed:016d}' for seed in range(8)]
+
+
+def frequency_bin_edges(
+        make_counts: pd.Series, num_bins: int = settings.NUM_BINS
+) -> np.ndarray:
+    """
+    Compute the quantile bin edges of the per-row make frequency using only
+     the frequency table. Equivalent to the edges pd.qcut finds over the
+     full frequency column, without materializing it.
+    :param make_counts: Number of rows for each make
+    :type make_counts: pd.Series
+    :param num_bins: Number of quantile bins
+    :type num_bins: int
+    :return: Bin edges for the make frequency
+    :rtype: np.ndarray
+    """
+    if not num_bins:
+        raise AttributeError("Number of bins is not set.")
+    quantiles: np.ndarray = np.linspace(
+        0.00, 1.00, uint8(num_bins) + 1, dtype=float16).astype(np.float64)
+    # Each make contributes as many rows as its count, all with that count
+    # as frequency value, so the sorted frequency column is run-length
+    # encoded by (frequency, frequency * number of makes with it).
+    frequencies: pd.Series = make_counts[make_counts > 0].astype(np.int64)
+    runs: pd.Series = frequencies.groupby(frequencies).sum().sort_index()
+    values: np.ndarray = runs.index.to_numpy(dtype=np.float64)
+    ends: np.ndarray = np.cumsum(runs.to_numpy())
+    total: int = int(ends[-1]) if len(ends) else 0
+    if total == 0:
+        return np.full(len(quantiles), np.nan)
+    positions: np.ndarray = quantiles * (total - 1)
+    lower: np.ndarray = np.floor(positions)
+    lower_values: np.ndarray = values[np.searchsorted(
+        ends, lower, side='right')]
+    upper_values: np.ndarray = values[np.searchsorted(
+        ends, np.minimum(lower + 1, total - 1), side='right')]
+    return lower_values + (upper_values - lower_values) * (positions % 1)
+
+
+class MakeFrequencySketch:
+    """
+    Make Frequency Sketch class.
+    Counts the makes exactly while their cardinality is small and switches
+     to a count-min sketch plus a bottom-k sample of the distinct makes
+     once it exceeds max_exact, so memory stays bounded. Sketches with the
+     same shape are mergeable, e.g. across worker processes.
+    """
+
+    def __init__(self, max_exact: int = 10000, width: int = 2048,
+                 depth: int = 4, sample_size: int = 1024) -> None:
+        if depth > len(HASH_KEYS):
+            raise ValueError(f"Depth must be at most {len(HASH_KEYS)}.")
+        self.max_exact: int = max_exact
+        self.width: int = width
+        self.depth: int = depth
+        self.sample_size: int = sample_size
+        self.total: int = 0
+        self.counts: pd.Series | None = pd.Series(dtype=np.int64)
+        self.table: np.ndarray | None = None
+        self.sample: pd.Series = pd.Series(dtype=np.uint64)
+
+    @property
+    def is_exact(self) -> bool:
+        """
+        Whether the makes are still counted exactly
+        :return: True if the counts are exact; otherwise false
+        :rtype: bool
+        """
+        return self.table is None
+
+    def _hashes(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Column of every key in each row of the count-min table
+        :param keys: Makes to hash
+        :type keys: np.ndarray
+        :return: Columns with shape (depth, number of keys)
+        :rtype: np.ndarray
+        """
+        return np.stack([
+            pd.util.hash_array(keys, hash_key=hash_key) % self.width
+            for hash_key in HASH_KEYS[:self.depth]]).astype(np.intp)
+
+    def _add_approximate(self, counts: pd.Series) -> None:
+        """
+        Add make counts to the count-min table and the distinct sample
+        :param counts: Number of rows for each make
+        :type counts: pd.Series
+        :return: None
+        :rtype: NoneType
+        """
+        keys: np.ndarray = counts.index.to_numpy(dtype=object)
+        columns: np.ndarray = self._hashes(keys)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts.to_numpy())
+        # The lowest hashes are a uniform sample of the distinct makes
+        sample: pd.Series = pd.concat([self.sample, pd.Series(
+            pd.util.hash_array(keys, hash_key=HASH_KEYS[-1]), index=keys)])
+        self.sample = sample[~sample.index.duplicated()].nsmallest(
+            self.sample_size)
+
+    def _to_approximate(self) -> None:
+        """
+        Switch from exact counts to the count-min table
+        :return: None
+        :rtype: NoneType
+        """
+        logger.info("Switching the make sketch to count-min after %s makes",
+                    len(self.counts))
+        counts: pd.Series = self.counts
+        self.counts = None
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self._add_approximate(counts)
+
+    def _add_counts(self, counts: pd.Series) -> None:
+        """
+        Add make counts in the current mode
+        :param counts: Number of rows for each make
+        :type counts: pd.Series
+        :return: None
+        :rtype: NoneType
+        """
+        self.total += int(counts.sum())
+        if self.is_exact:
+            self.counts = self.counts.add(counts, fill_value=0).astype(
+                np.int64)
+            if len(self.counts) > self.max_exact:
+                self._to_approximate()
+        else:
+            self._add_approximate(counts)
+
+    def update(self, series: pd.Series) -> 'MakeFrequencySketch':
+        """
+        Count the makes of a chunk
+        :param series: Make column of the chunk
+        :type series: pd.Series
+        :return: This sketch
+        :rtype: MakeFrequencySketch
+        """
+        counts: pd.Series = series.value_counts()
+        counts = counts[counts > 0]
+        counts.index = counts.index.astype(object)
+        self._add_counts(counts.astype(np.int64))
+        return self
+
+    def merge(self, other: 'MakeFrequencySketch') -> 'MakeFrequencySketch':
+        """
+        Merge the counts of another sketch with the same shape
+        :param other: Sketch to merge into this one
+        :type other: MakeFrequencySketch
+        :return: This sketch
+        :rtype: MakeFrequencySketch
+        """
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Sketches must have the same width and depth.")
+        if other.is_exact:
+            self._add_counts(other.counts)
+            return self
+        if self.is_exact:
+            self._to_approximate()
+        self.total += other.total
+        self.table += other.table
+        sample: pd.Series = pd.concat([self.sample, other.sample])
+        self.sample = sample[~sample.index.duplicated()].nsmallest(
+            self.sample_size)
+        return self
+
+    def estimate(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Number of rows of each make. Count-min estimates never undercount
+        :param keys: Makes to estimate
+        :type keys: np.ndarray
+        :return: Estimated counts, NaN for unknown makes when exact
+        :rtype: np.ndarray
+        """
+        if self.is_exact:
+            return self.counts.reindex(keys).to_numpy(dtype=np.float64)
+        columns: np.ndarray = self._hashes(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(
+            axis=0).astype(np.float64)
+
+    def bin_edges(self, num_bins: int = settings.NUM_BINS) -> np.ndarray:
+        """
+        Quantile bin edges of the per-row make frequency, estimated from
+         the sampled makes once the sketch is approximate
+        :param num_bins: Number of quantile bins
+        :type num_bins: int
+        :return: Bin edges for the make frequency
+        :rtype: np.ndarray
+        """
+        if self.is_exact:
+            return frequency_bin_edges(self.counts, num_bins)
+        keys: np.ndarray = self.sample.index.to_numpy(dtype=object)
+        return frequency_bin_edges(
+            pd.Series(self.estimate(keys), index=keys), num_bins)
+
+    def classify(self, series: pd.Series) -> np.ndarray:
+        """
+        Classify the makes of a chunk into the frequency bins. Makes are
+         classified once per distinct value and broadcast with the codes.
+         Unknown and missing makes are the rarest class, as in the fitted
+         model, and overestimates above the last edge the most frequent one
+        :param series: Make column of the chunk
+        :type series: pd.Series
+        :return: Bin number of each row, starting at 1
+        :rtype: np.ndarray
+        """
+        makes: pd.Series = series.astype('category')
+        if not self.total:
+            return np.ones(len(makes), dtype=uint8)
+        edges: np.ndarray = self.bin_edges()
+        category_counts: np.ndarray = np.minimum(self.estimate(
+            makes.cat.categories.to_numpy(dtype=object)), edges[-1])
+        # Makes below the first edge or unknown are binned as NaN
+        category_classes: np.ndarray = np.nan_to_num(pd.cut(
+            category_counts, bins=edges, labels=False,
+            include_lowest=True) + 1, nan=1)
+        # Missing makes have code -1, which picks the trailing class
+        return np.append(category_classes, 1).astype(uint8)[
+            makes.cat.codes.to_numpy()]
+
+
+class MakeClassificationModel(BaseModel):
+    """
+    Make Classification Model class that inherited from Pydantic BaseModel.
+    Fitted make frequencies, bin edges and class of every make, persisted
+     as a versioned JSON artifact so rows can be classified by lookup. The
+     makes of the rows seen since the fit are stored apart, so later runs
+     only count their new rows.
+    """
+    version: int
+    fitted_at: datetime
+    num_bins: int
+    make_counts: dict[str, int]
+    bin_edges: list[float]
+    classes: dict[str, int]
+    new_counts: dict[str, int] = {}
+
+    @classmethod
+    def fit(cls, make_counts: pd.Series,
+            version: int = 1) -> 'MakeClassificationModel':
+        """
+        Fit the classification of the makes from their frequencies. Every
+         row of a make has the same frequency, so classifying the makes is
+         equivalent to binning the per-row frequency column
+        :param make_counts: Number of rows for each make
+        :type make_counts: pd.Series
+        :param version: Version of the model
+        :type version: int
+        :return: Fitted model
+        :rtype: MakeClassificationModel
+        """
+        counts: pd.Series = make_counts[make_counts > 0].astype(np.int64)
+        edges: np.ndarray = frequency_bin_edges(counts)
+        classes: np.ndarray = (pd.cut(
+            counts.to_numpy(dtype=np.float64), bins=edges, labels=False,
+            include_lowest=True) + 1).astype(uint8)
+        makes: list[str] = [str(make) for make in counts.index]
+        return cls(
+            version=version, fitted_at=datetime.now(),
+            num_bins=settings.NUM_BINS,
+            make_counts=dict(zip(makes, counts.tolist())),
+            bin_edges=edges.tolist(),
+            classes=dict(zip(makes, classes.tolist())))
+
+    def lookup(self, make: str) -> int:
+        """
+        Class of a single make. Unknown makes are the rarest class
+        :param make: Make to classify
+        :type make: str
+        :return: Class of the make, starting at 1
+        :rtype: int
+        """
+        return self.classes.get(make, 1)
+
+    def classify(self, series: pd.Series) -> np.ndarray:
+        """
+        Classify the makes of a column by array lookup on their codes.
+         Unknown and missing makes are the rarest class
+        :param series: Make column to classify
+        :type series: pd.Series
+        :return: Class of each row, starting at 1
+        :rtype: np.ndarray
+        """
+        makes: pd.Series = series.astype('category')
+        category_classes: np.ndarray = np.array(
+            [self.lookup(str(make)) for make in makes.cat.categories] + [1],
+            dtype=uint8)
+        return category_classes[makes.cat.codes.to_numpy()]
+
+    def observed_counts(self) -> pd.Series:
+        """
+        Number of rows for each make, fitted or seen since the fit
+        :return: Number of rows for each make
+        :rtype: pd.Series
+        """
+        return pd.Series(self.make_counts, dtype=np.int64).add(pd.Series(
+            self.new_counts, dtype=np.int64), fill_value=0).astype(np.int64)
+
+    def add_counts(self, make_counts: pd.Series) -> None:
+        """
+        Add the makes of new rows to the ones seen since the fit
+        :param make_counts: Number of new rows for each make
+        :type make_counts: pd.Series
+        :return: None
+        :rtype: NoneType
+        """
+        counts: pd.Series = make_counts[make_counts > 0].astype(np.int64)
+        counts.index = counts.index.astype(str)
+        new_counts: pd.Series = pd.Series(
+            self.new_counts, dtype=np.int64).add(counts, fill_value=0)
+        self.new_counts = dict(zip(
+            new_counts.index.tolist(), new_counts.astype(np.int64).tolist()))
+
+    def drift(self, make_counts: pd.Series) -> float:
+        """
+        Total variation distance between the fitted and the given make
+         distributions, from 0 (same) to 1 (disjoint)
+        :param make_counts: Number of rows for each make
+        :type make_counts: pd.Series
+        :return: Distance between the distributions
+        :rtype: float
+        """
+        fitted: pd.Series = pd.Series(self.make_counts, dtype=np.float64)
+        current: pd.Series = make_counts[make_counts > 0].astype(np.float64)
+        current.index = current.index.astype(str)
+        fitted, current = fitted.align(current, fill_value=0)
+        if not fitted.sum() or not current.sum():
+            return 1.0
+        return float((fitted / fitted.sum() - current / current.sum()).abs(
+        ).sum() / 2)
+
+    def save(self, data_type: DataType = DataType.MODELS) -> str:
+        """
+        Save the model as a new versioned artifact
+        :param data_type: Path where the model will be saved
+        :type data_type: DataType
+        :return: Path of the model file
+        :rtype: str
+        """
+        os.makedirs(data_type.value, exist_ok=True)
+        filepath: str = \
+            f'{data_type.value}make_classification_v{self.version}.json'
+        with open(filepath, 'w', encoding=settings.ENCODING) as model_file:
+            model_file.write(self.json(indent=2))
+        logger.info("Make classification model saved to %s", filepath)
+        return filepath
+
+    @classmethod
+    def load_latest(cls, data_type: DataType = DataType.MODELS
+                    ) -> Optional['MakeClassificationModel']:
+        """
+        Load the latest version of the model
+        :param data_type: Path where the models are saved
+        :type data_type: DataType
+        :return: Latest model, None if no model was saved
+        :rtype: Optional[MakeClassificationModel]
+        """
+        versions: dict[int, str] = {
+            int(re.search(r'_v(\d+)\.json$', filepath).group(1)): filepath
+            for filepath in glob.glob(
+                f'{data_type.value}make_classification_v*.json')}
+        if not versions:
+            return None
+        return cls.parse_file(versions[max(versions)])
+
+    @classmethod
+    def resolve(cls, make_counts: pd.Series | None = None,
+                threshold: float = settings.MODEL_DRIFT_THRESHOLD
+                ) -> Optional['MakeClassificationModel']:
+        """
+        Reuse the latest model without counting the makes again. The
+         makes of new rows are merged into the counts stored in the model,
+         and a new version is fitted from them and saved when they drifted
+         beyond the threshold or the bins changed. Without a saved model,
+         the first version is fitted from the given counts
+        :param make_counts: Number of rows for each make of the rows the
+         model has not seen. None to reuse the latest model as is
+        :type make_counts: pd.Series
+        :param threshold: Maximum total variation distance to reuse it
+        :type threshold: float
+        :return: Model to classify the makes. None if no model was saved
+         and no counts are given
+        :rtype: Optional[MakeClassificationModel]
+        """
+        model: Optional[MakeClassificationModel] = cls.load_latest()
+        if not model:
+            if make_counts is None:
+                return None
+            model = cls.fit(make_counts)
+            model.save()
+            return model
+        new_rows: bool = make_counts is not None and make_counts.sum() > 0
+        if new_rows:
+            model.add_counts(make_counts)
+        if model.num_bins == settings.NUM_BINS:
+            if not new_rows:
+                logger.info("Reusing make classification model v%s",
+                            model.version)
+                return model
+            distance: float = model.drift(model.observed_counts())
+            if distance <= threshold:
+                logger.info("Reusing make classification model v%s (drift "
+                            "%s)", model.version, distance)
+                model.save()
+                return model
+            logger.warning("Make distribution drifted %s from model v%s",
+                           distance, model.version)
+        model = cls.fit(model.observed_counts(), version=model.version + 1)
+        model.save()
+        return model
+
+
+MakeFrequencies = pd.Series | MakeFrequencySketch | MakeClassificationModel
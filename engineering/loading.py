@@ -1,19 +1,60 @@
 """
 Loading script for Engineering module
 """
+import asyncio
 import logging
+from time import perf_counter
+from typing import Any, Iterator
+from uuid import uuid4
 
 import pandas as pd
+from asyncpg import Connection
+from asyncpg.exceptions import PostgresError
+from pandas.api.types import is_datetime64_any_dtype
+from sqlalchemy import MetaData, Table, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core import logging_config
-from models.car import Car
+from core.config import settings
+from db.session import async_engine
+from models.car import Car, NATURAL_KEY
 from services.car import CarService
 
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+def create_staging_table() -> Table:
+    """
+    Staging table of a parallel load, with a unique name so concurrent
+     loads never drop or publish each other's rows
+    :return: Copy of the Car table under its staging name
+    :rtype: Table
+    """
+    return Car.__table__.to_metadata(
+        MetaData(), name=f'{Car.__tablename__}_staging_{uuid4().hex}')
+
+
+def dataframe_to_records(dataframe: pd.DataFrame) -> Iterator[tuple]:
+    """
+    Convert the dataframe into row tuples of native Python values
+     column by column instead of row by row
+    :param dataframe: Dataframe with cars sales information
+    :type dataframe: pd.DataFrame
+    :return: Iterator of rows ordered as the dataframe columns
+    :rtype: Iterator[tuple]
+    """
+    columns: list[list[Any]] = []
+    for column in dataframe.columns:
+        series: pd.Series = dataframe[column]
+        if is_datetime64_any_dtype(series):
+            columns.append(list(series.dt.to_pydatetime()))
+        else:
+            columns.append(series.astype(object).tolist())
+    return zip(*columns)
+
+
 async def loading(dataframe: pd.DataFrame, session: AsyncSession) -> bool:
     """
     Loading data from dataframe into the Car table
@@ -30,3 +71,144 @@ async def loading(dataframe: pd.DataFrame, session: AsyncSession) -> bool:
         cars, session)
     logger.info("Inserted %s car sales into the table.", str(len(cars)))
     return cars_inserted
+
+
+async def copy_loading(dataframe: pd.DataFrame) -> bool:
+    """
+    Loading data from dataframe into the Car table with the binary COPY
+     protocol of asyncpg, skipping the ORM objects construction
+    :param dataframe: Dataframe with cars sales information
+    :type dataframe: pd.DataFrame
+    :return: True if the rows were inserted; otherwise false
+    :rtype: bool
+    """
+    if len(dataframe) == 0:
+        return False
+    async with async_engine.connect() as async_connection:
+        raw_connection = await async_connection.get_raw_connection()
+        driver_connection: Connection = raw_connection.driver_connection
+        try:
+            async with driver_connection.transaction():
+                status: str = await driver_connection.copy_records_to_table(
+                    Car.__tablename__,
+                    records=dataframe_to_records(dataframe),
+                    columns=list(dataframe.columns))
+        except PostgresError as pg_exc:
+            logger.error(pg_exc)
+            raise pg_exc
+    logger.info("Copied car sales into the table: %s", status)
+    return True
+
+
+async def _insert_worker(
+        worker_id: int, batches: asyncio.Queue, table: Table) -> int:
+    """
+    Insert the batches from the queue through a single pooled connection
+    :param worker_id: Identifier of the worker for the report
+    :type worker_id: int
+    :param batches: Queue of dataframe batches to insert
+    :type batches: asyncio.Queue
+    :param table: Table to insert the rows into
+    :type table: Table
+    :return: Number of rows inserted by the worker
+    :rtype: int
+    """
+    rows_inserted: int = 0
+    start_time: float = perf_counter()
+    async with async_engine.connect() as async_connection:
+        while not batches.empty():
+            batch: pd.DataFrame = batches.get_nowait()
+            async with async_connection.begin():
+                await async_connection.execute(
+                    insert(table), batch.to_dict('records'))
+            rows_inserted += len(batch)
+            logger.debug("Worker %s inserted a batch of %s rows", worker_id,
+                         len(batch))
+    run_time: float = perf_counter() - start_time
+    logger.info("Worker %s inserted %s rows at %s rows/s", worker_id,
+                rows_inserted, rows_inserted / run_time if run_time else 0)
+    return rows_inserted
+
+
+async def parallel_loading(
+        dataframe: pd.DataFrame, batch_size: int = settings.BATCH_SIZE,
+        concurrency: int = settings.CONCURRENCY) -> bool:
+    """
+    Loading data from dataframe into the Car table with concurrent batched
+     inserts into a staging table that is published in a single
+     transaction, so either all the rows are loaded or none
+    :param dataframe: Dataframe with cars sales information
+    :type dataframe: pd.DataFrame
+    :param batch_size: Number of rows per insert batch
+    :type batch_size: int
+    :param concurrency: Number of concurrent insert tasks
+    :type concurrency: int
+    :return: True if the rows were inserted; otherwise false
+    :rtype: bool
+    """
+    if len(dataframe) == 0:
+        return False
+    if concurrency >= settings.POOL_SIZE + settings.MAX_OVERFLOW:
+        logger.warning("Concurrency %s exceeds the connection pool size",
+                       concurrency)
+    staging_table: Table = create_staging_table()
+    async with async_engine.begin() as async_connection:
+        await async_connection.execute(text(
+            f'CREATE UNLOGGED TABLE {staging_table.name} (LIKE '
+            f'{Car.__tablename__} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    batches: asyncio.Queue = asyncio.Queue()
+    for start in range(0, len(dataframe), batch_size):
+        batches.put_nowait(dataframe.iloc[start:start + batch_size])
+    workers: list[asyncio.Task] = [
+        asyncio.create_task(_insert_worker(worker_id, batches, staging_table))
+        for worker_id in range(concurrency)]
+    try:
+        try:
+            rows_inserted: list[int] = await asyncio.gather(*workers)
+        except BaseException as exc:
+            logger.error(exc)
+            for worker in workers:
+                worker.cancel()
+            # The cancelled workers release their connections before the
+            # drop
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        async with async_engine.begin() as async_connection:
+            await async_connection.execute(text(
+                f'INSERT INTO {Car.__tablename__} '
+                f'SELECT * FROM {staging_table.name}'))
+    finally:
+        # Dropped whether the rows were published or not, e.g. when the
+        # publish violates a constraint of the Car table
+        async with async_engine.begin() as async_connection:
+            await async_connection.execute(
+                text(f'DROP TABLE IF EXISTS {staging_table.name}'))
+    logger.info("Published %s car sales from the staging table.",
+                sum(rows_inserted))
+    return True
+
+
+async def upsert_loading(
+        dataframe: pd.DataFrame, batch_size: int = settings.BATCH_SIZE
+) -> bool:
+    """
+    Loading data from dataframe into the Car table skipping the rows whose
+     natural key already exists, so loads can be repeated safely
+    :param dataframe: Dataframe with cars sales information
+    :type dataframe: pd.DataFrame
+    :param batch_size: Number of rows per insert batch
+    :type batch_size: int
+    :return: True if the rows were processed; otherwise false
+    :rtype: bool
+    """
+    if len(dataframe) == 0:
+        return False
+    statement = pg_insert(Car).on_conflict_do_nothing(
+        constraint=NATURAL_KEY)
+    async with async_engine.begin() as async_connection:
+        for start in range(0, len(dataframe), batch_size):
+            await async_connection.execute(
+                statement,
+                dataframe.iloc[start:start + batch_size].to_dict('records'))
+    logger.info("Upserted %s car sales into the table.", len(dataframe))
+    return True
@@ -0,0 +1,162 @@
+"""
+Parallel script for Engineering module.
+This script shards the row-wise transformation steps across a process
+ pool. Shards are exchanged as memory-mapped Arrow IPC files in shared
+ memory, so only paths and row ranges are pickled, and the global steps
+ run once over the combined result.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+import pyarrow as pa
+
+from core import logging_config
+from core.config import settings
+from core.decorators import profile_stage
+from core.metrics import call_with_stages, merge_stages
+from engineering.frequency import MakeClassificationModel, MakeFrequencies
+from engineering.transformation import TransformStep, apply_steps, \
+    detect_date_format, transform_steps
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+SHARD_STEPS: tuple[str, ...] = (
+    'strip_columns', 'cast_gender', 'remove_missing_values',
+    'parse_date_column')
+SHARED_MEMORY_DIR: str = '/dev/shm'
+
+
+def write_arrow(dataframe: pd.DataFrame, filepath: str) -> None:
+    """
+    Write a dataframe as an uncompressed Arrow IPC file
+    :param dataframe: Dataframe to write
+    :type dataframe: pd.DataFrame
+    :param filepath: Path of the Arrow file
+    :type filepath: str
+    :return: None
+    :rtype: NoneType
+    """
+    table: pa.Table = pa.Table.from_pandas(dataframe, preserve_index=False)
+    with pa.OSFile(filepath, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_arrow(filepath: str, start: int = 0,
+               stop: int | None = None) -> pd.DataFrame:
+    """
+    Read a row range of a memory-mapped Arrow IPC file
+    :param filepath: Path of the Arrow file
+    :type filepath: str
+    :param start: First row to read
+    :type start: int
+    :param stop: Row to stop before. Until the end by default
+    :type stop: int
+    :return: Dataframe with the rows
+    :rtype: pd.DataFrame
+    """
+    source: pa.MemoryMappedFile = pa.memory_map(filepath, 'r')
+    table: pa.Table = pa.ipc.open_file(source).read_all()
+    stop = table.num_rows if stop is None else stop
+    return table.slice(start, stop - start).to_pandas()
+
+
+def transform_shard(
+        source: str, start: int, stop: int, target: str,
+        date_format: str | None = None, model_column: str = 'Make'
+) -> pd.Series:
+    """
+    Run the row-wise transformation steps over a shard of the source file
+     and write the result to the target file
+    :param source: Arrow file with the extracted data
+    :type source: str
+    :param start: First row of the shard
+    :type start: int
+    :param stop: Row to stop before
+    :type stop: int
+    :param target: Arrow file for the transformed shard
+    :type target: str
+    :param date_format: Format of the purchase dates
+    :type date_format: str
+    :param model_column: Name of the make column
+    :type model_column: str
+    :return: Number of rows for each make in the transformed shard
+    :rtype: pd.Series
+    """
+    steps: list[TransformStep] = [
+        step for step in transform_steps(date_format=date_format)
+        if step[0] in SHARD_STEPS]
+    shard: pd.DataFrame = apply_steps(read_arrow(source, start, stop), steps)
+    write_arrow(shard, target)
+    return shard[model_column].value_counts()
+
+
+@profile_stage('transform.parallel')
+def parallel_transform(
+        dataframe: pd.DataFrame, make_counts: MakeFrequencies | None = None,
+        date_format: str | None = None,
+        workers: int = settings.TRANSFORM_WORKERS,
+        shard_size: int = settings.SHARD_SIZE) -> pd.DataFrame:
+    """
+    Transform the dataframe in row shards over a process pool (map) and
+     combine the shards and their make counts for the global steps
+     (reduce). The result is the same as the serial transformation
+    :param dataframe: Raw dataframe
+    :type dataframe: pd.DataFrame
+    :param make_counts: Pre-computed make frequencies for the whole dataset,
+     a sketch of them or a fitted model. If not provided, the persisted
+     model is reused when MAKE_MODEL is set, and otherwise they are reduced
+     from the shards
+    :type make_counts: MakeFrequencies
+    :param date_format: Format of the purchase dates. Detected once for
+     all the shards if not given
+    :type date_format: str
+    :param workers: Number of worker processes
+    :type workers: int
+    :param shard_size: Number of rows per shard
+    :type shard_size: int
+    :return: Transformed dataframe
+    :rtype: pd.DataFrame
+    """
+    if date_format is None:
+        date_format = detect_date_format(dataframe['Purchase Date'])
+    directory: str = tempfile.mkdtemp(
+        prefix='transform-', dir=SHARED_MEMORY_DIR
+        if os.path.isdir(SHARED_MEMORY_DIR) else None)
+    try:
+        source: str = os.path.join(directory, 'source.arrow')
+        write_arrow(dataframe, source)
+        bounds: list[tuple[int, int]] = [
+            (start, min(start + shard_size, len(dataframe)))
+            for start in range(0, len(dataframe), shard_size)]
+        targets: list[str] = [os.path.join(directory, f'shard-{shard}.arrow')
+                              for shard in range(len(bounds))]
+        logger.info("Transforming %s shards with %s workers", len(bounds),
+                    workers)
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                **logging_config.worker_pool_options()) as executor:
+            shard_counts: list[pd.Series] = merge_stages(executor.map(
+                partial(call_with_stages, transform_shard),
+                [source] * len(bounds), [start for start, _ in bounds],
+                [stop for _, stop in bounds], targets,
+                [date_format] * len(bounds)))
+        combined: pd.DataFrame = pd.concat(
+            [read_arrow(target) for target in targets], ignore_index=True)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    if make_counts is None:
+        make_counts = pd.concat(shard_counts).groupby(level=0).sum()
+        if settings.MAKE_MODEL:
+            make_counts = MakeClassificationModel.resolve() or \
+                MakeClassificationModel.resolve(make_counts)
+    return apply_steps(combined, [
+        step for step in transform_steps(make_counts)
+        if step[0] not in SHARD_STEPS])
@@ -0,0 +1,130 @@
+"""
+Pipeline script for Engineering module.
+This script runs the extract, transform and load of the chunks as
+ concurrent asyncio stages connected by bounded queues, so a chunk is
+ loaded while the next one is transformed and the one after is read.
+ A full queue blocks the previous stage, which bounds the chunks in memory.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterator, Optional
+
+import pandas as pd
+
+from core import logging_config
+from core.config import settings
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+ChunkQueue = asyncio.Queue[Optional[pd.DataFrame]]
+
+
+async def read_stage(
+        chunks: Iterator[pd.DataFrame], outbox: ChunkQueue,
+        executor: ThreadPoolExecutor) -> None:
+    """
+    Read the chunks in a thread and put them into the queue
+    :param chunks: Iterator of the raw chunks
+    :type chunks: Iterator[pd.DataFrame]
+    :param outbox: Queue of the raw chunks
+    :type outbox: ChunkQueue
+    :param executor: Thread pool for the blocking reads
+    :type executor: ThreadPoolExecutor
+    :return: None
+    :rtype: NoneType
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    while True:
+        chunk: Optional[pd.DataFrame] = await loop.run_in_executor(
+            executor, next, chunks, None)
+        await outbox.put(chunk)
+        if chunk is None:
+            return
+
+
+async def transform_stage(
+        transform: Callable[[pd.DataFrame], pd.DataFrame], inbox: ChunkQueue,
+        outbox: ChunkQueue, executor: ThreadPoolExecutor) -> None:
+    """
+    Transform the chunks of the queue in a thread and put the non-empty
+     results into the next queue
+    :param transform: Transformation of a raw chunk
+    :type transform: Callable[[pd.DataFrame], pd.DataFrame]
+    :param inbox: Queue of the raw chunks
+    :type inbox: ChunkQueue
+    :param outbox: Queue of the transformed chunks
+    :type outbox: ChunkQueue
+    :param executor: Thread pool for the CPU-bound transformation
+    :type executor: ThreadPoolExecutor
+    :return: None
+    :rtype: NoneType
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    while (chunk := await inbox.get()) is not None:
+        transformed_chunk: pd.DataFrame = await loop.run_in_executor(
+            executor, transform, chunk)
+        if len(transformed_chunk) > 0:
+            await outbox.put(transformed_chunk)
+    await outbox.put(None)
+
+
+async def load_stage(
+        load: Callable[[pd.DataFrame], Awaitable[bool]],
+        inbox: ChunkQueue) -> int:
+    """
+    Load the chunks of the queue into the database
+    :param load: Coroutine function that inserts a transformed chunk
+    :type load: Callable[[pd.DataFrame], Awaitable[bool]]
+    :param inbox: Queue of the transformed chunks
+    :type inbox: ChunkQueue
+    :return: Number of rows loaded
+    :rtype: int
+    """
+    rows_loaded: int = 0
+    while (chunk := await inbox.get()) is not None:
+        if await load(chunk):
+            rows_loaded += len(chunk)
+    return rows_loaded
+
+
+async def run_pipeline(
+        chunks: Iterator[pd.DataFrame],
+        transform: Callable[[pd.DataFrame], pd.DataFrame],
+        load: Callable[[pd.DataFrame], Awaitable[bool]],
+        queue_size: int = settings.QUEUE_SIZE) -> int:
+    """
+    Run the read, transform and load stages concurrently over the chunks.
+     If a stage fails, the other stages are cancelled and the error raised
+    :param chunks: Iterator of the raw chunks
+    :type chunks: Iterator[pd.DataFrame]
+    :param transform: Transformation of a raw chunk
+    :type transform: Callable[[pd.DataFrame], pd.DataFrame]
+    :param load: Coroutine function that inserts a transformed chunk
+    :type load: Callable[[pd.DataFrame], Awaitable[bool]]
+    :param queue_size: Maximum number of chunks waiting between two stages
+    :type queue_size: int
+    :return: Number of rows loaded
+    :rtype: int
+    """
+    raw_chunks: ChunkQueue = asyncio.Queue(maxsize=queue_size)
+    transformed_chunks: ChunkQueue = asyncio.Queue(maxsize=queue_size)
+    with ThreadPoolExecutor(max_workers=1) as read_executor, \
+            ThreadPoolExecutor(max_workers=1) as transform_executor:
+        tasks: list[asyncio.Task] = [
+            asyncio.create_task(read_stage(
+                chunks, raw_chunks, read_executor)),
+            asyncio.create_task(transform_stage(
+                transform, raw_chunks, transformed_chunks,
+                transform_executor)),
+            asyncio.create_task(load_stage(load, transformed_chunks))]
+        try:
+            *_, rows_loaded = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    logger.info("Pipeline loaded %s rows with queues of %s chunks",
+                rows_loaded, queue_size)
+    return rows_loaded
@@ -3,17 +3,25 @@ Transformation script for Engineering module
 """
 import logging
 import re
-from typing import Any
+from functools import partial
+from typing import Any, Callable
 
 import numpy as np
 import pandas as pd
-from numpy import uint16, uint8, float16
+from numpy import uint8, uint16, float16
+from pandas.api.types import is_datetime64_any_dtype
 
 from core import logging_config
 from core.config import settings
+from core.decorators import profile_stage
+from engineering.frequency import MakeClassificationModel, \
+    MakeFrequencies, MakeFrequencySketch, frequency_bin_edges
 
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
+DATE_FORMATS: list[str] = [
+    '%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M', '%m/%d/%Y', '%d/%m/%Y',
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d']
 
 
 def cast_column(
@@ -30,7 +38,8 @@ def cast_column(
     :return: Converted dataframe
     :rtype: pd.DataFrame
     """
-    dataframe.loc[:, column] = dataframe[column].astype(d_type)
+    if dataframe[column].dtype != d_type:
+        dataframe[column] = dataframe[column].astype(d_type)
     return dataframe
 
 
@@ -45,89 +54,136 @@ def remove_missing_values(
     :return: Cleaned dataframe
     :rtype: pd.DataFrame
     """
-    missing_values: pd.Series = (dataframe.isnull().sum())
-    if len(missing_values) > 0:
+    missing_mask: pd.DataFrame = dataframe.isnull()
+    missing_values: pd.Series = missing_mask.sum()
+    if missing_values.any():
         logger.warning("FOUND MISSING VALUES")
         print(missing_values[missing_values > 0])
         print(missing_values[missing_values > 0] / dataframe.shape[0] * 100)
-        dataframe = dataframe.copy()
-        dataframe = dataframe[~dataframe['Purchase Date'].isnull()].dropna(
-            how=how_to_drop).reset_index(drop=True)
+        # Single mask for the date and the dropna rule, so the rows are
+        # copied only once
+        drop_mask: pd.Series = missing_mask.any(axis=1) \
+            if how_to_drop == 'any' else missing_mask.all(axis=1)
+        if 'Purchase Date' in missing_mask:
+            drop_mask |= missing_mask['Purchase Date']
+        # take does not flag the result as a copy of the original frame
+        dataframe = dataframe.take(np.flatnonzero(~drop_mask.to_numpy()))
+        dataframe.reset_index(drop=True, inplace=True)
     return dataframe
 
 
-def convert_date_column(
-        dataframe: pd.DataFrame, date_column: str = "Purchase Date",
-        date_format: str = "%Y-%m-%d"
-) -> pd.DataFrame:
+def detect_date_format(
+        dates: pd.Series | pd.Index, sample_size: int = 1000) -> str:
     """
-    Convert a date column into a standard date format
-    :param dataframe: DataFrame to convert its column
-    :type dataframe: pd.DataFrame
-    :param date_column: Name of dataframe date column to convert
-    :type date_column: str
-    :param date_format: Date format to use
-    :type date_format: str
-    :return: Converted dataframe with standard date format
-    :rtype: pd.DataFrame
+    Detect the format of the date strings from a sample of them. Formats
+     are tried in order, so month first wins when the sample is ambiguous
+    :param dates: Date strings to inspect
+    :type dates: pd.Series | pd.Index
+    :param sample_size: Maximum number of values to try the formats on
+    :type sample_size: int
+    :return: Format that parses the whole sample
+    :rtype: str
     """
-    dataframe.loc[:, date_column] = pd.to_datetime(
-        dataframe[date_column], format=date_format).dt.normalize()
-    return dataframe
+    sample: pd.Series = pd.Series(dates).dropna().astype(str).str.strip()
+    if len(sample) > sample_size:
+        sample = sample.sample(sample_size, random_state=0)
+    for date_format in DATE_FORMATS:
+        if pd.to_datetime(
+                sample, format=date_format, errors='coerce').notna().all():
+            return date_format
+    raise ValueError(f"Unknown date format: {sample.iloc[0]}")
 
 
-def create_sale_year(
-        dataframe: pd.DataFrame, new_column: str = 'Purchase Year',
-        date_column: str = 'Purchase Date') -> pd.DataFrame:
+def parse_date_column(
+        dataframe: pd.DataFrame, date_column: str = 'Purchase Date',
+        year_column: str | None = 'Purchase Year',
+        date_format: str | None = None
+) -> pd.DataFrame:
     """
-    Create a new column to store the year of the sale
+    Parse a date column at day precision and create the column of its
+     year. Each distinct date string is parsed once with an explicit
+     format and broadcast to the rows through its code
     :param dataframe: Dataframe to manipulate
     :type dataframe: pd.DataFrame
-    :param new_column: New column for year of the sale
-    :type new_column: str
-    :param date_column: Column of the sale date
+    :param date_column: Name of the date column to parse
     :type date_column: str
-    :return: Updated Dataframe containing the year of the sale
+    :param year_column: New column for the year of the date. Not created
+     if None
+    :type year_column: str
+    :param date_format: Format of the date strings. Detected if not given
+    :type date_format: str
+    :return: Updated Dataframe with parsed dates and their year
     :rtype: pd.DataFrame
     """
-    dataframe.loc[:, new_column] = dataframe[date_column].dt.year
-    # dataframe[new_column] = dataframe[new_column].astype(uint16)
+    dates: pd.Series = dataframe[date_column]
+    if is_datetime64_any_dtype(dates):
+        dataframe[date_column] = dates.dt.normalize()
+        if year_column:
+            dataframe[year_column] = dates.dt.year.astype(uint16)
+        return dataframe
+    if isinstance(dates.dtype, pd.CategoricalDtype):
+        codes: np.ndarray = dates.cat.codes.to_numpy()
+        uniques: pd.Index = dates.cat.categories
+    else:
+        codes, uniques = pd.factorize(dates)
+    uniques = uniques.astype(str).str.strip()
+    parsed: pd.DatetimeIndex = pd.DatetimeIndex(pd.to_datetime(
+        uniques, format=date_format or detect_date_format(uniques)
+    )).normalize()
+    # Missing dates have code -1, which picks the trailing NaT
+    dataframe[date_column] = np.append(
+        parsed.to_numpy(), np.datetime64('NaT', 'ns'))[codes]
+    if year_column:
+        dataframe[year_column] = np.append(
+            parsed.year.to_numpy(), 0).astype(uint16)[codes]
     return dataframe
 
 
 def create_categorical_model(
-        dataframe: pd.DataFrame, model_column: str = 'Make') -> pd.DataFrame:
+        dataframe: pd.DataFrame, model_column: str = 'Make',
+        make_counts: MakeFrequencies | None = None
+) -> pd.DataFrame:
     """
     Create a new column to store the categorical model of the cars as
-     numerical values
+     numerical values. The make is kept, as it is part of the natural key
+     of a sale
     :param dataframe: Dataframe to manipulate
     :type dataframe: pd.DataFrame
     :param model_column: Dataframe column to store the categorical model
     :type model_column: str
+    :param make_counts: Pre-computed number of rows for each make over the
+     whole dataset, a sketch of them for approximate bins or a fitted
+     model. If not provided, the persisted model is reused when MAKE_MODEL
+     is set, and otherwise they are counted from the dataframe, which
+     fits the first model when MAKE_MODEL is set
+    :type make_counts: MakeFrequencies
     :return: Updated Dataframe containing the new numerical columns
     :rtype: pd.DataFrame
     """
-    dataframe = dataframe.copy()
-    make_counts = dataframe[model_column].value_counts()
-    dataframe['Make_Frequency'] = dataframe[model_column].map(
-        make_counts).astype(uint16)
+    if make_counts is None and settings.MAKE_MODEL:
+        make_counts = MakeClassificationModel.resolve() or \
+            MakeClassificationModel.resolve(
+                dataframe[model_column].value_counts())
+    if make_counts is None:
+        make_counts = dataframe[model_column].value_counts()
     if not settings.NUM_BINS:
         raise AttributeError("Number of bins is not set.")
     if not settings.LABELS:
         raise AttributeError("Labels is not set.")
-    quantiles: list[float16] = np.linspace(
-        0.00, 1.00, uint8(settings.NUM_BINS) + 1, dtype=float16)
-    dataframe['Make Classification'] = pd.qcut(
-        dataframe['Make_Frequency'], q=quantiles,
-        labels=settings.LABELS).astype("category")
-    dataframe = dataframe.drop(
-        [model_column, 'Make_Frequency'], axis=1)
-    # Other option could be use Pandas Dummies or LabelTransformer
-    # from Scikit-Learn
-    car_model_map: dict[str, uint8] = {
-        settings.LABELS[i]: i + 1 for i in range(len(settings.LABELS))}
-    dataframe.loc[:, 'Make Classification'] = dataframe[
-        'Make Classification'].replace(car_model_map).astype(uint8)
+    if len(settings.LABELS) != settings.NUM_BINS:
+        raise ValueError("Labels must match the number of bins.")
+    if isinstance(make_counts,
+                  (MakeFrequencySketch, MakeClassificationModel)):
+        dataframe['Make Classification'] = make_counts.classify(
+            dataframe[model_column])
+        return dataframe
+    frequencies: np.ndarray = np.asarray(dataframe[model_column].map(
+        make_counts), dtype=np.float64)
+    # Bin number i + 1 is the position of settings.LABELS[i], so the labels
+    # are mapped straight to their numerical values
+    dataframe['Make Classification'] = (pd.cut(
+        frequencies, bins=frequency_bin_edges(make_counts), labels=False,
+        include_lowest=True) + 1).astype(uint8)
     return dataframe
 
 
@@ -170,3 +226,51 @@ def strip_columns(dataframe: pd.DataFrame) -> pd.DataFrame:
         if dataframe[column].dtype == object:
             dataframe[column] = dataframe[column].str.strip()
     return dataframe
+
+
+TransformStep = tuple[str, Callable[[pd.DataFrame], pd.DataFrame]]
+
+
+def transform_steps(
+        make_counts: MakeFrequencies | None = None,
+        date_format: str | None = None
+) -> list[TransformStep]:
+    """
+    Declarative list of the transformation steps in order of execution
+    :param make_counts: Pre-computed make frequencies for the whole dataset
+    :type make_counts: MakeFrequencies
+    :param date_format: Format of the purchase dates. Detected if not given
+    :type date_format: str
+    :return: Named transformation steps
+    :rtype: list[TransformStep]
+    """
+    return [
+        ('strip_columns', strip_columns),
+        ('cast_gender', cast_column),
+        ('remove_missing_values', remove_missing_values),
+        ('parse_date_column',
+         partial(parse_date_column, date_format=date_format)),
+        ('create_categorical_model',
+         partial(create_categorical_model, make_counts=make_counts)),
+        ('convert_column_names', convert_column_names),
+        ('cast_discount',
+         partial(cast_column, column='discount', d_type=float16)),
+        ('cast_buyer_age',
+         partial(cast_column, column='buyer_age', d_type=uint8))]
+
+
+def apply_steps(dataframe: pd.DataFrame, steps: list[TransformStep]
+                ) -> pd.DataFrame:
+    """
+    Apply the transformation steps recording the time, memory, rows and
+     bytes of each one as a transform stage of the run report
+    :param dataframe: Dataframe to transform
+    :type dataframe: pd.DataFrame
+    :param steps: Named transformation steps
+    :type steps: list[TransformStep]
+    :return: Transformed dataframe
+    :rtype: pd.DataFrame
+    """
+    for name, step in steps:
+        dataframe = profile_stage(f'transform.{name}')(step)(dataframe)
+    return dataframe
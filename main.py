@@ -1,38 +1,137 @@
 """
-Main script for ETL process
+Main script for ETL process.
+Each subcommand imports only the modules it needs, so the heavy ones
+ (pandas, SQLAlchemy, asyncpg, matplotlib, seaborn) are loaded on demand.
 """
-import asyncio
-import concurrent.futures
+# pylint: disable=import-outside-toplevel
+import argparse
 import logging
+import sys
+from typing import Callable, Coroutine, Optional, Sequence
 
-import pandas as pd
+from schema.load_engine import LoadEngine
 
-from analysis import numerical_eda, visualize_data
-from core import logging_config
-from core.persistence_manager import PersistenceManager
-from db.db import init_db
-from engineering import extract_data, transform_data, load_to_db
-
-logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
+RAW_SNAPSHOT: str = 'raw_df'
 
 
-async def main() -> None:
+async def main(command: str = 'run') -> None:
     """
     Main function to execute
+    :param command: Subcommand to run
+    :type command: str
     :return: None
     :rtype: NoneType
     """
+    import tracemalloc
+    from core.config import settings
+    from core.metrics import run_report
     logger.info("Running main method")
-    dataframe: pd.Dataframe = extract_data()
-    numerical_eda(dataframe)
+    if settings.TRACE_MEMORY:
+        tracemalloc.start()
+    try:
+        await COMMANDS[command]()
+    finally:
+        run_report.save()
+
+
+async def extract_command() -> None:
+    """
+    Extract the raw files into a memory-mapped snapshot
+    :return: None
+    :rtype: NoneType
+    """
+    from core.config import settings
+    from core.persistence_manager import PersistenceManager
+    from engineering import extract_data
+    PersistenceManager.save_snapshot(
+        extract_data(settings.RAW_FILES), name=RAW_SNAPSHOT)
+    logger.info("Raw data extracted")
+
+
+async def transform_command() -> None:
+    """
+    Transform the extracted snapshot and save the processed dataframe
+    :return: None
+    :rtype: NoneType
+    """
+    from core.persistence_manager import PersistenceManager
+    from engineering import transform_data
+    PersistenceManager.save_to_pickle(transform_data(
+        PersistenceManager.load_snapshot(name=RAW_SNAPSHOT)))
+    logger.info("Data transformed")
+
+
+async def load_command() -> None:
+    """
+    Load the processed dataframe into the database
+    :return: None
+    :rtype: NoneType
+    """
+    from core.persistence_manager import PersistenceManager, DataType
+    from db.db import init_db
+    from engineering import load_to_db
+    await init_db()
+    if await load_to_db(
+            PersistenceManager.load_from_pickle(DataType.PROCESSED)):
+        logger.info("Data loaded")
+
+
+async def eda_command() -> None:
+    """
+    Profile the processed dataframe and render its figures
+    :return: None
+    :rtype: NoneType
+    """
+    from analysis import numerical_eda, visualize_data, render_figures
+    from core.config import settings
+    from core.persistence_manager import PersistenceManager, DataType
+    dataframe = PersistenceManager.load_from_pickle(DataType.PROCESSED)
+    numerical_eda(dataframe, 'processed')
+    if settings.HEADLESS:
+        await render_figures(dataframe)
+    else:
+        visualize_data(dataframe)
+
+
+async def run_pipeline() -> None:
+    """
+    Run the ETL pipeline in the configured mode
+    :return: None
+    :rtype: NoneType
+    """
+    import asyncio
+    import pandas as pd
+    from analysis import numerical_eda, visualize_data, render_figures
+    from core.config import settings
+    from core.persistence_manager import PersistenceManager
+    from db.db import init_db
+    from engineering import extract_data, transform_data, load_to_db, \
+        stream_to_db, incremental_load
+    if settings.STREAMING:
+        await init_db()
+        rows_loaded: int = await stream_to_db(settings.RAW_FILES)
+        logger.info("Streaming ETL pipeline loaded %s rows", rows_loaded)
+        return
+    if settings.INCREMENTAL:
+        await init_db()
+        rows_loaded: int = await incremental_load(settings.RAW_FILES)
+        logger.info("Incremental ETL pipeline loaded %s rows", rows_loaded)
+        return
+    dataframe: pd.Dataframe = extract_data(settings.RAW_FILES)
+    numerical_eda(dataframe, 'raw')
     transformed_df = transform_data(dataframe)
-    visualize_data(transformed_df)
+    if not settings.HEADLESS:
+        visualize_data(transformed_df)
     PersistenceManager.save_to_pickle(transformed_df)
     await init_db()
-    numerical_eda(transformed_df)  # Check statistics for final df
+    numerical_eda(transformed_df, 'processed')  # Check statistics for final df
+    stages: list[Coroutine] = [load_to_db(transformed_df)]
+    if settings.HEADLESS:
+        stages.append(render_figures(transformed_df))
     try:
-        loaded: bool = await load_to_db(transformed_df)
+        loaded: bool
+        loaded, *_ = await asyncio.gather(*stages)
     except Exception as exc:
         logger.error(exc)
         raise exc
@@ -41,10 +140,99 @@ async def main() -> None:
     logger.info("ETL pipeline completed successfully")
 
 
+COMMANDS: dict[str, Callable[[], Coroutine]] = {
+    'extract': extract_command, 'transform': transform_command,
+    'load': load_command, 'eda': eda_command, 'run': run_pipeline}
+
+
+def parse_arguments(
+        arguments: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the ETL pipeline. The run
+     subcommand is used when none is given
+    :param arguments: Arguments to parse. Command line ones by default
+    :type arguments: Sequence[str]
+    :return: Parsed arguments
+    :rtype: argparse.Namespace
+    """
+    arguments = list(sys.argv[1:] if arguments is None else arguments)
+    if not arguments or arguments[0] not in [
+            *COMMANDS, '-h', '--help']:
+        arguments.insert(0, 'run')
+    common: argparse.ArgumentParser = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        '--trace-memory', dest='TRACE_MEMORY', action='store_true',
+        default=None, help="Trace the memory peak of every stage")
+    files: argparse.ArgumentParser = argparse.ArgumentParser(add_help=False)
+    files.add_argument(
+        '--files', dest='RAW_FILES',
+        help="Raw filename or glob pattern in data/raw")
+    engine: argparse.ArgumentParser = argparse.ArgumentParser(add_help=False)
+    engine.add_argument(
+        '--load-engine', dest='LOAD_ENGINE', choices=[
+            load_engine.value for load_engine in LoadEngine],
+        help="Engine used to insert the rows")
+    headless: argparse.ArgumentParser = argparse.ArgumentParser(
+        add_help=False)
+    headless.add_argument(
+        '--headless', dest='HEADLESS', action='store_true', default=None,
+        help="Render the figures in the background without showing them")
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Extract, transform and load the car sales data. "
+                    "Options not given keep their .env value")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser(
+        'extract', parents=[common, files],
+        help="Extract the raw files into a snapshot")
+    subparsers.add_parser(
+        'transform', parents=[common],
+        help="Transform the extracted snapshot into the processed data")
+    subparsers.add_parser(
+        'load', parents=[common, engine],
+        help="Load the processed data into the database")
+    subparsers.add_parser(
+        'eda', parents=[common, headless],
+        help="Profile and plot the processed data")
+    run: argparse.ArgumentParser = subparsers.add_parser(
+        'run', parents=[common, files, engine, headless],
+        help="Run the whole pipeline")
+    mode = run.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--streaming', dest='STREAMING', action='store_true', default=None,
+        help="Extract, transform and load chunk by chunk in overlapping "
+             "stages")
+    mode.add_argument(
+        '--incremental', dest='INCREMENTAL', action='store_true',
+        default=None,
+        help="Load only the rows after the watermark of the previous run")
+    run.add_argument(
+        '--queue-size', dest='QUEUE_SIZE', type=int,
+        help="Maximum chunks waiting between two streaming stages")
+    return parser.parse_args(arguments)
+
+
+def cli(arguments: Optional[Sequence[str]] = None) -> int:
+    """
+    Command line entry point that overrides the settings with the given
+     options and runs the subcommand
+    :param arguments: Arguments to parse. Command line ones by default
+    :type arguments: Sequence[str]
+    :return: Exit status
+    :rtype: int
+    """
+    options: dict = vars(parse_arguments(arguments))
+    command: str = options.pop('command')
+    import asyncio
+    from core import logging_config
+    from core.config import settings
+    logging_config.setup_logging()
+    for name, value in options.items():
+        if value is not None:
+            setattr(settings, name, value)
+    asyncio.run(main(command))
+    return 0
+
+
 if __name__ == '__main__':
-    logger.info("First log message")
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        logger.warning("Executing Thread Pool")
-        executor.submit(asyncio.run, main())
-        logger.warning("Executor submitted")
-    logger.info("End of the program execution")
+    raise SystemExit(cli())
@@ -6,12 +6,35 @@ from typing import Optional
 
 from numpy import uint8, uint16
 from sqlalchemy import Column, Integer, String, Enum, Boolean, text, Float, \
-    CheckConstraint, SmallInteger
+    CheckConstraint, SmallInteger, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 
 from core.config import settings
 from db.base import Base
 from schema.gender import Gender
+from schema.table_layout import TableLayout
+
+PARTITIONED: bool = TableLayout(settings.CAR_LAYOUT) == TableLayout.PARTITIONED
+NATURAL_KEY: str = 'uq_car_sale'
+
+
+def partitioned_table_args() -> tuple:
+    """
+    Table arguments of the partitioned layout: range partitions by purchase
+     year, a BRIN index on the purchase date and a B-tree index for the
+     filters by year and make classification. The BRIN index is small and
+     cheap to maintain, but it only skips blocks when the sales are stored
+     in date order. The raw files are loaded in file order, which is not
+     sorted by date, so its block ranges span most dates of their year
+    :return: Indexes and partitioning options of the table
+    :rtype: tuple
+    """
+    return (
+        Index('ix_car_purchase_date', 'purchase_date',
+              postgresql_using='brin'),
+        Index('ix_car_purchase_year_make_classification', 'purchase_year',
+              'make_classification'),
+        {'postgresql_partition_by': 'RANGE (purchase_year)'})
 
 
 class Car(Base):
@@ -19,9 +42,17 @@ class Car(Base):
     Car class as a table model
     """
     __tablename__ = 'car'
+    # Natural key of a sale used to skip duplicates on incremental loads.
+    # Unique keys of a partitioned table include the purchase year
+    __table_args__ = (
+        UniqueConstraint(
+            'purchase_date', 'purchase_year', 'make', 'buyer_gender',
+            'color', 'new_car', 'buyer_age', 'discount', 'sale_price',
+            name=NATURAL_KEY),
+        *(partitioned_table_args() if PARTITIONED else ()))
 
     id: int = Column(
-        Integer, index=True, unique=True, nullable=False, primary_key=True,
+        Integer, nullable=False, primary_key=True, autoincrement=True,
         comment='ID of the car sale')
     buyer_gender: Optional[Gender] = Column(
         Enum(Gender), nullable=True, comment='Gender of the Buyer')
@@ -44,7 +75,12 @@ class Car(Base):
     purchase_year: uint16 = Column(
         SmallInteger, CheckConstraint(
             f'purchase_year >= 0 and purchase_year <= {settings.CURRENT_YEAR}'
-        ), nullable=False, comment='Year the car was purchased')
+        ), nullable=False, primary_key=PARTITIONED,
+        comment='Year the car was purchased')
+    make: Optional[str] = Column(
+        String(50), nullable=True,
+        comment='Make brand of the car. Missing for the sales loaded before '
+                'it was stored')
     make_classification: str = Column(
         SmallInteger, CheckConstraint('make_classification >= 1'),
         nullable=False, comment='Make brand of the car categorized by numbers')
@@ -0,0 +1,35 @@
+"""
+Watermark model for the Table
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Integer, String, text
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+
+from core.config import settings
+from db.base import Base
+
+
+class Watermark(Base):
+    """
+    Watermark class as a table model to track incremental loads
+    """
+    __tablename__ = 'watermark'
+
+    source_file: str = Column(
+        String(255), nullable=False, primary_key=True,
+        comment='Name of the raw source file')
+    content_hash: str = Column(
+        String(64), nullable=False,
+        comment='SHA-256 hash of the source file content')
+    max_purchase_date: Optional[datetime] = Column(
+        TIMESTAMP(timezone=False, precision=settings.TS_PRECISION),
+        nullable=True, comment='Latest purchase date loaded from the file')
+    rows_loaded: int = Column(
+        Integer, nullable=False, default=0, server_default=text("0"),
+        comment='Number of rows loaded in the last run')
+    updated_at: datetime = Column(
+        TIMESTAMP(timezone=False, precision=settings.TS_PRECISION),
+        nullable=False, server_default=text("now()"),
+        comment='Time the watermark was updated')
@@ -0,0 +1,14 @@
+"""
+Load Engine schema
+"""
+from enum import Enum
+
+
+class LoadEngine(str, Enum):
+    """
+    Load Engine class that inherits from built-in Enum
+    """
+    ORM: str = 'orm'
+    COPY: str = 'copy'
+    PARALLEL: str = 'parallel'
+    UPSERT: str = 'upsert'
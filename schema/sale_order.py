@@ -0,0 +1,12 @@
+"""
+Sale Order schema
+"""
+from enum import Enum
+
+
+class SaleOrder(str, Enum):
+    """
+    Sale Order class that inherits from built-in Enum
+    """
+    ID: str = 'id'
+    PURCHASE_DATE: str = 'purchase_date'
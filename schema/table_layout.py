@@ -0,0 +1,12 @@
+"""
+Table Layout schema
+"""
+from enum import Enum
+
+
+class TableLayout(str, Enum):
+    """
+    Table Layout class that inherits from built-in Enum
+    """
+    HEAP: str = 'heap'
+    PARTITIONED: str = 'partitioned'
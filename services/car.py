@@ -1,15 +1,27 @@
 """
 Car service script
 """
+import asyncio
 import logging
-from typing import Optional
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Optional, Sequence
+from weakref import WeakKeyDictionary
 
+import numpy as np
+import pandas as pd
+from sqlalchemy import DateTime, Enum as SAEnum, Select, any_, bindparam, \
+    select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import ArgumentError, PendingRollbackError, \
     MultipleResultsFound, IdentifierError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
 from core import logging_config
+from core.config import settings
+from core.object_cache import CacheBackend, CacheStats, LRUCache
 from models.car import Car
+from schema.sale_order import SaleOrder
 
 logging_config.setup_logging()
 logger: logging.Logger = logging.getLogger(__name__)
@@ -34,16 +46,109 @@ class CarService:
         """
         car: Car = None
         try:
-            car = await session.get(Car, sale_id)
+            # Filter by id since the primary key includes the purchase year
+            # when the table is partitioned
+            car = (await session.execute(
+                select(Car).where(Car.id == sale_id))).scalar_one_or_none()
         except MultipleResultsFound as mrf_exc:
             logger.error(mrf_exc)
         except ArgumentError as a_exc:
             logger.error(a_exc)
         except IdentifierError as i_exc:
             logger.error(i_exc)
-        logger.info("FOUND Car sale!")
+        logger.debug("FOUND Car sale!")
         return car
 
+    @staticmethod
+    async def read_sales_by_ids(
+            sale_ids: Sequence[int], session: AsyncSession) -> list[Car]:
+        """
+        Read many car sales in one query. The ids are sent as a single
+         array parameter, so the statement is the same for any number of
+         ids
+        :param sale_ids: Unique identifiers of the car sales
+        :type sale_ids: Sequence[int]
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :return: Car sales found, ordered by id
+        :rtype: list[Car]
+        """
+        if not sale_ids:
+            return []
+        statement: Select = select(Car).where(Car.id == any_(bindparam(
+            'sale_ids', list(sale_ids), type_=ARRAY(Car.id.type)))
+        ).order_by(Car.id)
+        cars: list[Car] = []
+        try:
+            cars = list((await session.execute(statement)).scalars().all())
+        except ArgumentError as a_exc:
+            logger.error(a_exc)
+        except IdentifierError as i_exc:
+            logger.error(i_exc)
+        logger.debug("FOUND %s of %s Car sales", len(cars), len(sale_ids))
+        return cars
+
+    @staticmethod
+    async def read_sales_page(
+            session: AsyncSession, order_by: SaleOrder = SaleOrder.ID,
+            after: Optional[Car] = None, limit: int = settings.BATCH_SIZE
+    ) -> list[Car]:
+        """
+        Read a page of car sales with keyset pagination, so no page skips
+         the previous rows. By id, every page is a seek on the primary key.
+         By purchase date there is no index on (purchase_date, id), so each
+         page scans the rows after the key and sorts them for the limit
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :param order_by: Column the sales are ordered by. Ties of the
+         purchase date are ordered by id
+        :type order_by: SaleOrder
+        :param after: Last car sale of the previous page. First page if None
+        :type after: Car
+        :param limit: Maximum number of car sales of the page
+        :type limit: int
+        :return: Car sales of the page
+        :rtype: list[Car]
+        """
+        statement: Select = select(Car).limit(limit)
+        if order_by == SaleOrder.PURCHASE_DATE:
+            statement = statement.order_by(Car.purchase_date, Car.id)
+            if after is not None:
+                statement = statement.where(
+                    tuple_(Car.purchase_date, Car.id) >
+                    tuple_(after.purchase_date, after.id))
+        else:
+            statement = statement.order_by(Car.id)
+            if after is not None:
+                statement = statement.where(Car.id > after.id)
+        return list((await session.execute(statement)).scalars().all())
+
+    @staticmethod
+    async def stream_sales(
+            session: AsyncSession, batch_size: int = settings.BATCH_SIZE,
+            columns: Optional[list[str]] = None
+    ) -> AsyncIterator[pd.DataFrame]:
+        """
+        Stream the car sales through a server-side cursor as dataframe
+         batches, so only one batch of the result set is in memory
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :param batch_size: Number of rows per batch
+        :type batch_size: int
+        :param columns: Columns to read. All of them by default
+        :type columns: list[str]
+        :return: Async iterator of dataframes with the car sales
+        :rtype: AsyncIterator[pd.DataFrame]
+        """
+        statement: Select = select(*(
+            Car.__table__.columns[column] for column in columns
+        ) if columns else Car.__table__.columns).order_by(Car.id)
+        result: AsyncResult = await session.stream(
+            statement.execution_options(yield_per=batch_size))
+        keys: list[str] = list(result.keys())
+        async for rows in result.partitions(batch_size):
+            yield pd.DataFrame.from_records(rows, columns=keys)
+
     @staticmethod
     async def insert_car_sale(car: Car, session: AsyncSession) -> bool:
         """
@@ -67,7 +172,7 @@ class CarService:
                 await session.rollback()
                 return False
             await session.commit()
-            logger.info("Row inserted successfully")
+            logger.debug("Row inserted successfully")
             return True
 
     @staticmethod
@@ -96,3 +201,276 @@ class CarService:
             await session.commit()
             logger.info("Rows inserted successfully")
             return True
+
+
+class CarLoader:
+    """
+    Car Loader class.
+    Coalesces the reads by id issued within one event loop iteration into
+     a single query, like a DataLoader. Use one loader per session.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session: AsyncSession = session
+        self.pending: dict[int, list[asyncio.Future]] = {}
+        self.lock: asyncio.Lock = asyncio.Lock()
+        self.tasks: set[asyncio.Task] = set()
+
+    async def load(self, sale_id: int) -> Optional[Car]:
+        """
+        Read a car sale by id together with the other reads of the same
+         event loop iteration
+        :param sale_id: Unique identifier of the car sale
+        :type sale_id: int
+        :return: Car sale information, None if not found
+        :rtype: Optional[Car]
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        if not self.pending:
+            # Runs after the callbacks already scheduled in this iteration
+            loop.call_soon(self.schedule_dispatch)
+        self.pending.setdefault(sale_id, []).append(future)
+        return await future
+
+    def schedule_dispatch(self) -> None:
+        """
+        Start the query of the pending car sales, keeping a reference to
+         its task until it finishes
+        :return: None
+        :rtype: NoneType
+        """
+        task: asyncio.Task = asyncio.get_running_loop().create_task(
+            self.dispatch())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def load_many(self, sale_ids: Sequence[int]) -> list[Optional[Car]]:
+        """
+        Read car sales by id in a single query
+        :param sale_ids: Unique identifiers of the car sales
+        :type sale_ids: Sequence[int]
+        :return: Car sales in the order of the ids, None if not found
+        :rtype: list[Optional[Car]]
+        """
+        return list(await asyncio.gather(
+            *(self.load(sale_id) for sale_id in sale_ids)))
+
+    async def dispatch(self) -> None:
+        """
+        Read the pending car sales in one query and resolve their futures
+        :return: None
+        :rtype: NoneType
+        """
+        pending: dict[int, list[asyncio.Future]] = self.pending
+        self.pending = {}
+        try:
+            # A session runs one query at a time
+            async with self.lock:
+                cars: list[Car] = await CarService.read_sales_by_ids(
+                    list(pending), self.session)
+        except Exception as exc:  # pylint: disable=broad-except
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+        cars_by_id: dict[int, Car] = {car.id: car for car in cars}
+        for sale_id, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(cars_by_id.get(sale_id))
+
+
+class CachedCarService:
+    """
+    Cached Car Service class.
+    Read-through cache in front of the car services. Single inserts write
+     the new sale through to the cache and bulk inserts invalidate their
+     ids. Misses are not cached, so new sales are found once inserted.
+     The cache holds plain records of the columns, and every hit builds a
+     new Car, so callers never share an instance. Misses go through a
+     CarLoader per session, so concurrent misses share a single query.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None) -> None:
+        self.backend: CacheBackend = backend or LRUCache()
+        self.loaders: WeakKeyDictionary[AsyncSession, CarLoader] = \
+            WeakKeyDictionary()
+
+    def loader(self, session: AsyncSession) -> CarLoader:
+        """
+        Loader of the reads by id of a session, created on first use and
+         dropped with the session
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :return: Loader of the session
+        :rtype: CarLoader
+        """
+        if session not in self.loaders:
+            self.loaders[session] = CarLoader(session)
+        return self.loaders[session]
+
+    @staticmethod
+    def cache_key(sale_id: int) -> str:
+        """
+        Cache key of a car sale
+        :param sale_id: Unique identifier of the car sale
+        :type sale_id: int
+        :return: Key of the car sale in the cache
+        :rtype: str
+        """
+        return f'car:{sale_id}'
+
+    @staticmethod
+    def to_record(car: Car) -> dict[str, Any]:
+        """
+        Plain record of the columns of a car sale, with JSON values
+        :param car: Car object based on table model
+        :type car: Car
+        :return: Values of the columns by name
+        :rtype: dict[str, Any]
+        """
+        record: dict[str, Any] = {}
+        for column in Car.__table__.columns:
+            value: Any = getattr(car, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, Enum):
+                value = value.value
+            elif isinstance(value, np.generic):
+                value = value.item()
+            record[column.key] = value
+        return record
+
+    @staticmethod
+    def from_record(record: dict[str, Any]) -> Car:
+        """
+        Build a new car sale from its cached record
+        :param record: Values of the columns by name
+        :type record: dict[str, Any]
+        :return: Car object based on table model
+        :rtype: Car
+        """
+        values: dict[str, Any] = dict(record)
+        for column in Car.__table__.columns:
+            value: Any = values.get(column.key)
+            if value is None:
+                continue
+            if isinstance(column.type, DateTime):
+                values[column.key] = datetime.fromisoformat(value)
+            elif isinstance(column.type, SAEnum):
+                values[column.key] = column.type.enum_class(value)
+        return Car(**values)
+
+    async def cache_sale(self, car: Car) -> None:
+        """
+        Store the record of a car sale in the cache
+        :param car: Car object based on table model
+        :type car: Car
+        :return: None
+        :rtype: NoneType
+        """
+        await self.backend.set(self.cache_key(car.id), self.to_record(car))
+
+    async def read_sale_by_id(
+            self, sale_id: int, session: AsyncSession) -> Optional[Car]:
+        """
+        Read car sale information from the cache or else from table
+        :param sale_id: Unique identifier of the car sale
+        :type sale_id: int
+        :param session: Async Session for Database, used on a cache miss
+        :type session: AsyncSession
+        :return: Car sale information
+        :rtype: Car
+        """
+        record: Optional[dict] = await self.backend.get(
+            self.cache_key(sale_id))
+        if record is not None:
+            return self.from_record(record)
+        car: Optional[Car] = await self.loader(session).load(sale_id)
+        if car is not None:
+            await self.cache_sale(car)
+        return car
+
+    async def read_sales_by_ids(
+            self, sale_ids: Sequence[int], session: AsyncSession
+    ) -> list[Car]:
+        """
+        Read many car sales from the cache, and the missing ones from table
+         in one query
+        :param sale_ids: Unique identifiers of the car sales
+        :type sale_ids: Sequence[int]
+        :param session: Async Session for Database, used on cache misses
+        :type session: AsyncSession
+        :return: Car sales found, ordered by id
+        :rtype: list[Car]
+        """
+        cars: dict[int, Car] = {}
+        missing: list[int] = []
+        for sale_id in dict.fromkeys(sale_ids):
+            record: Optional[dict] = await self.backend.get(
+                self.cache_key(sale_id))
+            if record is None:
+                missing.append(sale_id)
+            else:
+                cars[sale_id] = self.from_record(record)
+        for car in await self.loader(session).load_many(missing):
+            if car is not None:
+                await self.cache_sale(car)
+                cars[car.id] = car
+        return [cars[sale_id] for sale_id in sorted(cars)]
+
+    async def insert_car_sale(self, car: Car, session: AsyncSession) -> bool:
+        """
+        Insert a new car sale into the table and write it through to the
+         cache
+        :param car: Car object based on table model
+        :type car: Car
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :return: True if the row was inserted; otherwise false
+        :rtype: bool
+        """
+        inserted: bool = await CarService.insert_car_sale(car, session)
+        if inserted:
+            await self.cache_sale(car)
+        return inserted
+
+    async def insert_multiple_car_sales(
+            self, cars: list[Car], session: AsyncSession) -> bool:
+        """
+        Insert multiple cars sales into the table and invalidate their
+         entries in the cache
+        :param cars: List of Car objects based on table model
+        :type cars: list[Car]
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :return: True if the rows were inserted; otherwise false
+        :rtype: bool
+        """
+        inserted: bool = await CarService.insert_multiple_car_sales(
+            cars, session)
+        if inserted:
+            await self.invalidate([car.id for car in cars])
+        return inserted
+
+    async def invalidate(self, sale_ids: Sequence[int]) -> None:
+        """
+        Remove car sales from the cache
+        :param sale_ids: Unique identifiers of the car sales
+        :type sale_ids: Sequence[int]
+        :return: None
+        :rtype: NoneType
+        """
+        await self.backend.delete_many(
+            [self.cache_key(sale_id) for sale_id in sale_ids])
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Counters of the cache to size it
+        :return: Hits, misses, evictions and expirations of the cache
+        :rtype: CacheStats
+        """
+        return self.backend.stats
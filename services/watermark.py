@@ -0,0 +1,81 @@
+"""
+Watermark service script
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import ArgumentError, PendingRollbackError, \
+    MultipleResultsFound, IdentifierError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import logging_config
+from models.watermark import Watermark
+
+logging_config.setup_logging()
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class WatermarkService:
+    """
+    Watermark services for database
+    """
+
+    @staticmethod
+    async def read_watermark(
+            source_file: str, session: AsyncSession) -> Optional[Watermark]:
+        """
+        Read the watermark of a source file from table
+        :param source_file: Name of the raw source file
+        :type source_file: str
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :return: Watermark information
+        :rtype: Watermark
+        """
+        watermark: Watermark = None
+        try:
+            watermark = await session.get(Watermark, source_file)
+        except MultipleResultsFound as mrf_exc:
+            logger.error(mrf_exc)
+        except ArgumentError as a_exc:
+            logger.error(a_exc)
+        except IdentifierError as i_exc:
+            logger.error(i_exc)
+        return watermark
+
+    @staticmethod
+    async def upsert_watermark(
+            watermark: Watermark, session: AsyncSession) -> bool:
+        """
+        Insert or update the watermark of a source file
+        :param watermark: Watermark object based on table model
+        :type watermark: Watermark
+        :param session: Async Session for Database
+        :type session: AsyncSession
+        :return: True if the row was upserted; otherwise false
+        :rtype: bool
+        """
+        values: dict = {
+            'source_file': watermark.source_file,
+            'content_hash': watermark.content_hash,
+            'max_purchase_date': watermark.max_purchase_date,
+            'rows_loaded': watermark.rows_loaded}
+        statement = insert(Watermark).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Watermark.source_file],
+            set_={**values, 'updated_at': statement.excluded.updated_at})
+        async with session.begin():
+            try:
+                await session.execute(statement)
+            except ArgumentError as a_exc:
+                logger.error(a_exc)
+                await session.rollback()
+                return False
+            except PendingRollbackError as pr_exc:
+                logger.error(pr_exc)
+                await session.rollback()
+                return False
+            await session.commit()
+            logger.info("Watermark upserted successfully")
+            return True
@@ -0,0 +1,71 @@
+"""
+Tests for the eviction of the disk cache
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from core.cache import STAGING_TIMEOUT, DiskCache
+
+
+def disk_cache(directory: Path, max_bytes: int = 1 << 20) -> DiskCache:
+    """
+    Disk cache in a temporary directory
+    :param directory: Directory of the cache
+    :type directory: Path
+    :param max_bytes: Maximum size of the cache
+    :type max_bytes: int
+    :return: Disk cache
+    :rtype: DiskCache
+    """
+    cache: DiskCache = DiskCache(max_bytes=max_bytes)
+    cache.directory = f'{directory}/'
+    return cache
+
+
+def dead_pid() -> int:
+    """
+    Identifier of a process that already exited
+    :return: Process identifier
+    :rtype: int
+    """
+    process: subprocess.Popen = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+def test_evict_removes_stale_staging(tmp_path: Path) -> None:
+    """
+    Staging directories of exited or timed out puts are removed, and the
+     ones of running puts are kept
+    """
+    cache: DiskCache = disk_cache(tmp_path)
+    orphan: Path = tmp_path / f'.orphan-{dead_pid()}'
+    running: Path = tmp_path / f'.running-{os.getpid()}'
+    expired: Path = tmp_path / f'.expired-{os.getpid()}'
+    for staging in (orphan, running, expired):
+        staging.mkdir()
+        (staging / 'figure.png').write_bytes(b'png')
+    old: float = expired.stat().st_mtime - STAGING_TIMEOUT - 1
+    os.utime(expired, (old, old))
+    cache.evict()
+    assert not orphan.exists()
+    assert not expired.exists()
+    assert running.exists()
+
+
+def test_evict_least_recently_used(tmp_path: Path) -> None:
+    """
+    The least recently used entries are evicted until the cache fits
+    """
+    source: Path = tmp_path / 'source.bin'
+    source.write_bytes(b'x' * 100)
+    cache: DiskCache = disk_cache(tmp_path / 'cache', max_bytes=250)
+    os.makedirs(cache.directory)
+    for key in ('first', 'second'):
+        cache.put(key, [str(source)])
+    os.utime(f'{cache.directory}first', (0, 0))
+    cache.put('third', [str(source)])
+    assert cache.get('first') is None
+    assert cache.get('second') and cache.get('third')
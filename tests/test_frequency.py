@@ -0,0 +1,164 @@
+"""
+Tests for the make frequency bins, sketch and classification model
+"""
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy import float16, uint8
+
+from core.config import settings
+from engineering import extract_data_chunks
+from engineering.frequency import MakeClassificationModel, \
+    MakeFrequencySketch, frequency_bin_edges
+from engineering.transformation import remove_missing_values, strip_columns
+
+
+@pytest.fixture(name='chunks', scope='module')
+def fixture_chunks() -> list[pd.Series]:
+    """
+    Make column of the cleaned chunks of raw_data.csv
+    :return: Makes of every chunk
+    :rtype: list[pd.Series]
+    """
+    return [remove_missing_values(strip_columns(chunk))['Make']
+            for chunk in extract_data_chunks('raw_data.csv')]
+
+
+def qcut_classes(makes: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reference classification binning the per-row make frequency with
+     pd.qcut over the whole column
+    :param makes: Make column of the whole file
+    :type makes: pd.Series
+    :return: Class of each row, starting at 1, and the bin edges
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    quantiles: np.ndarray = np.linspace(
+        0.00, 1.00, uint8(settings.NUM_BINS) + 1, dtype=float16)
+    frequencies: pd.Series = makes.map(makes.value_counts()).astype(
+        np.int64)
+    classes, edges = pd.qcut(
+        frequencies, q=quantiles.astype(np.float64), labels=False,
+        retbins=True)
+    return (classes + 1).to_numpy(dtype=uint8), edges
+
+
+def test_bin_edges_match_qcut(chunks: list[pd.Series]) -> None:
+    """
+    The edges from the frequency table are the ones of pd.qcut
+    """
+    makes: pd.Series = pd.concat(chunks, ignore_index=True)
+    _, edges = qcut_classes(makes)
+    np.testing.assert_allclose(
+        frequency_bin_edges(makes.value_counts()), edges)
+
+
+@pytest.mark.parametrize('max_exact', [10000, 0])
+def test_sketch_matches_qcut(
+        chunks: list[pd.Series], max_exact: int) -> None:
+    """
+    Sketches merged across chunks classify the rows as pd.qcut, counting
+     exactly and with count-min
+    """
+    make_sketch: MakeFrequencySketch = MakeFrequencySketch(
+        max_exact=max_exact)
+    for chunk in chunks:
+        make_sketch.merge(
+            MakeFrequencySketch(max_exact=max_exact).update(chunk))
+    assert make_sketch.is_exact == bool(max_exact)
+    expected, _ = qcut_classes(pd.concat(chunks, ignore_index=True))
+    classes: np.ndarray = np.concatenate(
+        [make_sketch.classify(chunk) for chunk in chunks])
+    np.testing.assert_array_equal(classes, expected)
+
+
+def test_classify_unknown_and_missing_makes() -> None:
+    """
+    Unknown and missing makes are the rarest class
+    """
+    make_sketch: MakeFrequencySketch = MakeFrequencySketch().update(
+        pd.Series([f'make{count}' for count in range(1, 21)
+                   for _ in range(count)]))
+    classes: np.ndarray = make_sketch.classify(
+        pd.Series(['Tesla', None, 'make20', 'make1']))
+    assert classes.dtype == uint8
+    assert classes[0] == classes[1] == 1
+    assert classes[2] == settings.NUM_BINS
+    assert classes.min() >= 1
+
+
+def test_classify_overestimate_above_last_edge(
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Count-min overestimates above the last edge are the most frequent class
+    """
+    make_sketch: MakeFrequencySketch = MakeFrequencySketch(
+        max_exact=0).update(pd.Series(['Ford', 'Audi', 'Kia']))
+    edges: np.ndarray = np.arange(settings.NUM_BINS + 1, dtype=np.float64)
+    monkeypatch.setattr(make_sketch, 'bin_edges', lambda: edges)
+    monkeypatch.setattr(
+        make_sketch, 'estimate',
+        lambda keys: np.full(len(keys), edges[-1] + 100))
+    classes: np.ndarray = make_sketch.classify(pd.Series(['Ford', 'Kia']))
+    np.testing.assert_array_equal(classes, [settings.NUM_BINS] * 2)
+
+
+def test_classify_empty_sketch() -> None:
+    """
+    A sketch without counts classifies every row as the rarest class
+    """
+    classes: np.ndarray = MakeFrequencySketch().classify(
+        pd.Series(['Ford', None]))
+    np.testing.assert_array_equal(classes, [1, 1])
+
+
+@pytest.fixture(name='make_counts')
+def fixture_make_counts(
+        monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> pd.Series:
+    """
+    Run in an empty directory for the models, with the counts of twenty
+     makes
+    :param monkeypatch: Pytest fixture to patch attributes
+    :type monkeypatch: pytest.MonkeyPatch
+    :param tmp_path: Temporary directory of the test
+    :type tmp_path: Path
+    :return: Number of rows for each make
+    :rtype: pd.Series
+    """
+    monkeypatch.chdir(tmp_path)
+    return pd.Series({f'make{count}': count * 10 for count in range(1, 21)})
+
+
+def test_resolve_reuses_latest_model(make_counts: pd.Series) -> None:
+    """
+    Without new counts the latest model is reused, and the first one is
+     fitted from the counts when none was saved
+    """
+    assert MakeClassificationModel.resolve() is None
+    fitted: Optional[MakeClassificationModel] = \
+        MakeClassificationModel.resolve(make_counts)
+    reused: Optional[MakeClassificationModel] = \
+        MakeClassificationModel.resolve()
+    assert fitted is not None and reused is not None
+    assert reused.version == fitted.version == 1
+    assert reused.classes == fitted.classes
+
+
+def test_resolve_merges_new_counts(make_counts: pd.Series) -> None:
+    """
+    New counts are stored in the model until they drift beyond the
+     threshold, then a new version is fitted from all the counts
+    """
+    MakeClassificationModel.resolve(make_counts)
+    model: Optional[MakeClassificationModel] = \
+        MakeClassificationModel.resolve(pd.Series({'make1': 5}))
+    assert model is not None and model.version == 1
+    assert MakeClassificationModel.load_latest().new_counts == {'make1': 5}
+    model = MakeClassificationModel.resolve(pd.Series({'make1': 300}))
+    assert model is not None and model.version == 2
+    assert model.make_counts['make1'] == 315
+    assert model.make_counts['make20'] == 200
+    assert not model.new_counts
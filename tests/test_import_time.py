@@ -0,0 +1,30 @@
+"""
+Tests for the import time of the subcommands
+"""
+import pytest
+
+from benchmarks.import_time import FORBIDDEN_MODULES, IMPORT_BUDGETS, \
+    command_imports, import_times
+
+
+@pytest.mark.parametrize('command', list(IMPORT_BUDGETS))
+def test_import_budget(command: str) -> None:
+    """
+    A subcommand imports within its budget and without the heavy modules
+     it does not use, running the imports of its handler in a fresh
+     interpreter
+    """
+    times: dict[str, int] = import_times(command_imports(command))
+    forbidden: list[str] = [
+        module for module in FORBIDDEN_MODULES[command] if module in times]
+    assert not forbidden, f"{command} imports {forbidden}"
+    assert times[''] / 1e6 <= IMPORT_BUDGETS[command]
+
+
+def test_handlers_imports_are_read() -> None:
+    """
+    The imports come from the code of the handlers, and the help runs none
+    """
+    assert command_imports('help') == ()
+    assert 'from db.db import init_db' in command_imports('load')
+    assert 'from db.db import init_db' not in command_imports('extract')
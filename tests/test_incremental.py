@@ -0,0 +1,118 @@
+"""
+Tests for the incremental loads of the raw files
+"""
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pytest
+
+from engineering import database
+from engineering.frequency import MakeClassificationModel
+from models.watermark import Watermark
+from services.watermark import WatermarkService
+
+RAW_FILE: Path = Path(__file__).resolve().parent.parent / 'data' / 'raw' / \
+    'raw_data.csv'
+
+
+class FakeWatermarks:
+    """
+    Fake Watermarks class.
+    Stands in for the watermark table and the loads into the car table.
+    """
+
+    def __init__(self) -> None:
+        self.watermarks: dict[str, Watermark] = {}
+        self.loads: list[pd.DataFrame] = []
+
+    async def read_watermark(
+            self, source_file: str, _session: None) -> Optional[Watermark]:
+        """
+        Read the watermark of a source file from the fake table
+        """
+        return self.watermarks.get(source_file)
+
+    async def upsert_watermark(
+            self, watermark: Watermark, _session: None) -> bool:
+        """
+        Insert or update the watermark of a source file in the fake table
+        """
+        self.watermarks[watermark.source_file] = watermark
+        return True
+
+    async def load_to_db(self, dataframe: pd.DataFrame, _engine) -> bool:
+        """
+        Record the rows loaded into the car table
+        """
+        self.loads.append(dataframe)
+        return True
+
+
+async def no_session() -> None:
+    """
+    Session of the fake tables
+    """
+
+
+@pytest.fixture(name='table')
+def fixture_table(monkeypatch: pytest.MonkeyPatch,
+                  tmp_path: Path) -> FakeWatermarks:
+    """
+    Run in an empty directory with fake watermark and car tables
+    :param monkeypatch: Pytest fixture to patch attributes
+    :type monkeypatch: pytest.MonkeyPatch
+    :param tmp_path: Temporary directory of the test
+    :type tmp_path: Path
+    :return: Fake watermark and car tables
+    :rtype: FakeWatermarks
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data' / 'raw').mkdir(parents=True)
+    table: FakeWatermarks = FakeWatermarks()
+    for name in ('read_watermark', 'upsert_watermark'):
+        monkeypatch.setattr(WatermarkService, name, getattr(table, name))
+    monkeypatch.setattr(database, 'load_to_db', table.load_to_db)
+    monkeypatch.setattr(database, 'get_session', no_session)
+    return table
+
+
+def write_sales(lines: list[str]) -> None:
+    """
+    Write the raw file of the sales with the header of raw_data.csv
+    :param lines: Rows of the raw file
+    :type lines: list[str]
+    :return: None
+    :rtype: NoneType
+    """
+    header: str = RAW_FILE.read_text(encoding='utf-8').splitlines()[0]
+    Path('data/raw/sales.csv').write_text(
+        '\n'.join([header, *lines]) + '\n', encoding='utf-8')
+
+
+def test_only_new_rows_are_loaded(table: FakeWatermarks) -> None:
+    """
+    An unchanged file is skipped, and only the rows at or after the
+     watermark of a changed file are loaded and counted into the model
+    """
+    rows: list[str] = sorted(
+        (line for line in RAW_FILE.read_text(
+            encoding='utf-8').splitlines()[1:] if line.split(', ')[4]),
+        key=lambda line: pd.Timestamp(line.split(', ')[4]))
+    write_sales(rows[:9000])
+    first_rows: int = asyncio.run(database.incremental_load('sales.csv'))
+    assert first_rows == len(table.loads[0]) > 0
+    assert asyncio.run(database.incremental_load('sales.csv')) == 0
+    assert len(table.loads) == 1
+    write_sales(rows)
+    new_rows: int = asyncio.run(database.incremental_load('sales.csv'))
+    watermark: pd.Timestamp = pd.Timestamp(
+        rows[8999].split(', ')[4]).normalize()
+    assert (table.loads[1]['purchase_date'] >= watermark).all()
+    assert new_rows == len(table.loads[1]) <= sum(
+        pd.Timestamp(line.split(', ')[4]) >= watermark for line in rows)
+    model: Optional[MakeClassificationModel] = \
+        MakeClassificationModel.load_latest()
+    assert model is not None
+    assert sum(model.observed_counts()) == first_rows + new_rows
@@ -0,0 +1,58 @@
+"""
+Tests for the staging table of the parallel loads
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import pandas as pd
+import pytest
+
+from engineering import loading
+
+
+class FakeEngine:
+    """
+    Fake Engine class.
+    Records the statements run through its connections and fails the ones
+     that start with a prefix.
+    """
+
+    def __init__(self, failing: str) -> None:
+        self.failing: str = failing
+        self.statements: list[str] = []
+
+    async def execute(self, statement, _parameters: Optional[list] = None
+                      ) -> None:
+        """
+        Record a statement, raising if it starts with the failing prefix
+        """
+        sql: str = str(statement)
+        self.statements.append(sql)
+        if sql.startswith(self.failing):
+            raise RuntimeError(f"Failed: {sql}")
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator['FakeEngine']:
+        """
+        Transaction of the engine, which is its own connection
+        """
+        yield self
+
+    connect = begin
+
+
+@pytest.mark.parametrize(
+    'failing', ['INSERT INTO car_staging', 'INSERT INTO car SELECT'])
+def test_staging_table_dropped_on_failure(
+        monkeypatch: pytest.MonkeyPatch, failing: str) -> None:
+    """
+    The staging table is dropped when a worker or the publish fails
+    """
+    engine: FakeEngine = FakeEngine(failing)
+    monkeypatch.setattr(loading, 'async_engine', engine)
+    dataframe: pd.DataFrame = pd.DataFrame({'color': ['Red'] * 10})
+    with pytest.raises(RuntimeError):
+        asyncio.run(loading.parallel_loading(
+            dataframe, batch_size=2, concurrency=2))
+    assert engine.statements[-1].startswith('DROP TABLE IF EXISTS car_staging')
@@ -0,0 +1,90 @@
+"""
+Tests for the rate limit of the log records and the worker processes
+"""
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from core import logging_config
+from core.logging_config import RateLimitFilter
+
+
+def record(message: str, level: int = logging.DEBUG) -> logging.LogRecord:
+    """
+    Build a log record
+    :param message: Message of the record
+    :type message: str
+    :param level: Level of the record
+    :type level: int
+    :return: Log record
+    :rtype: logging.LogRecord
+    """
+    return logging.LogRecord(
+        'tests', level, __file__, 1, message, None, None)
+
+
+def test_rate_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Records over the limit of a window are suppressed, above the level
+     never
+    """
+    monkeypatch.setattr(logging_config, 'monotonic', lambda: 10.0)
+    rate_limit: RateLimitFilter = RateLimitFilter(max_records=2)
+    assert [rate_limit.filter(record('row')) for _ in range(3)] == [
+        True, True, False]
+    assert rate_limit.filter(record('row', logging.INFO))
+    assert rate_limit.suppressed == 1
+
+
+def test_expired_windows_are_pruned(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Windows of messages not logged for an interval are removed
+    """
+    now: list[float] = [10.0]
+    monkeypatch.setattr(logging_config, 'monotonic', lambda: now[0])
+    rate_limit: RateLimitFilter = RateLimitFilter(max_records=2)
+    for index in range(100):
+        rate_limit.filter(record(f'message {index}'))
+    assert len(rate_limit.windows) == 100
+    now[0] += 1.0
+    assert rate_limit.filter(record('message 0'))
+    assert list(rate_limit.windows) == [('tests', 'message 0')]
+
+
+WORKER_SCRIPT: str = '''
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import analysis
+from core import logging_config
+
+with ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context('spawn'),
+        **logging_config.worker_pool_options(
+            analysis.use_headless_backend)) as executor:
+    list(executor.map(logging.getLogger('tests.worker').warning,
+                      ['worker record {}'.format(index)
+                       for index in range(4)]))
+'''
+
+
+def test_workers_log_through_main_process() -> None:
+    """
+    Spawned workers whose initializer imports a module that sets up
+     logging open no log file and print each record once
+    """
+    project_root: Path = Path(__file__).resolve().parent.parent
+    logs: Path = project_root / 'logs'
+    before: set[Path] = set(logs.glob('*.log'))
+    process: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, '-c', WORKER_SCRIPT], cwd=project_root,
+        env={**os.environ, 'PYTHONPATH': str(project_root)},
+        capture_output=True, text=True, check=True, timeout=120)
+    assert len(set(logs.glob('*.log')) - before) == 1
+    for index in range(4):
+        assert process.stderr.count(f'worker record {index}\n') == 1
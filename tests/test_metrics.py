@@ -0,0 +1,140 @@
+"""
+Tests for the stage metrics of the run report
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+import pytest
+
+from core import metrics
+from core.decorators import profile_stage
+from core.metrics import RunReport, StageMetrics, call_with_stages, \
+    measure_stage, merge_stages
+
+
+@pytest.fixture(name='report')
+def fixture_report(monkeypatch: pytest.MonkeyPatch) -> RunReport:
+    """
+    Replace the run report with an empty one
+    :param monkeypatch: Pytest fixture to patch attributes
+    :type monkeypatch: pytest.MonkeyPatch
+    :return: Empty run report
+    :rtype: RunReport
+    """
+    report: RunReport = RunReport()
+    monkeypatch.setattr(metrics, 'run_report', report)
+    return report
+
+
+def by_stage(report: RunReport) -> dict[str, StageMetrics]:
+    """
+    Metrics of the recorded stages by name
+    :param report: Run report
+    :type report: RunReport
+    :return: Metrics by stage name
+    :rtype: dict[str, StageMetrics]
+    """
+    return {stage.stage: stage for stage in report.stages}
+
+
+def test_nested_stages_are_measured(report: RunReport) -> None:
+    """
+    A stage nested in another one does not overlap it
+    """
+    with measure_stage('outer'):
+        with measure_stage('inner'):
+            sum(range(1000))
+    stages: dict[str, StageMetrics] = by_stage(report)
+    assert not stages['outer'].overlapped
+    assert not stages['inner'].overlapped
+    assert stages['inner'].cpu_time is not None
+    assert stages['outer'].cpu_time >= stages['inner'].cpu_time
+
+
+def test_concurrent_tasks_overlap(report: RunReport) -> None:
+    """
+    Stages of concurrent tasks skip the process-wide measures
+    """
+    async def stage(name: str) -> None:
+        with measure_stage(name):
+            await asyncio.sleep(0.01)
+
+    async def run() -> None:
+        with measure_stage('parent'):
+            await asyncio.gather(stage('first'), stage('second'))
+
+    asyncio.run(run())
+    stages: dict[str, StageMetrics] = by_stage(report)
+    assert not stages['parent'].overlapped
+    for name in ('first', 'second'):
+        assert stages[name].overlapped
+        assert stages[name].cpu_time is None
+        assert stages[name].rss_delta is None
+        assert stages[name].wall_time > 0
+
+
+def test_threads_overlap(report: RunReport) -> None:
+    """
+    A stage running in another thread overlaps the open stages
+    """
+    started: threading.Event = threading.Event()
+    finish: threading.Event = threading.Event()
+
+    def stage() -> None:
+        with measure_stage('thread'):
+            started.set()
+            finish.wait(5)
+
+    thread: threading.Thread = threading.Thread(target=stage)
+    with measure_stage('main'):
+        thread.start()
+        started.wait(5)
+        finish.set()
+        thread.join()
+    stages: dict[str, StageMetrics] = by_stage(report)
+    assert stages['main'].overlapped
+    assert stages['thread'].overlapped
+
+
+def test_sequential_stages_do_not_overlap(report: RunReport) -> None:
+    """
+    Stages run one after the other keep all their measures
+    """
+    for name in ('first', 'second'):
+        with measure_stage(name):
+            pass
+    assert not any(stage.overlapped for stage in report.stages)
+    assert all(stage.rss_delta is not None for stage in report.stages)
+
+
+@profile_stage('worker')
+def worker_stage(rows: int) -> pd.DataFrame:
+    """
+    Stage run in a worker process
+    :param rows: Number of rows of the output
+    :type rows: int
+    :return: Dataframe with the rows
+    :rtype: pd.DataFrame
+    """
+    return pd.DataFrame({'row': range(rows)})
+
+
+def test_worker_stages_are_merged(report: RunReport) -> None:
+    """
+    Stages measured in spawned workers reach the run report of the main
+     process with the results of their tasks
+    """
+    with ProcessPoolExecutor(
+            max_workers=2,
+            mp_context=multiprocessing.get_context('spawn')) as executor:
+        frames: list[pd.DataFrame] = merge_stages(executor.map(
+            partial(call_with_stages, worker_stage), [3, 5]))
+    assert [len(frame) for frame in frames] == [3, 5]
+    assert sorted(stage.rows_out for stage in report.stages) == [3, 5]
+    assert all(stage.stage == 'worker' and stage.pid != os.getpid()
+               for stage in report.stages)
@@ -0,0 +1,277 @@
+"""
+Tests for the object cache backends and the cached car service
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional, Sequence
+
+import pytest
+
+from core import object_cache
+from core.object_cache import CacheBackend, LRUCache, LocalClient, \
+    SharedCache
+from models.car import Car
+from schema.gender import Gender
+from services.car import CachedCarService, CarService
+
+
+class Clock:
+    """
+    Clock class.
+    Monotonic clock moved by hand to expire the entries.
+    """
+
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(name='clock')
+def fixture_clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    """
+    Replace the clock of the cache module
+    :param monkeypatch: Pytest fixture to patch attributes
+    :type monkeypatch: pytest.MonkeyPatch
+    :return: Clock of the cache module
+    :rtype: Clock
+    """
+    clock: Clock = Clock()
+    monkeypatch.setattr(object_cache, 'monotonic', clock)
+    return clock
+
+
+def make_car(sale_id: int, sale_price: float = 20000.0) -> Car:
+    """
+    Build a car sale
+    :param sale_id: Unique identifier of the car sale
+    :type sale_id: int
+    :param sale_price: Price of the sale
+    :type sale_price: float
+    :return: Car object based on table model
+    :rtype: Car
+    """
+    return Car(
+        id=sale_id, buyer_gender=Gender.FEMALE, color='Red', new_car=True,
+        purchase_date=datetime(2021, 3, 4, 10, 30), buyer_age=35,
+        discount=0.1, sale_price=sale_price, purchase_year=2021,
+        make='Ford', make_classification=2)
+
+
+class FakeSession:
+    """
+    Fake Session class.
+    Stands in for the session the reads of the loaders are bound to.
+    """
+
+
+class FakeCarService:
+    """
+    Fake Car Service class.
+    Stands in for the table of the car service and counts the reads.
+    """
+
+    def __init__(self, cars: list[Car]) -> None:
+        self.cars: dict[int, Car] = {car.id: car for car in cars}
+        self.reads: list[Sequence[int]] = []
+
+    async def read_sales_by_ids(
+            self, sale_ids: Sequence[int], _session: FakeSession
+    ) -> list[Car]:
+        """
+        Read car sales from the fake table
+        """
+        self.reads.append(list(sale_ids))
+        return [self.cars[sale_id] for sale_id in sorted(sale_ids)
+                if sale_id in self.cars]
+
+    async def insert_car_sale(
+            self, car: Car, _session: FakeSession) -> bool:
+        """
+        Insert a car sale into the fake table
+        """
+        self.cars[car.id] = car
+        return True
+
+    async def insert_multiple_car_sales(
+            self, cars: list[Car], _session: FakeSession) -> bool:
+        """
+        Insert car sales into the fake table
+        """
+        self.cars.update({car.id: car for car in cars})
+        return True
+
+
+@pytest.fixture(name='table')
+def fixture_table(monkeypatch: pytest.MonkeyPatch) -> FakeCarService:
+    """
+    Replace the database reads and writes of the car service
+    :param monkeypatch: Pytest fixture to patch attributes
+    :type monkeypatch: pytest.MonkeyPatch
+    :return: Fake table with two car sales
+    :rtype: FakeCarService
+    """
+    table: FakeCarService = FakeCarService([make_car(1), make_car(2)])
+    for name in ('read_sales_by_ids', 'insert_car_sale',
+                 'insert_multiple_car_sales'):
+        monkeypatch.setattr(CarService, name, getattr(table, name))
+    return table
+
+
+def backends() -> list[CacheBackend]:
+    """
+    Backends under test, with a TTL of ten seconds
+    :return: In-process and shared backends
+    :rtype: list[CacheBackend]
+    """
+    return [LRUCache(max_entries=2, ttl=10.0),
+            SharedCache(LocalClient(), ttl=10.0)]
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_hit_and_miss(backend: CacheBackend) -> None:
+    """
+    A stored key is a hit and an unknown key is a miss
+    """
+    asyncio.run(backend.set('a', {'value': 1}))
+    assert asyncio.run(backend.get('a')) == {'value': 1}
+    assert asyncio.run(backend.get('b')) is None
+    assert (backend.stats.hits, backend.stats.misses) == (1, 1)
+    assert backend.stats.hit_ratio == 0.5
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_ttl_expiry(backend: CacheBackend, clock: Clock) -> None:
+    """
+    An entry older than the TTL is a miss
+    """
+    asyncio.run(backend.set('a', 1))
+    clock.now += 9.0
+    assert asyncio.run(backend.get('a')) == 1
+    clock.now += 2.0
+    assert asyncio.run(backend.get('a')) is None
+    assert backend.stats.misses == 1
+
+
+def test_lru_eviction() -> None:
+    """
+    The least recently used entry is evicted over the maximum entries
+    """
+    cache: LRUCache = LRUCache(max_entries=2, ttl=10.0)
+    asyncio.run(cache.set('a', 1))
+    asyncio.run(cache.set('b', 2))
+    asyncio.run(cache.get('a'))
+    asyncio.run(cache.set('c', 3))
+    assert asyncio.run(cache.get('b')) is None
+    assert asyncio.run(cache.get('a')) == 1
+    assert asyncio.run(cache.get('c')) == 3
+    assert cache.stats.evictions == 1
+    assert cache.stats.entries == 2
+
+
+def test_lru_expiration_counted(clock: Clock) -> None:
+    """
+    Expired entries are removed and counted
+    """
+    cache: LRUCache = LRUCache(ttl=1.0)
+    asyncio.run(cache.set('a', 1))
+    clock.now += 1.0
+    assert asyncio.run(cache.get('a')) is None
+    assert cache.stats.expirations == 1
+    assert cache.stats.entries == 0
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_read_through(backend: CacheBackend, table: FakeCarService) -> None:
+    """
+    The second read of a sale is served by the cache with a new Car
+    """
+    service: CachedCarService = CachedCarService(backend)
+    session: FakeSession = FakeSession()
+    first: Optional[Car] = asyncio.run(service.read_sale_by_id(1, session))
+    second: Optional[Car] = asyncio.run(service.read_sale_by_id(1, session))
+    assert len(table.reads) == 1
+    assert first is not None and second is not None
+    assert second is not first
+    assert second.purchase_date == datetime(2021, 3, 4, 10, 30)
+    assert second.buyer_gender is Gender.FEMALE
+    assert CachedCarService.to_record(second) == \
+           CachedCarService.to_record(first)
+    assert service.stats.hits == 1
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_missing_sale_not_cached(
+        backend: CacheBackend, table: FakeCarService) -> None:
+    """
+    Misses are read again, so a sale inserted later is found
+    """
+    service: CachedCarService = CachedCarService(backend)
+    session: FakeSession = FakeSession()
+    assert asyncio.run(service.read_sale_by_id(3, session)) is None
+    table.cars[3] = make_car(3)
+    assert asyncio.run(service.read_sale_by_id(3, session)) is not None
+    assert len(table.reads) == 2
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_read_many_only_misses(
+        backend: CacheBackend, table: FakeCarService) -> None:
+    """
+    Reading many sales only queries the ones not cached
+    """
+    service: CachedCarService = CachedCarService(backend)
+    session: FakeSession = FakeSession()
+    asyncio.run(service.read_sale_by_id(1, session))
+    cars: list[Car] = asyncio.run(
+        service.read_sales_by_ids([2, 1, 2], session))
+    assert [car.id for car in cars] == [1, 2]
+    assert table.reads == [[1], [2]]
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_write_through(backend: CacheBackend, table: FakeCarService) -> None:
+    """
+    A single insert is cached without reading the table
+    """
+    service: CachedCarService = CachedCarService(backend)
+    session: FakeSession = FakeSession()
+    assert asyncio.run(service.insert_car_sale(make_car(5), session))
+    car: Optional[Car] = asyncio.run(service.read_sale_by_id(5, session))
+    assert car is not None and car.id == 5
+    assert not table.reads
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_bulk_insert_invalidates(
+        backend: CacheBackend, table: FakeCarService) -> None:
+    """
+    A bulk insert removes the stale entries of its sales
+    """
+    service: CachedCarService = CachedCarService(backend)
+    session: FakeSession = FakeSession()
+    asyncio.run(service.read_sale_by_id(1, session))
+    asyncio.run(service.insert_multiple_car_sales(
+        [make_car(1, sale_price=30000.0)], session))
+    car: Optional[Car] = asyncio.run(service.read_sale_by_id(1, session))
+    assert car is not None and car.sale_price == 30000.0
+    assert len(table.reads) == 2
+
+
+def test_concurrent_misses_share_a_query(table: FakeCarService) -> None:
+    """
+    Misses of the same session in one event loop iteration are read in a
+     single query
+    """
+    service: CachedCarService = CachedCarService(LRUCache())
+    session: FakeSession = FakeSession()
+
+    async def read_concurrently() -> list[Optional[Car]]:
+        return list(await asyncio.gather(
+            *(service.read_sale_by_id(sale_id, session)
+              for sale_id in (1, 2, 1, 3))))
+
+    cars: list[Optional[Car]] = asyncio.run(read_concurrently())
+    assert [car and car.id for car in cars] == [1, 2, 1, None]
+    assert table.reads == [[1, 2, 3]]
@@ -0,0 +1,47 @@
+"""
+Tests for the CSV parse engines of the persistence manager
+"""
+import pandas as pd
+import pytest
+from pandas import NaT
+
+from core.persistence_manager import CsvEngine, DataType, \
+    PersistenceManager
+from engineering.extraction import D_TYPES, convert_gender_column
+from engineering.transformation import remove_missing_values, strip_columns
+
+STRING_COLUMNS: list[str] = ['Color', 'Make', 'New Car']
+
+
+@pytest.fixture(name='baseline', scope='module')
+def fixture_baseline() -> pd.DataFrame:
+    """
+    Rows of raw_data.csv kept by the original parser, which turned missing
+     colors and makes into the string nan and missing new car flags into
+     True, with the missing values of those columns
+    :return: Raw rows kept by the original parser
+    :rtype: pd.DataFrame
+    """
+    raw: pd.DataFrame = pd.read_csv(
+        f'{DataType.RAW.value}raw_data.csv', sep=', ', engine='python',
+        header=0, na_values=[NaT, 'nan', '', ' '])
+    others: list[str] = [column for column in raw.columns
+                         if column not in STRING_COLUMNS + ['Buyer Gender']]
+    return raw[raw[others].notna().all(axis=1)]
+
+
+@pytest.mark.parametrize('engine', list(CsvEngine))
+def test_engines_row_count(baseline: pd.DataFrame, engine: CsvEngine) -> None:
+    """
+    Every engine keeps the rows of the original parser except the ones
+     with a blank or nan color, make or new car flag, which are missing
+    """
+    dataframe: pd.DataFrame = PersistenceManager.load_from_csv(
+        'raw_data.csv', dtypes=D_TYPES, engine=engine)
+    dataframe['Buyer Gender'] = convert_gender_column(
+        dataframe['Buyer Gender'])
+    cleaned: pd.DataFrame = remove_missing_values(strip_columns(dataframe))
+    missing_strings: int = int(
+        baseline[STRING_COLUMNS].isna().any(axis=1).sum())
+    assert len(cleaned) == len(baseline) - missing_strings
+    assert (len(baseline), missing_strings) == (10535, 291)
@@ -0,0 +1,68 @@
+"""
+Tests for the single-pass column profiler
+"""
+import numpy as np
+import pandas as pd
+
+from analysis.profiler import ColumnProfile, Profiler, profile_chunks, \
+    profile_dataframe
+
+
+def column(profile_columns: list[ColumnProfile], name: str) -> ColumnProfile:
+    """
+    Profile of a column by name
+    :param profile_columns: Profiles of the columns
+    :type profile_columns: list[ColumnProfile]
+    :param name: Name of the column
+    :type name: str
+    :return: Profile of the column
+    :rtype: ColumnProfile
+    """
+    return next(item for item in profile_columns if item.name == name)
+
+
+def test_chunks_match_single_pass() -> None:
+    """
+    Profiling by chunks gives the counts of a single pass
+    """
+    dataframe: pd.DataFrame = pd.DataFrame({
+        'color': pd.Series(['Red', 'Blue', 'Red', None, 'Green'] * 200),
+        'price': np.arange(1000, dtype=np.float64)})
+    whole: ColumnProfile = column(
+        profile_dataframe(dataframe).columns, 'color')
+    chunked: ColumnProfile = column(profile_chunks(
+        dataframe.iloc[start:start + 128] for start in range(0, 1000, 128)
+    ).columns, 'color')
+    assert chunked.unique == whole.unique == 3
+    assert chunked.top == whole.top
+    assert chunked.top[0].value == 'Red' and chunked.top[0].count == 400
+
+
+def test_counters_are_bounded() -> None:
+    """
+    High-cardinality columns keep at most max_counters values, and the
+     heavy hitters and the distinct estimate survive
+    """
+    values: pd.Series = pd.Series(
+        ['frequent'] * 5000 + [f'rare{index}' for index in range(20000)])
+    profiler: Profiler = Profiler(sample_size=1000, max_counters=100)
+    for start in range(0, len(values), 1000):
+        profiler.update(values.iloc[start:start + 1000].to_frame('make'))
+    assert len(profiler.columns['make'].value_counts) <= 100
+    profile: ColumnProfile = column(profiler.result().columns, 'make')
+    assert profile.top[0].value == 'frequent'
+    assert 5000 - 25000 / 101 <= profile.top[0].count <= 5000
+    assert abs(profile.unique - 20001) / 20001 < 0.2
+
+
+def test_seeded_samples_are_reproducible() -> None:
+    """
+    Profilers with the same seed sample the same quantiles
+    """
+    dataframe: pd.DataFrame = pd.DataFrame(
+        {'price': np.random.default_rng(1).normal(size=50000)})
+    first: ColumnProfile = column(Profiler(
+        sample_size=100, seed=7).update(dataframe).result().columns, 'price')
+    second: ColumnProfile = column(Profiler(
+        sample_size=100, seed=7).update(dataframe).result().columns, 'price')
+    assert first.quantiles == second.quantiles
@@ -0,0 +1,27 @@
+"""
+Tests for the transformation steps
+"""
+import pandas as pd
+
+from engineering.transformation import parse_date_column
+
+
+def test_dates_parsed_at_day_precision() -> None:
+    """
+    Purchase dates keep the day of the sale but not its time, whether
+     they are strings or already parsed
+    """
+    dates: pd.Series = pd.Series(
+        ['8/14/2021 19:23', '6/5/2019 23:58', None, '8/14/2021 19:23'])
+    parsed: pd.DataFrame = parse_date_column(
+        pd.DataFrame({'Purchase Date': dates}))
+    assert parsed['Purchase Date'].tolist()[:2] == [
+        pd.Timestamp(2021, 8, 14), pd.Timestamp(2019, 6, 5)]
+    assert parsed['Purchase Date'].isna().tolist() == [
+        False, False, True, False]
+    assert parsed['Purchase Year'].tolist() == [2021, 2019, 0, 2021]
+    reparsed: pd.DataFrame = parse_date_column(pd.DataFrame(
+        {'Purchase Date': pd.to_datetime(
+            dates.dropna(), format='%m/%d/%Y %H:%M')}))
+    assert reparsed['Purchase Date'].equals(
+        parsed['Purchase Date'].dropna())